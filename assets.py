@@ -0,0 +1,217 @@
+"""
+Pythoban Assets
+
+The images of a scene are decoded once, packed into texture atlases converted
+to the display's pixel format and cached on disk as raw pixels, so later starts
+skip PNG decoding. A scene's images are only loaded the first time it is shown.
+"""
+
+import hashlib
+import json
+import os
+from enum import ReprEnum
+from os.path import getmtime, join
+from typing import NamedTuple
+import pygame
+
+# Bump when the cache layout changes so stale caches are rebuilt
+CACHE_VERSION = 1
+MAX_ATLAS_WIDTH = 2048
+
+
+class SceneEnum(str, ReprEnum):
+    menu = "menu"
+    level = "level"
+    tiles = "tiles"  # Board tiles alone, for rendering without the game
+
+
+class AtlasEnum(str, ReprEnum):
+    opaque = "opaque"
+    translucent = "translucent"
+
+
+class AssetSpec(NamedTuple):
+    """
+    An image file and the size to scale it to when it is loaded.
+
+    With only one of ``width`` and ``height`` the aspect ratio is kept.
+    """
+
+    path: str
+    width: int | None = None
+    height: int | None = None
+
+
+class AssetManager:
+    """
+    Loads the images of each scene on demand.
+
+    Opaque and translucent images go to separate atlases, converted with
+    ``convert()`` and ``convert_alpha()`` respectively once a display mode is
+    set. ``cache_directory`` can be ``None`` to skip the disk cache.
+    """
+
+    def __init__(
+        self,
+        scenes: dict[str, dict[str, AssetSpec]],
+        cache_directory: str | None = ".cache/assets",
+    ) -> None:
+        self.scenes = scenes
+        self.cache_directory = cache_directory
+        self._images: dict[str, dict[str, pygame.Surface]] = {}
+
+    def is_loaded(self, scene: str) -> bool:
+        return scene in self._images
+
+    def get(self, scene: str, name: str) -> pygame.Surface:
+        return self.load_scene(scene)[name]
+
+    def load_scene(self, scene: str) -> dict[str, pygame.Surface]:
+        """Return every image of a scene by name, loading them if needed."""
+        if scene not in self._images:
+            specs = self.scenes[scene]
+            cache_path = self._get_cache_path(scene, specs)
+            atlases = self._read_cache(cache_path) if cache_path else None
+            if atlases is None:
+                atlases = self._build_atlases(specs)
+                if cache_path:
+                    self._write_cache(cache_path, *atlases)
+            self._images[scene] = self._cut_images(*atlases)
+        return self._images[scene]
+
+    def unload_scene(self, scene: str) -> None:
+        self._images.pop(scene, None)
+
+    def _get_cache_path(self, scene: str, specs: dict[str, AssetSpec]) -> str | None:
+        """Cache file stem, changing whenever a source file or size changes."""
+        if self.cache_directory is None:
+            return None
+        sources = [
+            [name, spec.path, getmtime(spec.path), spec.width, spec.height]
+            for name, spec in sorted(specs.items())
+        ]
+        digest = hashlib.sha1(
+            json.dumps([CACHE_VERSION, sources]).encode()
+        ).hexdigest()[:16]
+        return join(self.cache_directory, f"{scene}-{digest}")
+
+    @staticmethod
+    def _load_image(spec: AssetSpec) -> pygame.Surface:
+        image = pygame.image.load(spec.path)
+        width, height = spec.width, spec.height
+        if width is None and height is None:
+            return image
+        if width is None:
+            width = image.get_width() * height // image.get_height()
+        elif height is None:
+            height = image.get_height() * width // image.get_width()
+        return pygame.transform.scale(image, (width, height))
+
+    @staticmethod
+    def _is_opaque(image: pygame.Surface) -> bool:
+        width, height = image.get_size()
+        return pygame.mask.from_surface(image, 254).count() == width * height
+
+    def _build_atlases(self, specs: dict[str, AssetSpec]):
+        """Decode the images and pack them into an opaque and a translucent atlas."""
+        groups: dict[AtlasEnum, dict[str, pygame.Surface]] = {
+            AtlasEnum.opaque: {},
+            AtlasEnum.translucent: {},
+        }
+        for name, spec in specs.items():
+            image = self._load_image(spec)
+            kind = AtlasEnum.opaque if self._is_opaque(image) else AtlasEnum.translucent
+            groups[kind][name] = image
+
+        surfaces = {}
+        layout = {}
+        for kind, images in groups.items():
+            positions, size = self._pack(
+                {name: image.get_size() for name, image in images.items()}
+            )
+            flags = pygame.SRCALPHA if kind == AtlasEnum.translucent else 0
+            atlas = pygame.Surface(size, flags, 32)
+            for name, image in images.items():
+                atlas.blit(image, positions[name])
+                layout[name] = [kind.value, *positions[name], *image.get_size()]
+            surfaces[kind] = atlas
+        return surfaces, layout
+
+    @staticmethod
+    def _pack(sizes: dict[str, tuple[int, int]]):
+        """Shelf packing: tallest images first, left to right in rows."""
+        positions = {}
+        atlas_width = max([MAX_ATLAS_WIDTH] + [width for width, _ in sizes.values()])
+        x = y = shelf_height = used_width = 0
+        for name, (width, height) in sorted(
+            sizes.items(), key=lambda item: item[1][1], reverse=True
+        ):
+            if x + width > atlas_width:
+                x, y, shelf_height = 0, y + shelf_height, 0
+            positions[name] = (x, y)
+            x += width
+            used_width = max(used_width, x)
+            shelf_height = max(shelf_height, height)
+        return positions, (max(1, used_width), max(1, y + shelf_height))
+
+    def _cut_images(self, surfaces, layout) -> dict[str, pygame.Surface]:
+        if pygame.display.get_surface() is not None:
+            surfaces = {
+                kind: (
+                    atlas.convert_alpha()
+                    if kind == AtlasEnum.translucent
+                    else atlas.convert()
+                )
+                for kind, atlas in surfaces.items()
+            }
+        return {
+            name: surfaces[AtlasEnum(kind)].subsurface((x, y, width, height))
+            for name, (kind, x, y, width, height) in layout.items()
+        }
+
+    @staticmethod
+    def _read_cache(cache_path: str):
+        try:
+            with open(f"{cache_path}.json") as file:
+                layout_file = json.load(file)
+            surfaces = {}
+            for kind, size in layout_file["atlases"].items():
+                kind = AtlasEnum(kind)
+                pixel_format = "RGBA" if kind == AtlasEnum.translucent else "RGB"
+                with open(f"{cache_path}-{kind.value}.raw", "rb") as file:
+                    surfaces[kind] = pygame.image.frombytes(
+                        file.read(), tuple(size), pixel_format
+                    )
+            return surfaces, layout_file["images"]
+        except (OSError, ValueError, KeyError):
+            return None  # Missing or corrupt, so it gets rebuilt
+
+    @staticmethod
+    def _write_cache(cache_path: str, surfaces, layout) -> None:
+        directory, stem = os.path.split(cache_path)
+        scene = stem.rsplit("-", 1)[0]
+        os.makedirs(directory, exist_ok=True)
+        for file in os.listdir(directory):
+            if file.startswith(f"{scene}-") and not file.startswith(stem):
+                os.remove(join(directory, file))  # Cache of older sources
+
+        atlases = {}
+        for kind, atlas in surfaces.items():
+            pixel_format = "RGBA" if kind == AtlasEnum.translucent else "RGB"
+            _write_atomically(
+                f"{cache_path}-{kind.value}.raw",
+                pygame.image.tobytes(atlas, pixel_format),
+            )
+            atlases[kind.value] = atlas.get_size()
+        # The layout goes last: once it exists the whole cache is complete
+        _write_atomically(
+            f"{cache_path}.json",
+            json.dumps({"atlases": atlases, "images": layout}).encode(),
+        )
+
+
+def _write_atomically(path: str, data: bytes) -> None:
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(data)
+    os.replace(temporary_path, path)
@@ -0,0 +1,87 @@
+"""
+Benchmark for image loading and blitting.
+
+Times loading every scene's images straight from the PNG files, as the game
+used to, against the asset manager with a cold and a warm disk cache, then
+compares the cost of blitting unconverted and converted images. Runs
+off-screen with the SDL dummy video driver.
+Run with ``python benchmarks/asset_loading.py``.
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame  # noqa: E402
+from assets import AssetManager  # noqa: E402
+from game import Game  # noqa: E402
+
+REPEATS = 5
+BLITS = 2000
+
+
+def load_unconverted(scenes) -> dict:
+    """Decode and scale every image on each call, as before the atlas."""
+    return {
+        name: AssetManager._load_image(spec)
+        for specs in scenes.values()
+        for name, spec in specs.items()
+    }
+
+
+def load_with_manager(scenes, cache_directory) -> dict:
+    assets = AssetManager(scenes, cache_directory)
+    return {
+        name: image
+        for scene in scenes
+        for name, image in assets.load_scene(scene).items()
+    }
+
+
+def time_blits(screen, image) -> float:
+    return timeit.timeit(lambda: screen.blit(image, (0, 0)), number=BLITS) / BLITS
+
+
+def main():
+    pygame.init()
+    game = Game()
+    screen = pygame.display.set_mode((game.screen_width, game.screen_height))
+    scenes = game.get_scene_assets()
+
+    with tempfile.TemporaryDirectory() as cache_directory:
+        unconverted = timeit.timeit(lambda: load_unconverted(scenes), number=REPEATS)
+        cold = 0.0
+        for _ in range(REPEATS):
+            for file in os.listdir(cache_directory):
+                os.remove(os.path.join(cache_directory, file))
+            cold += timeit.timeit(
+                lambda: load_with_manager(scenes, cache_directory), number=1
+            )
+        warm = timeit.timeit(
+            lambda: load_with_manager(scenes, cache_directory), number=REPEATS
+        )
+        images = load_with_manager(scenes, cache_directory)
+    plain_images = load_unconverted(scenes)
+
+    print(f"{'loading all scenes':<28} {'ms':>8}")
+    print(f"{'PNG files, unconverted':<28} {unconverted / REPEATS * 1000:>8.2f}")
+    print(f"{'atlas, cold cache':<28} {cold / REPEATS * 1000:>8.2f}")
+    print(f"{'atlas, warm cache':<28} {warm / REPEATS * 1000:>8.2f}")
+    print()
+    print(f"{'blit':<28} {'unconverted us':>15} {'converted us':>13}")
+    for name in ("background", "title", "Floor", "Box"):
+        print(
+            f"{name:<28} {time_blits(screen, plain_images[name]) * 1e6:>15.2f}"
+            f" {time_blits(screen, images[name]) * 1e6:>13.2f}"
+        )
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Headless rendering benchmark.
+
+Times rendering the starting position of every level as a thumbnail and
+streaming the frames of a long move sequence, off-screen with the SDL dummy
+video driver. The frame stream is compared with rendering every frame from
+scratch.
+Run with ``python benchmarks/headless_rendering.py [levels directory]``.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from model import Level  # noqa: E402
+from renderer import HeadlessRenderer  # noqa: E402
+from simulator import Simulator  # noqa: E402
+from validate_levels import get_level_paths  # noqa: E402
+
+THUMBNAILS = 2000
+MOVES = "rrrrddddlllluuuu" * 25
+TILE_SIZE = 16
+
+
+def main():
+    levels_directory = sys.argv[1] if len(sys.argv) > 1 else "levels"
+    levels = [Level.load_from_file(path) for path in get_level_paths(levels_directory)]
+    renderer = HeadlessRenderer(TILE_SIZE, cache_directory=tempfile.mkdtemp())
+
+    start = time.perf_counter()
+    for index in range(THUMBNAILS):
+        renderer.render(levels[index % len(levels)].map)
+    elapsed = time.perf_counter() - start
+    print(f"thumbnails per minute: {THUMBNAILS / elapsed * 60:,.0f}")
+
+    level = max(levels, key=lambda level: level.map.width * level.map.height)
+    start = time.perf_counter()
+    frames = sum(1 for _ in renderer.stream_frames(level, MOVES))
+    streamed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    copy = level.snapshot()
+    simulator = Simulator(copy)
+    renderer.render(copy.map)
+    for move in MOVES:
+        simulator.apply_moves(move)
+        renderer.render(copy.map)
+    redrawn = time.perf_counter() - start
+    print(
+        f"frames per second: {frames / streamed:,.0f} streamed,"
+        f" {frames / redrawn:,.0f} redrawn from scratch"
+    )
+
+
+if __name__ == "__main__":
+    main()
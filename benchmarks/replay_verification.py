@@ -0,0 +1,58 @@
+"""
+Replay verification benchmark.
+
+Solves every level in a directory, turns the solutions into replays with a
+move every 300ms and times verifying them over and over, headless.
+Run with ``python benchmarks/replay_verification.py [levels directory]``.
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from model import Level, Score  # noqa: E402
+from replay import Replay, ReplayStatusEnum, verify_replays  # noqa: E402
+from solver import Solver  # noqa: E402
+from validate_levels import get_level_paths  # noqa: E402
+
+REPLAYS = 5000
+MOVE_INTERVAL = 300  # ms
+
+
+def main():
+    levels_directory = sys.argv[1] if len(sys.argv) > 1 else "levels"
+    levels = [Level.load_from_file(path) for path in get_level_paths(levels_directory)]
+    replays = []
+    for level in levels:
+        solution = Solver(level.snapshot(), time_limit=20).solve()
+        if not solution.solved:
+            continue
+        times = [MOVE_INTERVAL * (i + 1) for i in range(len(solution.moves))]
+        replays.append(
+            Replay(
+                map_hash=level.map.content_hash(),
+                moves=solution.moves,
+                times=times,
+                score=Score(time=times[-1] // 1000, steps=len(times)),
+            )
+        )
+    batch = [replays[i % len(replays)] for i in range(REPLAYS)]
+    moves = sum(len(replay.moves) for replay in batch)
+
+    start = time.perf_counter()
+    statuses = verify_replays(levels, batch)
+    elapsed = time.perf_counter() - start
+
+    assert all(status == ReplayStatusEnum.valid for status in statuses)
+    print(
+        f"{len(batch) / elapsed:,.0f} replays per second"
+        f" ({moves / len(batch):.0f} moves on average)"
+    )
+
+
+if __name__ == "__main__":
+    main()
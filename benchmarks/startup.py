@@ -0,0 +1,84 @@
+"""
+Startup benchmark.
+
+Times how long the game takes to put its first frame on screen and to finish
+loading, for the staged startup (main menu first, the rest on a worker thread)
+against loading everything before the first frame, with cold and warm caches.
+Runs off-screen with the SDL dummy drivers.
+Run with ``python benchmarks/startup.py [levels directory]``.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame  # noqa: E402
+from game import Game  # noqa: E402
+
+RUNS = 5
+
+
+class BenchmarkGame(Game):
+    def play_music(self):
+        # Checkouts without the audio files still get a timing
+        if os.path.exists(self._music_path):
+            super().play_music()
+
+
+def time_startup(levels_directory: str, cache_directory: str, staged: bool):
+    game = BenchmarkGame(levels_directory=levels_directory)
+    game._asset_cache_directory = os.path.join(cache_directory, "assets")
+    game._level_cache_directory = os.path.join(cache_directory, "levels")
+    start = time.perf_counter()
+    if staged:
+        game.init_game()
+    else:
+        game.init_pygame()
+        game.load_levels()
+        game.load_images()
+        game.load_level_images()
+        game.play_music()
+    game.draw_frame()
+    first_frame = time.perf_counter() - start
+    if staged:
+        game._loading_thread.join()
+    loaded = time.perf_counter() - start
+    pygame.quit()
+    return first_frame, loaded
+
+
+def main():
+    levels_directory = sys.argv[1] if len(sys.argv) > 1 else "levels"
+    print(f"{'startup':<24} {'first frame ms':>15} {'fully loaded ms':>16}")
+    for staged in (False, True):
+        for warm in (False, True):
+            first_frames, loads = [], []
+            cache_directory = tempfile.mkdtemp()
+            if warm:
+                time_startup(levels_directory, cache_directory, staged)
+            for _ in range(RUNS):
+                if not warm:
+                    shutil.rmtree(cache_directory)
+                first_frame, loaded = time_startup(
+                    levels_directory, cache_directory, staged
+                )
+                first_frames.append(first_frame)
+                loads.append(loaded)
+            shutil.rmtree(cache_directory, ignore_errors=True)
+            name = f"{'staged' if staged else 'all up front'}, {'warm' if warm else 'cold'}"
+            print(
+                f"{name:<24} {min(first_frames) * 1000:>15.1f}"
+                f" {min(loads) * 1000:>16.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Micro-benchmark for win detection.
+
+Times a box push followed by a win check on square rooms of growing size,
+comparing the running boxes-on-goals counter against a full board scan.
+Run with ``python benchmarks/win_detection.py``.
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from model import Map, TileEnum  # noqa: E402
+
+SIZES = [10, 50, 100, 200, 400]
+PUSHES = 20000
+
+
+def make_room(size: int) -> Map:
+    """A walled room with a goal on every other cell of the diagonal."""
+    rows = []
+    for y in range(size):
+        row = []
+        for x in range(size):
+            if x in (0, size - 1) or y in (0, size - 1):
+                row.append("W")
+            elif x == y and x % 2:
+                row.append("G")
+            else:
+                row.append(" ")
+        rows.append(row)
+    rows[1][2] = "P"
+    rows[2][3] = "B"
+    return Map.from_string("\n".join("".join(row) for row in rows))
+
+
+def full_scan(level_map: Map) -> bool:
+    """Win check as a scan over every cell of the board."""
+    tiles, boxes, goal = level_map.tiles, level_map.boxes, int(TileEnum.goal)
+    boxes_on_goals = 0
+    for index in range(level_map.width * level_map.height):
+        if tiles[index] == goal and boxes[index]:
+            boxes_on_goals += 1
+    return boxes_on_goals == len(level_map.goals)
+
+
+def bench(size: int) -> tuple[float, float]:
+    level_map = make_room(size)
+    source, target = level_map.index(3, 2), level_map.index(3, 3)
+
+    def push(check):
+        level_map.move_box(source, target)
+        check()
+        level_map.move_box(target, source)
+        check()
+
+    # The scan is O(width * height), so give big boards fewer repetitions
+    scan_pushes = max(5, PUSHES * 10 // (size * size))
+    counter = timeit.timeit(lambda: push(level_map.is_solved), number=PUSHES)
+    scan = timeit.timeit(lambda: push(lambda: full_scan(level_map)), number=scan_pushes)
+    return counter / (2 * PUSHES), scan / (2 * scan_pushes)
+
+
+def main():
+    print(f"{'size':>8} {'counter (us/push)':>18} {'full scan (us/push)':>20}")
+    for size in SIZES:
+        counter, scan = bench(size)
+        print(f"{size:>4}x{size:<4} {counter * 1e6:>18.3f} {scan * 1e6:>20.3f}")
+
+
+if __name__ == "__main__":
+    main()
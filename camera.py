@@ -0,0 +1,89 @@
+"""
+Pythoban Camera
+
+The part of a map that is shown on screen. The viewport has a fixed size in
+pixels, so what is drawn each frame depends on the window size and the zoom,
+never on the size of the map.
+"""
+
+from typing import Iterator
+
+
+class Camera:
+    """
+    A window of whole cells onto a map, ``left`` and ``top`` being the first
+    visible column and row.
+
+    ``view_width`` and ``view_height`` are the viewport size in pixels. When the
+    map fits in it every cell is visible and the camera never moves.
+    ``margin`` is how many cells the followed player is kept from the edges.
+    """
+
+    def __init__(
+        self,
+        map_width: int,
+        map_height: int,
+        view_width: int,
+        view_height: int,
+        tile_size: int,
+        margin: int = 2,
+    ) -> None:
+        self.map_width = map_width
+        self.map_height = map_height
+        self.view_width = view_width
+        self.view_height = view_height
+        self.margin = margin
+        self.left = 0
+        self.top = 0
+        self.set_tile_size(tile_size)
+
+    @property
+    def pixel_size(self) -> tuple[int, int]:
+        return self.columns * self.tile_size, self.rows * self.tile_size
+
+    def set_tile_size(self, tile_size: int) -> None:
+        self.tile_size = tile_size
+        self.columns = max(1, min(self.map_width, self.view_width // tile_size))
+        self.rows = max(1, min(self.map_height, self.view_height // tile_size))
+        self.move_to(self.left, self.top)
+
+    def move_to(self, left: int, top: int) -> bool:
+        """Move the top-left corner, staying on the map; return whether it moved."""
+        left = max(0, min(left, self.map_width - self.columns))
+        top = max(0, min(top, self.map_height - self.rows))
+        moved = (left, top) != (self.left, self.top)
+        self.left, self.top = left, top
+        return moved
+
+    def scroll(self, columns: int, rows: int) -> bool:
+        return self.move_to(self.left + columns, self.top + rows)
+
+    def center_on(self, x: int, y: int) -> bool:
+        return self.move_to(x - self.columns // 2, y - self.rows // 2)
+
+    def follow(self, x: int, y: int) -> bool:
+        """Scroll just enough to keep a cell ``margin`` cells inside the view."""
+        margin_x = min(self.margin, (self.columns - 1) // 2)
+        margin_y = min(self.margin, (self.rows - 1) // 2)
+        left, top = self.left, self.top
+        if x < left + margin_x:
+            left = x - margin_x
+        elif x > left + self.columns - 1 - margin_x:
+            left = x - self.columns + 1 + margin_x
+        if y < top + margin_y:
+            top = y - margin_y
+        elif y > top + self.rows - 1 - margin_y:
+            top = y - self.rows + 1 + margin_y
+        return self.move_to(left, top)
+
+    def is_visible(self, x: int, y: int) -> bool:
+        return (
+            self.left <= x < self.left + self.columns
+            and self.top <= y < self.top + self.rows
+        )
+
+    def visible_cells(self) -> Iterator[tuple[int, int]]:
+        """Every visible cell as (x, y), row by row."""
+        for y in range(self.top, self.top + self.rows):
+            for x in range(self.left, self.left + self.columns):
+                yield x, y
@@ -0,0 +1,78 @@
+"""
+Pythoban Deadlock Detection
+
+Freeze deadlocks: boxes that can no longer move along either axis because they
+are held by walls, dead squares or other frozen boxes. Only the neighbourhood
+of the box that was just pushed is examined, so a check costs microseconds.
+"""
+
+from typing import Callable
+from model import Map, TileEnum
+
+# bytes.translate tables turning a static layer into a wall or a goal mask
+WALL_MASK = bytes(tile == TileEnum.wall for tile in range(256))
+GOAL_MASK = bytes(tile == TileEnum.goal for tile in range(256))
+
+
+class FreezeDetector:
+    """
+    Checks whether a push froze a box off its goal.
+
+    ``dead_squares`` is the level's static dead-square bitmap; it is only
+    meaningful when the level has no spare boxes, and neither is this check.
+    """
+
+    def __init__(self, level_map: Map, dead_squares: bytearray) -> None:
+        self.width = level_map.width
+        self.size = level_map.width * level_map.height
+        self.walls = bytes(level_map.tiles).translate(WALL_MASK)
+        self.goals = bytes(level_map.tiles).translate(GOAL_MASK)
+        self.dead_squares = bytes(dead_squares)
+
+    def is_deadlock(self, box: int, has_box: Callable[[int], bool]) -> bool:
+        """
+        True when ``box`` is frozen together with at least one box off a goal.
+
+        ``has_box(cell)`` answers whether a cell holds a box after the push.
+        """
+        frozen: list[int] = []
+        if not self._is_frozen(box, has_box, set(), frozen):
+            return False
+        goals = self.goals
+        return any(not goals[cell] for cell in frozen)
+
+    def _is_wall(self, cell: int) -> bool:
+        return not 0 <= cell < self.size or self.walls[cell]
+
+    def _is_frozen(self, box, has_box, visiting: set, frozen: list) -> bool:
+        # Boxes being checked count as walls so that mutual blocks terminate
+        visiting.add(box)
+        mark = len(frozen)
+        is_frozen = self._is_axis_blocked(
+            box, 1, has_box, visiting, frozen
+        ) and self._is_axis_blocked(box, self.width, has_box, visiting, frozen)
+        visiting.discard(box)
+        if is_frozen:
+            frozen.append(box)
+        else:
+            del frozen[mark:]  # Drop boxes that were only frozen by assumption
+        return is_frozen
+
+    def _is_axis_blocked(self, box, step, has_box, visiting, frozen) -> bool:
+        before, after = box - step, box + step
+        if step == 1:
+            x = box % self.width
+            if x == 0 or x == self.width - 1:
+                return True  # The board edge acts as a wall
+        if self._is_wall(before) or self._is_wall(after):
+            return True
+        if before in visiting or after in visiting:
+            return True
+        if self.dead_squares[before] and self.dead_squares[after]:
+            return True
+        for neighbour in (before, after):
+            if has_box(neighbour) and self._is_frozen(
+                neighbour, has_box, visiting, frozen
+            ):
+                return True
+        return False
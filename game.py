@@ -3,22 +3,38 @@ Pythoban Game Logic
 """
 
 import pygame
+import threading
+from itertools import zip_longest
 from datetime import datetime, timedelta
-from typing import Any, Type, ClassVar, List
+from typing import Any, Type, ClassVar, List, Sequence
 from enum import ReprEnum
 from pydantic import BaseModel, Field
 from os import listdir
 from os.path import isfile, join
 from model import (
     Level,
+    Score,
     Box,
     Wall,
     Floor,
     Goal,
     Player,
+    DirectionEnum,
     HorizontalDirectionEnum,
     VerticalDirectionEnum,
 )
+from simulator import LURD_DIRECTIONS, Simulator
+from level_manifest import LazyLevels, LevelManifest
+from assets import AssetManager, AssetSpec, SceneEnum
+from text_renderer import TextRenderer
+from camera import Camera
+from renderer import Tileset, get_tile_assets
+from score_store import ScoreStore
+from thumbnails import ThumbnailCache
+from replay import Replay, ReplayRecorder
+
+# Posted by the loading thread once the game is fully loaded
+LOADING_FINISHED = pygame.event.custom_type()
 
 
 class Game(BaseModel):
@@ -30,9 +46,15 @@ class Game(BaseModel):
     screen_height: int = 720
     text_size: int = screen_height // 10
     running: bool = True
+    max_fps: int = 60  # Cap on redraws while events keep arriving
+    idle_fps: float = 1.0  # Redraws per second with no input, 0 for none
     levels_directory: str = "levels"
-    loaded_levels: list[Level] = []
-    _fontPath: str = "fonts/minecraft.ttf"
+    loaded_levels: Sequence[Level] = []
+    _level_cache_directory: str | None = ".cache/levels"
+    _fontPath: str = "fonts/Minecraft.ttf"
+    _text_renderer: TextRenderer | None = None
+    _assets: AssetManager | None = None
+    _asset_cache_directory: str | None = ".cache/assets"
     _background_image: pygame.Surface | None = None
     _title_image: pygame.Surface | None = None
     _background_path: str = "images/background.png"
@@ -50,6 +72,12 @@ class Game(BaseModel):
     restart_button_image: pygame.Surface | None = None
     restart_button_rect: pygame.Rect | None = None
 
+    # Startup: set once levels, level images and music finished loading
+    _is_loaded: bool = True
+    _loading_thread: threading.Thread | None = None
+    _loading_error: Exception | None = None
+    _loading_text: str = "Loading..."
+
     # Main Menu
     _selected_option_color = "green"
     _unselected_option_color = "white"
@@ -67,12 +95,58 @@ class Game(BaseModel):
 
     # Choose Level
     selected_level: int = 0
+    _visible_level_count: int = 4  # Levels listed at once, scrolling with the selection
+    _first_visible_level: int = 0
+    _thumbnails: ThumbnailCache | None = None
+    _thumbnail_size: tuple[int, int] = (96, 64)
+    _thumbnail_cache_directory: str | None = ".cache/thumbnails"
 
     # Current Level
     _player: Player | None = None
+    _simulator: Simulator | None = None
     _level_start_time: datetime | None = None
     _level_steps: int = 0
     _has_won: bool = False
+    _is_deadlocked: bool = False
+    _deadlock_color = "red"
+
+    # Replays: every completed run is saved with its score and can be watched
+    _replay_recorder: ReplayRecorder | None = None
+    _replay_directory: str | None = "replays"
+    _last_replay: Replay | None = None
+    _replay: Replay | None = None  # Being played back
+    _replay_position: int = 0  # Moves of it made so far
+    _replay_time: float = 0.0  # Milliseconds into it
+    _replay_clock: datetime | None = None  # When _replay_time was last advanced
+    _replay_speed: float = 1.0
+    _min_replay_speed: float = 0.125
+    _max_replay_speed: float = 16.0
+
+    # Best scores live in an append-only log written off the frame loop; the
+    # level files are only read
+    _scores: ScoreStore | None = None
+    _scores_path: str | None = "scores.log"
+
+    # Level rendering: the static layer of the cells in view is baked once and
+    # only the cells a move touched are redrawn onto the board
+    _max_tile_size: int = 64  # Size of the tile images on disk
+    _min_tile_size: int = 16  # Smallest tile size picked to fit a whole map
+    _smallest_tile_size: int = 8  # Zoom limit
+    _zoom_factor: float = 1.25
+    _scroll_step: int = 4  # Cells scrolled per key press
+    _camera: Camera | None = None
+    _is_view_moved: bool = False
+    _baked_view: tuple[int, int, int] | None = None  # Camera left, top, tile size
+    _board_scale_factor: float = 0.7  # Share of the screen the board may cover
+    _tile_size: int = 64
+    _tileset: Tileset | None = None  # Item images scaled per tile size
+    _static_surface: pygame.Surface | None = None
+    _board_surface: pygame.Surface | None = None
+    _board_rect: pygame.Rect | None = None
+    _dirty_cells: set[int] = set()
+    _redraw_all: bool = True
+    _level_text_state: tuple | None = None
+    _level_texts: list[tuple[str, pygame.Rect]] = []  # As last drawn
 
     class Config:
         arbitrary_types_allowed = True
@@ -86,8 +160,40 @@ class Game(BaseModel):
             (datetime.now() - self._level_start_time).total_seconds()
         )
         new_steps = self._level_steps
-        self.loaded_levels[self._current_level_index - 1].update_score(
-            new_time_in_seconds, new_steps
+        level = self.loaded_levels[self._current_level_index - 1]
+        # The replay is the proof of the score, checked by replay.ReplayVerifier
+        self._last_replay = self._replay_recorder.to_replay(
+            level, Score(time=new_time_in_seconds, steps=new_steps)
+        )
+        replay, replay_directory = self._last_replay, self._replay_directory
+        self._get_scores().submit(
+            level.map.content_hash(),
+            new_time_in_seconds,
+            new_steps,
+            # Saved by the score writer too, once the score it proves is written
+            then=(
+                (lambda: replay.save(replay_directory, level))
+                if replay_directory is not None
+                else None
+            ),
+        )
+        self._merge_stored_score(level)
+
+    def _get_scores(self) -> ScoreStore:
+        if self._scores is None:
+            self._scores = ScoreStore(self._scores_path).load()
+        return self._scores
+
+    def _merge_stored_score(self, level: Level) -> None:
+        """Bring a level's score up to date with the best one recorded."""
+        stored = self._get_scores().get(level.map.content_hash())
+        if stored is None:
+            return
+        # In level files 0 means no score yet; the store only holds real runs
+        score = level.score
+        level.score = Score(
+            time=min(stored.time, score.time) if score.time else stored.time,
+            steps=min(stored.steps, score.steps) if score.steps else stored.steps,
         )
 
     def get_file_paths_in_dir(self, directory: str) -> List[str]:
@@ -98,11 +204,38 @@ class Game(BaseModel):
         ]
 
     def load_levels(self) -> None:
-        levels_files_paths = self.get_file_paths_in_dir(self.levels_directory)
-        levels_files_paths.sort()
-        self.loaded_levels = [
-            Level.load_from_file(level_file) for level_file in levels_files_paths
-        ]
+        """List the levels from the manifest; each is parsed when first played."""
+        manifest = LevelManifest.load(
+            self.levels_directory, self._level_cache_directory
+        )
+        self.loaded_levels = LazyLevels(manifest.get_level_infos())
+
+    def load_level(self, index: int) -> Level:
+        """The level to play, up to date with its file."""
+        if isinstance(self.loaded_levels, LazyLevels):
+            return self.loaded_levels.load_level(index)
+        return self.loaded_levels[index]
+
+    def get_scene_assets(self) -> dict[str, dict[str, AssetSpec]]:
+        """The images each scene needs, by name."""
+        level_assets = get_tile_assets()
+        level_assets["restart"] = AssetSpec(self.BUTTON_IMAGE_PATH)
+        return {
+            SceneEnum.menu: {
+                "background": AssetSpec(
+                    self._background_path, self.screen_width, self.screen_height
+                ),
+                "title": AssetSpec(self._title_path, int(self.screen_width * 0.8)),
+            },
+            SceneEnum.level: level_assets,
+        }
+
+    def _get_assets(self) -> AssetManager:
+        if self._assets is None:
+            self._assets = AssetManager(
+                self.get_scene_assets(), self._asset_cache_directory
+            )
+        return self._assets
 
     def load_item_images(self):
         items = [Box, Floor, Wall, Goal, Player]
@@ -111,6 +244,7 @@ class Game(BaseModel):
                 self.item_images[item] = self.load_player_images(item)
             else:
                 self.item_images[item] = self.load_static_item_images(item)
+        self._tileset = Tileset(self.item_images)
 
     def load_player_images(self, player_class):
         """Load images for the player, considering direction."""
@@ -118,68 +252,70 @@ class Game(BaseModel):
         for vertical_direction in VerticalDirectionEnum:
             player_images_dict[vertical_direction] = {}
             for horizontal_direction in HorizontalDirectionEnum:
-                image_path = join(
-                    player_class.image_path,
-                    f"{vertical_direction}_{horizontal_direction}.png",
-                )
-                player_images_dict[vertical_direction][horizontal_direction] = (
-                    pygame.image.load(image_path)
+                player_images_dict[vertical_direction][
+                    horizontal_direction
+                ] = self._get_assets().get(
+                    SceneEnum.level,
+                    f"{player_class.__name__}/"
+                    f"{vertical_direction}_{horizontal_direction}",
                 )
         return player_images_dict
 
-    def load_static_item_images(self, item_class: Type) -> List[pygame.Surface]:
-        """Load images for static items and apply transparency."""
-        image = pygame.image.load(item_class.image_path)
-        number_of_images = 4
-        images = [image.copy() for _ in range(number_of_images)]
+    def load_static_item_images(self, item_class: Type) -> pygame.Surface:
+        """Load the image of a static item."""
+        return self._get_assets().get(SceneEnum.level, item_class.__name__)
 
-        for index, img in enumerate(images):
-            img.set_alpha(int(255 * (1 - (index / number_of_images))))
+    def load_images(self) -> None:
+        """Load the images of the first scene; the others load when first shown."""
+        self.load_menu_images()
 
-        return images
+    def load_menu_images(self) -> None:
+        """Load the background and title, unless they already are."""
+        if self._background_image is None:
+            self.load_background_image()
+            self.load_title_image()
 
-    def load_images(self) -> None:
-        """Load all game-related images."""
-        self.load_item_images()
-        self.load_restart_button_image()
-        self.load_background_image()
-        self.load_title_image()
+    def load_level_images(self) -> None:
+        """Load the tiles and the restart button, unless they already are."""
+        if self.restart_button_image is None:
+            self.load_item_images()
+            self.load_restart_button_image()
 
     def load_restart_button_image(self) -> None:
         """Load the restart button image and set its position."""
-        self.restart_button_image = pygame.image.load(self.BUTTON_IMAGE_PATH)
+        self.restart_button_image = self._get_assets().get(SceneEnum.level, "restart")
         if self.restart_button_image:
             self.restart_button_rect = self.restart_button_image.get_rect(
                 topleft=(self.screen_width // 40, self.screen_height * 3 // 20)
             )
 
     def load_background_image(self):
-        """Load and scale the background image to fit the screen size."""
-        background_image = pygame.image.load(self._background_path)
-        self._background_image = pygame.transform.scale(
-            background_image, (self.screen_width, self.screen_height)
-        )
+        """Load the background image, scaled to fit the screen size."""
+        self._background_image = self._get_assets().get(SceneEnum.menu, "background")
 
     def load_title_image(self):
-        """Load and scale the title image to fit a portion of the screen width."""
-        original_title_image = pygame.image.load(self._title_path)
-        title_width = int(self.screen_width * 0.8)
-        title_height = (
-            original_title_image.get_height() * title_width
-        ) // original_title_image.get_width()
-        self._title_image = pygame.transform.scale(
-            original_title_image, (title_width, title_height)
-        )
+        """Load the title image, scaled to fit a portion of the screen width."""
+        self._title_image = self._get_assets().get(SceneEnum.menu, "title")
 
     def show_main_menu(self) -> None:
         """Display the main menu with a title and selectable options."""
-        font = self.get_font(self.text_size)
         self.display_title()
-        self.display_menu_options(font)
+        self.display_menu_options(self.text_size)
 
     def get_font(self, size: int) -> pygame.font.Font:
-        """Return a font object of a given size."""
-        return pygame.font.Font(self._fontPath, size)
+        """Return the shared font object of a given size."""
+        return self._get_text_renderer().get_font(size)
+
+    def render_text(
+        self, text: str, size: int, color, underline: bool = False
+    ) -> pygame.Surface:
+        """Return the rendered text, re-rendering only text that changed."""
+        return self._get_text_renderer().render(text, size, color, underline)
+
+    def _get_text_renderer(self) -> TextRenderer:
+        if self._text_renderer is None:
+            self._text_renderer = TextRenderer(self._fontPath)
+        return self._text_renderer
 
     def display_title(self):
         """Display the title image centered at the top of the screen."""
@@ -188,22 +324,29 @@ class Game(BaseModel):
         )
         self.screen.blit(self._title_image, text_rect)
 
-    def display_menu_options(self, font: pygame.font.Font) -> None:
+    def display_menu_options(self, size: int) -> None:
         """Display each menu option with appropriate styling."""
         for index, text_key in enumerate(self.texts):
-            text_surface = self.get_text_surface(font, text_key)
+            text_surface = self.get_text_surface(size, text_key)
             text_rect = self.get_text_rect(text_surface, index)
             self.screen.blit(text_surface, text_rect)
+        if not self._is_loaded:
+            self._render_text(
+                self._loading_text,
+                size // 2,
+                center=(self.screen_width / 2, self.screen_height * 19 // 20),
+                color=self._unselected_option_color,
+            )
 
-    def get_text_surface(self, font: pygame.font.Font, text_key: str) -> pygame.Surface:
+    def get_text_surface(self, size: int, text_key: str) -> pygame.Surface:
         """Render the text surface for a menu option."""
-        font.set_underline(self.selected_option_main_menu == text_key)
+        is_selected = self.selected_option_main_menu == text_key
         color = (
             self._selected_option_color
-            if self.selected_option_main_menu == text_key
+            if is_selected
             else self._unselected_option_color
         )
-        return font.render(self.texts[text_key], True, color)
+        return self.render_text(self.texts[text_key], size, color, is_selected)
 
     def get_text_rect(self, text_surface, index: int) -> pygame.Surface:
         """Get the position for a menu option's text surface."""
@@ -220,10 +363,8 @@ class Game(BaseModel):
         self.show_choose_level_menu_goback()
 
     def show_choose_level_menu_title(self) -> None:
-        size = self.text_size
-        font = pygame.font.Font(self._fontPath, size)
-        text_surface = font.render(
-            self.texts["chooseLevel"], True, self._unselected_option_color
+        text_surface = self.render_text(
+            self.texts["chooseLevel"], self.text_size, self._unselected_option_color
         )
         text_rect = text_surface.get_rect(
             center=(
@@ -234,73 +375,112 @@ class Game(BaseModel):
         self.screen.blit(text_surface, text_rect)
 
     def show_choose_level_menu_levels(self):
-        size = self.text_size
-        font = pygame.font.Font(self._fontPath, size)
-        for index, test_key in enumerate(self.loaded_levels):
-            font.set_underline(self.selected_level == index + 1)
-            text_surface = font.render(
+        """List the levels around the selection, each next to its thumbnail."""
+        first = self._scroll_level_list()
+        last = min(len(self.loaded_levels), first + self._visible_level_count)
+        for row, index in enumerate(range(first, last)):
+            is_selected = self.selected_level == index + 1
+            text_surface = self.render_text(
                 f"Level {index+1}",
-                True,
+                self.text_size,
                 (
                     self._selected_option_color
-                    if self.selected_level == index + 1
+                    if is_selected
                     else self._unselected_option_color
                 ),
+                is_selected,
             )
             text_rect = text_surface.get_rect(
                 center=(
                     self.screen_width / 2,
-                    (self.screen_height / 3) + (index * text_surface.get_height()),
+                    (self.screen_height / 3) + (row * text_surface.get_height()),
                 )
             )
             self.screen.blit(text_surface, text_rect)
+            thumbnail = self.get_level_thumbnail(index)
+            self.screen.blit(
+                thumbnail,
+                thumbnail.get_rect(
+                    midright=(text_rect.left - self.text_size // 4, text_rect.centery)
+                ),
+            )
+
+    def _scroll_level_list(self) -> int:
+        """Scroll the level list just enough to show the selected level."""
+        selected = self.selected_level - 1
+        first = self._first_visible_level
+        if 0 <= selected < first:
+            first = selected
+        elif selected >= first + self._visible_level_count:
+            first = selected - self._visible_level_count + 1
+        first = max(0, min(first, len(self.loaded_levels) - self._visible_level_count))
+        self._first_visible_level = first
+        return first
+
+    def get_level_thumbnail(self, index: int) -> pygame.Surface:
+        """
+        The starting position of a level, drawn small. Thumbnails are cached
+        on disk by map, so a level is only parsed if its map was never shown.
+        """
+        if self._thumbnails is None:
+            self.load_level_images()
+            self._thumbnails = ThumbnailCache(
+                self._thumbnail_size, self._thumbnail_cache_directory, self._tileset
+            )
+        if isinstance(self.loaded_levels, LazyLevels):
+            map_hash = self.loaded_levels.level_infos[index].map_hash
+        else:
+            map_hash = self.loaded_levels[index].map.content_hash()
+        return self._thumbnails.get(map_hash, lambda: self.loaded_levels[index].map)
 
     def show_choose_level_menu_goback(self):
-        size = self.text_size
-        font = pygame.font.Font(self._fontPath, size)
-        font.set_underline(self.selected_level == 0)
-        text_surface = font.render(
+        is_selected = self.selected_level == 0
+        text_surface = self.render_text(
             f"< Go back to main menu",
-            True,
+            self.text_size,
             (
                 self._selected_option_color
-                if self.selected_level == 0
+                if is_selected
                 else self._unselected_option_color
             ),
+            is_selected,
         )
         text_rect = text_surface.get_rect(
             center=(
                 self.screen_width / 2,
                 (self.screen_height / 2.2)
-                + (len(self.loaded_levels) * text_surface.get_height()),
+                + (
+                    min(len(self.loaded_levels), self._visible_level_count)
+                    * text_surface.get_height()
+                ),
             )
         )
         self.screen.blit(text_surface, text_rect)
 
     def show_win_screen(self):
         size = self.text_size
-        font = pygame.font.Font(self._fontPath, size)
 
-        self._show_win_screen_title(font)
+        self._show_win_screen_title(size)
         self._show_win_screen_time(size)
         self._show_win_screen_steps(size)
-        self._show_win_screen_levels(font)
-        self._show_win_screen_go_back(font)
+        self._show_win_screen_replay_hint(size)
+        self._show_win_screen_levels(size)
+        self._show_win_screen_go_back(size)
 
-    def _show_win_screen_title(self, font):
+    def _show_win_screen_title(self, size):
         title_text = f"You beat level {self._current_level_index}"
         self._render_text(
             title_text,
-            font,
+            size,
             center=(
                 self.screen_width / 2,
-                (self.screen_height / 2) - (4 * font.get_height()),
+                (self.screen_height / 2) - (4 * self.get_font(size).get_height()),
             ),
             color=self._unselected_option_color,
         )
 
     def _show_win_screen_time(self, size):
-        score_font = pygame.font.Font(self._fontPath, size // 2)
+        score_size = size // 2
         passed_time = timedelta(
             seconds=self.loaded_levels[self._current_level_index - 1].score.time
         )
@@ -308,66 +488,82 @@ class Game(BaseModel):
         time_text = f"Time: {passed_time_text}"
         self._render_text(
             time_text,
-            score_font,
+            score_size,
+            center=(
+                self.screen_width // 2,
+                (self.screen_height / 2) - (5 * self.get_font(score_size).get_height()),
+            ),
+            color=self._unselected_option_color,
+        )
+
+    def _show_win_screen_replay_hint(self, size):
+        if self._last_replay is None:
+            return
+        hint_size = size // 3
+        self._render_text(
+            "Press R to watch the replay",
+            hint_size,
             center=(
                 self.screen_width // 2,
-                (self.screen_height / 2) - (5 * score_font.get_height()),
+                (self.screen_height / 2) - (4 * self.get_font(hint_size).get_height()),
             ),
             color=self._unselected_option_color,
         )
 
     def _show_win_screen_steps(self, size):
-        score_font = pygame.font.Font(self._fontPath, size // 2)
+        score_size = size // 2
         steps_text = f"Steps: {self._level_steps}"
         self._render_text(
             steps_text,
-            score_font,
+            score_size,
             center=(
                 self.screen_width // 2,
-                (self.screen_height / 2) - (4 * score_font.get_height()),
+                (self.screen_height / 2) - (4 * self.get_font(score_size).get_height()),
             ),
             color=self._unselected_option_color,
         )
 
-    def _show_win_screen_levels(self, font):
+    def _show_win_screen_levels(self, size):
         if self._current_level_index < len(self.loaded_levels):
-            font.set_underline(self.selected_level == self._current_level_index + 1)
+            is_selected = self.selected_level == self._current_level_index + 1
             level_text = f"Level {self._current_level_index + 1}"
             self._render_text(
                 level_text,
-                font,
+                size,
                 center=(
                     self.screen_width / 2,
                     (self.screen_height / 3.1)
-                    + (self._current_level_index * font.get_height()),
+                    + (self._current_level_index * self.get_font(size).get_height()),
                 ),
                 color=(
                     self._selected_option_color
-                    if self.selected_level == self._current_level_index + 1
+                    if is_selected
                     else self._unselected_option_color
                 ),
+                underline=is_selected,
             )
 
-    def _show_win_screen_go_back(self, font):
-        font.set_underline(self.selected_level == 0)
+    def _show_win_screen_go_back(self, size):
+        is_selected = self.selected_level == 0
         go_back_text = "< Go back to main menu"
         self._render_text(
             go_back_text,
-            font,
+            size,
             center=(
                 self.screen_width / 2,
                 (self.screen_height / 2.5)
-                + (len(self.loaded_levels) * font.get_height()),
+                + (len(self.loaded_levels) * self.get_font(size).get_height()),
             ),
             color=(
                 self._selected_option_color
-                if self.selected_level == 0
+                if is_selected
                 else self._unselected_option_color
             ),
+            underline=is_selected,
         )
 
-    def _render_text(self, text, font: pygame.font.Font, center, color):
-        text_surface = font.render(text, True, color)
+    def _render_text(self, text, size: int, center, color, underline=False):
+        text_surface = self.render_text(text, size, color, underline)
         text_rect = text_surface.get_rect(center=center)
         self.screen.blit(text_surface, text_rect)
 
@@ -376,111 +572,278 @@ class Game(BaseModel):
         return fullDuration.split(".")[0]
 
     def draw_level_text(self):
-        size = self.text_size
-        font = pygame.font.Font(self._fontPath, size)
-
-        self._draw_level_title(font)
-        self._draw_score_and_time(size)
-        self._draw_steps(size)
+        for text, size, color, position in self._get_level_texts():
+            self._draw_level_text(text, size, color=color, **position)
 
-    def _draw_level_title(self, font: pygame.font.Font):
-        level_text = f"Level {self._current_level_index}"
-        self._draw_level_text(
-            level_text,
-            font,
-            center=(
-                self.screen_width / 2,
-                (self.screen_height / 2) - (4 * font.get_height()),
+    def _get_level_texts(self) -> list[tuple[str, int, str, dict]]:
+        """Every text shown in a level as (text, size, color, position)."""
+        size = self.text_size
+        score_size = size // 2
+        color = self._unselected_option_color
+        texts = [
+            (
+                f"Level {self._current_level_index}",
+                size,
+                color,
+                {
+                    "center": (
+                        self.screen_width / 2,
+                        (self.screen_height / 2)
+                        - (4 * self.get_font(size).get_height()),
+                    )
+                },
             ),
-            color=self._unselected_option_color,
-        )
-
-    def _draw_score_and_time(self, size):
-        score_font = pygame.font.Font(self._fontPath, size // 2)
-        passed_time = datetime.now() - self._level_start_time
-        passed_time_text = self.duration_to_str(passed_time)
+            (
+                f"Time: {self._get_level_time_text()}",
+                score_size,
+                color,
+                {"topleft": (self.screen_width // 40, self.screen_height // 20)},
+            ),
+            (
+                f"Steps: {self._level_steps}",
+                score_size,
+                color,
+                {"topleft": (self.screen_width // 40, self.screen_height * 2 // 20)},
+            ),
+        ]
+        if self._is_deadlocked:
+            texts.append(
+                (
+                    "Deadlock! Restart the level",
+                    score_size,
+                    self._deadlock_color,
+                    {"center": (self.screen_width / 2, self.screen_height * 19 // 20)},
+                )
+            )
+        return texts
 
-        time_text = f"Time: {passed_time_text}"
-        self._draw_level_text(
-            time_text,
-            score_font,
-            topleft=(self.screen_width // 40, self.screen_height // 20),
-            color=self._unselected_option_color,
-        )
+    def _get_level_time_text(self) -> str:
+        if self._replay is not None:
+            return self.duration_to_str(timedelta(milliseconds=self._replay_time))
+        return self.duration_to_str(datetime.now() - self._level_start_time)
 
-    def _draw_steps(self, size):
-        score_font = pygame.font.Font(self._fontPath, size // 2)
-        steps_text = f"Steps: {self._level_steps}"
-        self._draw_level_text(
-            steps_text,
-            score_font,
-            topleft=(self.screen_width // 40, self.screen_height * 2 // 20),
-            color=self._unselected_option_color,
-        )
+    def _draw_level_text(self, text, size: int, center=None, topleft=None, color=None):
+        text_surface = self.render_text(text, size, color)
+        text_rect = self._get_text_rect(text, size, center=center, topleft=topleft)
+        self.screen.blit(text_surface, text_rect)
 
-    def _draw_level_text(
-        self, text, font: pygame.font.Font, center=None, topleft=None, color=None
-    ):
-        text_surface = font.render(text, True, color)
+    def _get_text_rect(self, text, size: int, center=None, topleft=None) -> pygame.Rect:
+        text_rect = pygame.Rect((0, 0), self.get_font(size).size(text))
         if center:
-            text_rect = text_surface.get_rect(center=center)
+            text_rect.center = center
         elif topleft:
-            text_rect = text_surface.get_rect(topleft=topleft)
+            text_rect.topleft = topleft
         else:
             raise ValueError(
                 "Either 'center' or 'topleft' must be provided for text positioning."
             )
-        self.screen.blit(text_surface, text_rect)
-
-    def draw_level(self):
+        return text_rect
+
+    def draw_level(self) -> list[pygame.Rect]:
+        """Draw what changed since the last frame and return the dirty areas."""
+        dirty_rects = []
+        if self._board_surface is None:
+            self._bake_board()
+            self._redraw_all = True
+        elif self._is_view_moved:
+            previous_board_rect = self._board_rect
+            if not self._scroll_board():
+                self._bake_board()
+            dirty_rects.append(previous_board_rect.union(self._board_rect))
+        if self._dirty_cells:
+            dirty_rects.extend(self._redraw_dirty_cells())
+        dirty_rects.extend(self._get_changed_text_rects())
+        if self._redraw_all:
+            self._redraw_all = False
+            self._compose_level()
+            return [self.screen.get_rect()]
+        if dirty_rects:
+            # Everything under the dirty areas is recomposed in one clipped pass
+            self.screen.set_clip(dirty_rects[0].unionall(dirty_rects[1:]))
+            self._compose_level()
+            self.screen.set_clip(None)
+        return dirty_rects
+
+    def _compose_level(self):
+        self.clean_screen()
         self.draw_level_text()
-        self.draw_level_items()
-
-    def draw_level_items(self):
-        x_offset = 64
-        y_offset = 64
-        main_surface = self._create_main_surface(x_offset, y_offset)
-        self._draw_items_on_surface(main_surface, x_offset, y_offset)
-        self._blit_scaled_surface(main_surface)
+        self.screen.blit(self._board_surface, self._board_rect)
         self._draw_restart_button()
 
-    def _create_main_surface(self, x_offset, y_offset):
-        main_surface_size = (
-            len(self._current_level.map.matrix[0]) * x_offset,
-            len(self._current_level.map.matrix) * y_offset,
+    def _get_changed_text_rects(self) -> list[pygame.Rect]:
+        """Areas of the level texts that changed, before and after the change."""
+        state = (self._get_level_time_text(), self._level_steps, self._is_deadlocked)
+        if state == self._level_text_state:
+            return []
+        self._level_text_state = state
+        old_texts = self._level_texts
+        self._level_texts = [
+            (text, self._get_text_rect(text, size, **position))
+            for text, size, _, position in self._get_level_texts()
+        ]
+        # Texts keep their order, so each is compared with its previous self;
+        # a text of the same size still has to be redrawn if it reads differently
+        dirty_rects = []
+        for old, new in zip_longest(old_texts, self._level_texts):
+            if old != new:
+                dirty_rects.extend(text[1] for text in (old, new) if text is not None)
+        return dirty_rects
+
+    def _bake_board(self):
+        """
+        Render the static layer of the visible cells once and the board on top
+        of a copy of it.
+        """
+        self.load_level_images()
+        level_map = self._current_level.map
+        if self._camera is None:
+            self._camera = Camera(
+                level_map.width,
+                level_map.height,
+                int(self.screen_width * self._board_scale_factor),
+                int(self.screen_height * self._board_scale_factor),
+                self._get_fitting_tile_size(),
+            )
+            self._camera.center_on(self._player.position.x, self._player.position.y)
+        self._tile_size = self._camera.tile_size
+        self._static_surface = pygame.Surface(self._camera.pixel_size)
+        self._static_surface.fill("black")
+        visible_cells = [
+            y * level_map.width + x for x, y in self._camera.visible_cells()
+        ]
+        for index in visible_cells:
+            self._draw_static_items(index)
+        self._board_surface = self._static_surface.copy()
+        for index in visible_cells:
+            self._draw_dynamic_item(index)
+        self._board_rect = self._board_surface.get_rect(
+            center=(self.screen_width // 2, self.screen_height // 2)
         )
-        main_surface = pygame.Surface(main_surface_size)
-        main_surface.fill("black")
-        return main_surface
-
-    def _draw_items_on_surface(self, surface, x_offset, y_offset):
-        for i, row in enumerate(self._current_level.map.matrix):
-            for j, column in enumerate(row):
-                for k, cell in enumerate(column):
-                    class_to_draw = type(cell)
-                    if class_to_draw != type(None):
-                        image_to_draw = self._get_image_for_cell(class_to_draw)
-                        surface.blit(image_to_draw, (j * x_offset, i * y_offset))
+        self._dirty_cells = set()
+        self._is_view_moved = False
+        self._baked_view = (self._camera.left, self._camera.top, self._tile_size)
+
+    def _scroll_board(self) -> bool:
+        """
+        Follow a camera move by scrolling the baked surfaces and drawing only
+        the cells that came into view. Return False if a full bake is needed.
+        """
+        left, top, tile_size = self._baked_view
+        columns = self._camera.left - left
+        rows = self._camera.top - top
+        if (
+            tile_size != self._camera.tile_size
+            or abs(columns) >= self._camera.columns
+            or abs(rows) >= self._camera.rows
+        ):
+            return False
+        for surface in (self._static_surface, self._board_surface):
+            surface.scroll(-columns * tile_size, -rows * tile_size)
+        level_map = self._current_level.map
+        exposed_cells = [
+            y * level_map.width + x
+            for x, y in self._camera.visible_cells()
+            if not left <= x < left + self._camera.columns
+            or not top <= y < top + self._camera.rows
+        ]
+        for index in exposed_cells:
+            self._draw_static_items(index)
+        for index in exposed_cells:
+            cell_rect = self._get_cell_rect(index)
+            self._board_surface.blit(self._static_surface, cell_rect, cell_rect)
+            self._draw_dynamic_item(index)
+        self._is_view_moved = False
+        self._baked_view = (self._camera.left, self._camera.top, tile_size)
+        return True
+
+    def _draw_static_items(self, index: int):
+        for class_to_draw in self._current_level.map.item_types_at(index):
+            if class_to_draw is not None and class_to_draw not in (Box, Player):
+                self._static_surface.blit(
+                    self._get_image_for_cell(class_to_draw),
+                    self._get_cell_rect(index),
+                )
+
+    def _get_cell_rect(self, index: int) -> pygame.Rect:
+        """Where a cell is drawn on the board, relative to the camera."""
+        y, x = divmod(index, self._current_level.map.width)
+        tile_size = self._tile_size
+        return pygame.Rect(
+            (x - self._camera.left) * tile_size,
+            (y - self._camera.top) * tile_size,
+            tile_size,
+            tile_size,
+        )
+
+    def _draw_dynamic_item(self, index: int):
+        _, item = self._current_level.map.item_types_at(index)
+        if item in (Box, Player):
+            self._board_surface.blit(
+                self._get_image_for_cell(item), self._get_cell_rect(index)
+            )
+
+    def _redraw_dirty_cells(self) -> list[pygame.Rect]:
+        """Restore dirty cells from the static layer and redraw what is on them."""
+        width = self._current_level.map.width
+        visible_cells = [
+            index
+            for index in self._dirty_cells
+            if self._camera.is_visible(index % width, index // width)
+        ]
+        for index in visible_cells:
+            cell_rect = self._get_cell_rect(index)
+            self._board_surface.blit(self._static_surface, cell_rect, cell_rect)
+            self._draw_dynamic_item(index)
+        self._dirty_cells = set()
+        return [
+            self._get_cell_rect(index).move(self._board_rect.topleft)
+            for index in visible_cells
+        ]
+
+    def _get_fitting_tile_size(self) -> int:
+        """
+        Largest tile size, up to the images' own, that fits the board area.
+
+        Maps too big to fit at the minimum tile size scroll instead.
+        """
+        level_map = self._current_level.map
+        return max(
+            self._min_tile_size,
+            min(
+                self._max_tile_size,
+                int(self.screen_width * self._board_scale_factor) // level_map.width,
+                int(self.screen_height * self._board_scale_factor) // level_map.height,
+            ),
+        )
+
+    def zoom(self, steps: int):
+        """Zoom in (positive steps) or out, keeping the player in view."""
+        tile_size = round(self._tile_size * self._zoom_factor**steps)
+        if tile_size == self._tile_size:
+            tile_size += 1 if steps > 0 else -1
+        tile_size = max(self._smallest_tile_size, min(self._max_tile_size, tile_size))
+        if self._camera is None or tile_size == self._camera.tile_size:
+            return
+        self._camera.set_tile_size(tile_size)
+        self._camera.follow(self._player.position.x, self._player.position.y)
+        self._is_view_moved = True
+
+    def scroll_view(self, columns: int, rows: int):
+        if self._camera is not None and self._camera.scroll(columns, rows):
+            self._is_view_moved = True
+
+    def get_scaled_item_images(self, tile_size: int) -> dict[Type, Any]:
+        """Item images scaled to ``tile_size``; each size is only scaled once."""
+        return self._tileset.get_images(tile_size)
 
     def _get_image_for_cell(self, class_to_draw):
+        item_images = self.get_scaled_item_images(self._tile_size)
         if class_to_draw == Player:
-            return self.item_images[class_to_draw][
-                self._player.last_vertical_direction
-            ][self._player.last_horizontal_direction]
+            return item_images[class_to_draw][self._player.last_vertical_direction][
+                self._player.last_horizontal_direction
+            ]
         else:
-            return self.item_images[class_to_draw][0]
-
-    def _blit_scaled_surface(self, surface):
-        scale_factor = 0.7
-        scaled_surface_size = (
-            min(int(self.screen_width * scale_factor), surface.get_width()),
-            min(int(self.screen_height * scale_factor), surface.get_height()),
-        )
-        surface = pygame.transform.scale(surface, scaled_surface_size)
-        surface_rect = surface.get_rect(
-            center=(self.screen_width // 2, self.screen_height // 2)
-        )
-        self.screen.blit(surface, surface_rect)
+            return item_images[class_to_draw]
 
     def _draw_restart_button(self):
         self.screen.blit(self.restart_button_image, self.restart_button_rect)
@@ -488,6 +851,10 @@ class Game(BaseModel):
     def process_global_events(self, event):
         if event.type == pygame.QUIT:
             self.running = False
+        elif event.type == pygame.WINDOWEXPOSED:
+            self._redraw_all = True  # The window contents were lost
+        elif event.type == LOADING_FINISHED and self._loading_error is not None:
+            raise self._loading_error
         elif event.type == pygame.KEYDOWN and pygame.key.get_pressed()[pygame.K_q]:
             if self._current_level_index == 0:
                 self.running = False
@@ -523,6 +890,8 @@ class Game(BaseModel):
         self.selected_option_main_menu = text_keys[new_option_index]
 
     def _handle_selection(self):
+        if not self._is_loaded and self.selected_option_main_menu != "quitGame":
+            return  # Levels are still loading
         if self.selected_option_main_menu == "newGame":
             self._start_new_game()
         elif self.selected_option_main_menu == "chooseLevel":
@@ -573,126 +942,192 @@ class Game(BaseModel):
                     )
             if keys[pygame.K_RETURN]:
                 self.start_level()
+            elif keys[pygame.K_r] and self._last_replay is not None:
+                self.play_replay(self._last_replay)
 
     def process_level_events(self, event):
         if event.type == pygame.QUIT:
             self._handle_quit_event()
         elif event.type == pygame.KEYDOWN:
-            self._handle_keydown_event(pygame.key.get_pressed())
-        elif event.type == pygame.MOUSEBUTTONDOWN:
+            if self._replay is not None:
+                self._handle_replay_keys(pygame.key.get_pressed())
+            else:
+                self._handle_keydown_event(pygame.key.get_pressed())
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             self._handle_mouse_button_down_event(pygame.mouse.get_pos())
+        elif event.type == pygame.MOUSEWHEEL:
+            self.zoom(event.y)
 
     def _handle_quit_event(self):
         self.running = False
 
     def _handle_keydown_event(self, keys):
-        (
-            player_next_position,
-            direction_updated,
-        ) = self._get_player_next_position_and_direction(keys)
-
-        if player_next_position:
-            self._process_player_move(player_next_position)
-            if direction_updated:
-                self._update_directions(direction_updated)
+        direction = self._get_direction(keys)
+        if direction:
+            self._make_move(direction, self._get_elapsed_ms())
+        elif keys[pygame.K_z] or keys[pygame.K_BACKSPACE]:
+            self.undo()
+        elif keys[pygame.K_y]:
+            self.redo()
+        else:
+            self._handle_view_keys(keys)
+
+    def _make_move(self, direction: DirectionEnum, elapsed_ms: int):
+        previous_player = self._current_level.map.player
+        result = self._simulator.step(direction)
+        if result.moved:
+            self._replay_recorder.record(elapsed_ms)
+        self._update_directions(direction)
+        self._show_move(previous_player, result)
+        if result.pushed:
+            self.check_if_won()
+
+    def _get_elapsed_ms(self) -> int:
+        return int(
+            (datetime.now() - self._level_start_time) / timedelta(milliseconds=1)
+        )
 
-    def _get_player_next_position_and_direction(self, keys):
-        if keys[pygame.K_DOWN]:
-            return (
-                self._player.position.x,
-                self._player.position.y + 1,
-            ), VerticalDirectionEnum.down
-        elif keys[pygame.K_UP]:
-            return (
-                self._player.position.x,
-                self._player.position.y - 1,
-            ), VerticalDirectionEnum.up
-        elif keys[pygame.K_LEFT]:
-            return (
-                self._player.position.x - 1,
-                self._player.position.y,
-            ), HorizontalDirectionEnum.left
-        elif keys[pygame.K_RIGHT]:
-            return (
-                self._player.position.x + 1,
-                self._player.position.y,
-            ), HorizontalDirectionEnum.right
-        return None, None
-
-    def _process_player_move(self, player_next_position):
-        if self._is_valid_position(player_next_position):
-            player_next_cell = self._current_level.map.matrix[player_next_position[1]][
-                player_next_position[0]
-            ][1]
-            if player_next_cell is None:
-                self._move_player(player_next_position)
-                self._level_steps += 1
-            elif isinstance(player_next_cell, Box):
-                self._process_box_movement(player_next_position)
-
-    def _process_box_movement(self, player_next_position):
-        box_next_position = self._get_box_next_position(pygame.key.get_pressed())
-        if box_next_position and self._is_valid_position(box_next_position):
-            box_next_cell = self._current_level.map.matrix[box_next_position[1]][
-                box_next_position[0]
-            ][1]
-            if box_next_cell is None:
-                self._move_box_and_player(player_next_position, box_next_position)
-                self._level_steps += 1
+    def undo(self) -> bool:
+        """Take back the last move; return False if there was none."""
+        previous_player = self._current_level.map.player
+        result = self._simulator.undo()
+        if result.moved:
+            self._update_directions(result.direction)
+            self._show_move(previous_player, result, undone=True)
+        return result.moved
+
+    def redo(self) -> bool:
+        """Make the last undone move again; return False if there was none."""
+        previous_player = self._current_level.map.player
+        result = self._simulator.redo()
+        if result.moved:
+            self._replay_recorder.record(self._get_elapsed_ms(), redone=True)
+            self._update_directions(result.direction)
+            self._show_move(previous_player, result)
+            if result.pushed:
                 self.check_if_won()
+        return result.moved
+
+    def _show_move(self, previous_player: int, result, undone: bool = False):
+        self._mark_dirty_cells(previous_player, result.pushed, undone)
+        self._level_steps = self._simulator.steps
+        self._sync_player_position()
+        if self._camera is not None and self._camera.follow(
+            self._player.position.x, self._player.position.y
+        ):
+            self._is_view_moved = True
+        self._is_deadlocked = self._simulator.deadlocked
+
+    def play_replay(self, replay: Replay, speed: float = 1.0):
+        """Restart the level that was just played and play a replay of it."""
+        self.selected_level = self._current_level_index
+        self.start_level()
+        self._replay = replay
+        self._replay_position = 0
+        self._replay_time = 0.0
+        self._replay_clock = datetime.now()
+        self._replay_speed = speed
+
+    def _advance_replay(self):
+        """Make the moves of the replay that are due at the current speed."""
+        now = datetime.now()
+        self._replay_time += (
+            (now - self._replay_clock) / timedelta(milliseconds=1) * self._replay_speed
+        )
+        self._replay_clock = now
+        replay = self._replay
+        while (
+            self._replay_position < len(replay.moves)
+            and replay.times[self._replay_position] <= self._replay_time
+        ):
+            move = replay.moves[self._replay_position]
+            elapsed_ms = replay.times[self._replay_position]
+            self._replay_position += 1
+            self._make_move(LURD_DIRECTIONS[move.lower()], elapsed_ms)
+        if self._replay_position == len(replay.moves):
+            self.stop_replay()
+
+    def stop_replay(self):
+        """Hand the level over to the player where the replay is."""
+        if self._replay is not None:
+            self._replay = None
+            self._level_start_time = datetime.now() - timedelta(
+                milliseconds=self._replay_time
+            )
 
-    def _update_directions(self, direction):
-        if isinstance(direction, VerticalDirectionEnum):
-            self._player.last_vertical_direction = direction
-        elif isinstance(direction, HorizontalDirectionEnum):
-            self._player.last_horizontal_direction = direction
-
-    def _handle_mouse_button_down_event(self, mouse_pos):
-        if self.restart_button_rect.collidepoint(mouse_pos):
-            self.restart_level()
-
-    def _is_valid_position(self, position):
-        return 0 <= position[1] < len(self._current_level.map.matrix) and 0 <= position[
-            0
-        ] < len(self._current_level.map.matrix[0])
+    def set_replay_speed(self, speed: float):
+        self._advance_replay()  # Moves due at the old speed are made first
+        self._replay_speed = max(
+            self._min_replay_speed, min(self._max_replay_speed, speed)
+        )
 
-    def _get_box_next_position(self, keys):
+    def _handle_replay_keys(self, keys):
+        """] plays faster, [ slower and Escape hands over to the player."""
+        if keys[pygame.K_RIGHTBRACKET]:
+            self.set_replay_speed(self._replay_speed * 2)
+        elif keys[pygame.K_LEFTBRACKET]:
+            self.set_replay_speed(self._replay_speed / 2)
+        elif keys[pygame.K_ESCAPE]:
+            self.stop_replay()
+        else:
+            self._handle_view_keys(keys)
+
+    def _handle_view_keys(self, keys):
+        """Zoom with + and -, scroll with W, A, S and D."""
+        if keys[pygame.K_EQUALS] or keys[pygame.K_PLUS] or keys[pygame.K_KP_PLUS]:
+            self.zoom(1)
+        elif keys[pygame.K_MINUS] or keys[pygame.K_KP_MINUS]:
+            self.zoom(-1)
+        elif keys[pygame.K_w]:
+            self.scroll_view(0, -self._scroll_step)
+        elif keys[pygame.K_s]:
+            self.scroll_view(0, self._scroll_step)
+        elif keys[pygame.K_a]:
+            self.scroll_view(-self._scroll_step, 0)
+        elif keys[pygame.K_d]:
+            self.scroll_view(self._scroll_step, 0)
+
+    def _get_direction(self, keys):
         if keys[pygame.K_DOWN]:
-            return (self._player.position.x, self._player.position.y + 2)
+            return DirectionEnum.down
         elif keys[pygame.K_UP]:
-            return (self._player.position.x, self._player.position.y - 2)
+            return DirectionEnum.up
         elif keys[pygame.K_LEFT]:
-            return (self._player.position.x - 2, self._player.position.y)
+            return DirectionEnum.left
         elif keys[pygame.K_RIGHT]:
-            return (self._player.position.x + 2, self._player.position.y)
+            return DirectionEnum.right
         return None
 
-    def _move_player(self, position):
-        # Remove player from current position
-        self._current_level.map.matrix[self._player.position.y][
-            self._player.position.x
-        ][1] = None
-
-        # Move player to new position
-        self._player.position.x, self._player.position.y = position
-        self._current_level.map.matrix[position[1]][position[0]][1] = self._player
+    def _mark_dirty_cells(self, previous_player: int, pushed: bool, undone=False):
+        # A blocked move still turns the player, so its cell is always redrawn
+        player = self._current_level.map.player
+        self._dirty_cells.update((previous_player, player))
+        if pushed:
+            # The box moved on ahead of the player, or back from ahead of it
+            if undone:
+                self._dirty_cells.add(2 * previous_player - player)
+            else:
+                self._dirty_cells.add(2 * player - previous_player)
 
-    def _move_box_and_player(self, player_position, box_position):
-        # Remove box from current position
-        box = self._current_level.map.matrix[player_position[1]][player_position[0]][1]
-        self._current_level.map.matrix[player_position[1]][player_position[0]][1] = None
+    def _sync_player_position(self):
+        level_map = self._current_level.map
+        y, x = divmod(level_map.player, level_map.width)
+        self._player.position.x, self._player.position.y = x, y
 
-        # Move box to new position
-        box.position.x, box.position.y = box_position
-        self._current_level.map.matrix[box_position[1]][box_position[0]][1] = box
+    def _update_directions(self, direction):
+        if direction in (DirectionEnum.up, DirectionEnum.down):
+            self._player.last_vertical_direction = VerticalDirectionEnum(direction)
+        else:
+            self._player.last_horizontal_direction = HorizontalDirectionEnum(direction)
 
-        # Move player to new position
-        self._move_player(player_position)
+    def _handle_mouse_button_down_event(self, mouse_pos):
+        if self.restart_button_rect.collidepoint(mouse_pos):
+            self.restart_level()
 
     def process_events(self):
-        # poll for events
+        # wait for events, or for the next time the screen has to change
         # pygame.QUIT event means the user clicked X to close your window
-        for event in pygame.event.get():
+        for event in self.wait_for_events():
             self.process_global_events(event)
             if self._current_level_index == 0:
                 self.process_main_menu_events(event)
@@ -704,60 +1139,134 @@ class Game(BaseModel):
                 else:
                     self.process_win_screen_events(event)
 
+    def wait_for_events(self) -> list[pygame.event.Event]:
+        """Block until an event arrives or a timed redraw is due."""
+        timeout = self._get_wait_timeout()
+        event = pygame.event.wait() if timeout is None else pygame.event.wait(timeout)
+        events = [] if event.type == pygame.NOEVENT else [event]
+        return events + pygame.event.get()
+
+    def _get_wait_timeout(self) -> int | None:
+        """Milliseconds until the next redraw that no event will trigger."""
+        timeout = int(1000 / self.idle_fps) if self.idle_fps > 0 else None
+        if self._current_level_index > 0 and not self._has_won:
+            # The level clock shows whole seconds, so wake up when it ticks
+            elapsed = (datetime.now() - self._level_start_time) / timedelta(
+                milliseconds=1
+            )
+            until_tick = 1000 - int(elapsed) % 1000
+            timeout = until_tick if timeout is None else min(until_tick, timeout)
+            if self._replay is not None:
+                until_move = self._get_until_next_replay_move()
+                timeout = until_move if timeout is None else min(until_move, timeout)
+        return max(1, timeout) if timeout is not None else None
+
+    def _get_until_next_replay_move(self) -> int:
+        """Milliseconds until the next move of the replay being played back."""
+        replay_time = (
+            self._replay_time
+            + ((datetime.now() - self._replay_clock) / timedelta(milliseconds=1))
+            * self._replay_speed
+        )
+        next_time = self._replay.times[self._replay_position]
+        return int((next_time - replay_time) / self._replay_speed)
+
     def start_level(self):
         self._current_level_index = self.selected_level
-        self._current_level = self.loaded_levels[
-            self._current_level_index - 1
-        ].model_copy(deep=True)
+        level = self.load_level(self._current_level_index - 1)
+        self._merge_stored_score(level)
+        self._current_level = level.snapshot()
         self._has_won = False
-        self._player = None
-
-        # Get Player from level matrix
-        for row in self._current_level.map.matrix:
-            for column in row:
-                if type(column[1]) == Player:
-                    self._player = column[1]
-                    break
-            if self._player != None:
-                break
+        self._is_deadlocked = False
+        level_map = self._current_level.map
+        self._player = Player(position=level_map.position(level_map.player))
+        self._simulator = Simulator(self._current_level)
+        self._replay_recorder = ReplayRecorder(self._simulator.journal)
+        self._replay = None
+        self._board_surface = None
+        self._camera = None
+        self._is_view_moved = False
+        self._dirty_cells = set()
+        self._level_text_state = None
+        self._level_texts = []
         self._level_start_time = datetime.now()
         self._level_steps = 0
 
     def check_if_won(self):
-        has_won = True
-        for row in self._current_level.map.matrix:
-            for column in row:
-                if type(column[0]) == Goal and type(column[1]) != Box:
-                    has_won = False
-                    break
-            if not has_won:
-                break
-        self._has_won = has_won
+        self._has_won = self._current_level.map.is_solved()
         if self._has_won:
             self.selected_level = (
                 self._current_level_index + 1
                 if self._current_level_index + 1 < len(self.loaded_levels)
                 else 0
             )
-            self.save_score()
+            if self._replay is None:  # Watching a replay scores nothing
+                self.save_score()
 
     def restart_level(self):
-        self.start_level()
+        """
+        Rewind the journal to the start of the level, in place, so only the
+        cells the moves touched are redrawn. The moves can still be redone.
+        """
+        if self._simulator is None:
+            self.start_level()
+            return
+        while self.undo():
+            pass
+        self._player.last_vertical_direction = VerticalDirectionEnum.down
+        self._player.last_horizontal_direction = HorizontalDirectionEnum.right
+        self._dirty_cells.add(self._current_level.map.player)
+        self._level_steps = self._simulator.steps
+        self._has_won = False
+        self._level_start_time = datetime.now()
+        self._replay_position = 0  # A replay being watched starts over
+        self._replay_time = 0.0
+        self._replay_clock = self._level_start_time
 
     def clean_screen(self):
         # fill the screen with a color to wipe away anything from last frame
+        self.load_menu_images()
         self.screen.blit(self._background_image, (0, 0))
 
-    def update_screen(self):
-        # flip() the display to put your work on screen
-        pygame.display.flip()
-        self.clock.tick(60)  # limits FPS to 60
+    def update_screen(self, dirty_rects: list[pygame.Rect] | None = None):
+        # flip() the display to put your work on screen, or only push the
+        # areas that changed when they are known
+        if dirty_rects is None:
+            pygame.display.flip()
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
+        self.clock.tick(self.max_fps)  # limits FPS to max_fps
 
     def init_game(self):
+        # Only what the main menu needs loads before the first frame; levels,
+        # level images and music follow on a worker thread
         self.init_pygame()
-        self.load_levels()
         self.load_images()
-        self.play_music()  # Call play_music after initializing the mixer and loading the music
+        self.start_background_loading()
+
+    def start_background_loading(self):
+        self._is_loaded = False
+        self._loading_error = None
+        self._loading_thread = threading.Thread(
+            target=self._load_in_background, name="pythoban-loader", daemon=True
+        )
+        self._loading_thread.start()
+
+    def _load_in_background(self):
+        try:
+            self.load_levels()
+            self._get_scores()
+            self.load_level_images()
+            self.play_music()  # Call play_music after initializing the mixer and loading the music
+        except Exception as error:
+            self._loading_error = error  # Raised again on the main thread
+        self._is_loaded = True
+        pygame.event.post(pygame.event.Event(LOADING_FINISHED))
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether everything beyond the main menu finished loading."""
+        return self._is_loaded
 
     def init_pygame(self):
         pygame.init()
@@ -765,6 +1274,8 @@ class Game(BaseModel):
         pygame.display.set_icon(pygame.image.load(self._icon_path))
         self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
         self.clock = pygame.time.Clock()
+        # Nothing reacts to the mouse moving, so it should not wake the game up
+        pygame.event.set_blocked(pygame.MOUSEMOTION)
         pygame.mixer.init()  # Initialize the mixer here
 
     def play_music(self):
@@ -774,22 +1285,33 @@ class Game(BaseModel):
         pygame.mixer.music.set_volume(self._music_volume)
         pygame.mixer.music.play(loops=-1)  # Play music in the background
 
+    def draw_frame(self):
+        dirty_rects = None
+
+        if self._current_level_index == 0:
+            self.clean_screen()
+            self.show_main_menu()
+        elif self._current_level_index == -1:
+            self.clean_screen()
+            self.show_choose_level_menu()
+        else:
+            if self._replay is not None and not self._has_won:
+                self._advance_replay()  # May win the level
+            if not self._has_won:
+                dirty_rects = self.draw_level()
+            else:
+                self.clean_screen()
+                self.show_win_screen()
+
+        self.update_screen(dirty_rects)
+
     def run(self):
         self.init_game()
         while self.running:
+            # Draw first: process_events sleeps until there is something new
+            self.draw_frame()
             self.process_events()
-            self.clean_screen()
-
-            if self._current_level_index == 0:
-                self.show_main_menu()
-            elif self._current_level_index == -1:
-                self.show_choose_level_menu()
-            else:
-                if not self._has_won:
-                    self.draw_level()
-                else:
-                    self.show_win_screen()
-
-            self.update_screen()
 
+        if self._scores is not None:
+            self._scores.close()  # Write the scores still queued
         pygame.quit()
@@ -0,0 +1,171 @@
+"""
+Pythoban Search Heuristic
+
+Admissible lower bound on the pushes left in a position: the cost of a
+minimum-cost matching between boxes and goals, where the cost of a pair is the
+precomputed push distance from the box's cell to the goal.
+"""
+
+from array import array
+from collections import deque
+from typing import Callable, Iterable, NamedTuple
+from model import Map, TileEnum
+
+# Cost of a box that can never reach a goal; any matching using it is a deadlock
+UNREACHABLE = 1 << 20
+INFINITY = float("inf")
+
+
+class DistanceTable:
+    """
+    Push distances from every cell to every goal, built from the static layer.
+
+    Other boxes are ignored and the player is assumed to reach any push
+    position, so every distance is a lower bound. ``rows[cell][goal]`` is the
+    distance from ``cell`` to the goal at ``goals[goal]``. ``check`` is called
+    after each goal's search, e.g. to stop building past a deadline.
+    """
+
+    def __init__(self, level_map: Map, check: Callable[[], None] | None = None) -> None:
+        self.goals = tuple(level_map.goals)
+        size = level_map.width * level_map.height
+        per_goal = []
+        for goal in self.goals:
+            per_goal.append(self._pull_distances(level_map, goal))
+            if check is not None:
+                check()
+        self.rows = [
+            tuple(distances[cell] for distances in per_goal) for cell in range(size)
+        ]
+
+    @staticmethod
+    def _pull_distances(level_map: Map, goal: int) -> array:
+        """Breadth-first search of a box pulled backwards away from a goal."""
+        width, tiles = level_map.width, level_map.tiles
+        size = len(tiles)
+        distances = array("l", [UNREACHABLE]) * size
+        distances[goal] = 0
+        queue = deque([goal])
+        while queue:
+            cell = queue.popleft()
+            x = cell % width
+            for step, in_row in (
+                (-1, x > 1),
+                (1, x < width - 2),
+                (-width, True),
+                (width, True),
+            ):
+                # The box comes from the next cell, pushed by a player one further
+                previous, player = cell + step, cell + 2 * step
+                if (
+                    in_row
+                    and 0 <= player < size
+                    and 0 <= previous < size
+                    and distances[previous] == UNREACHABLE
+                    and tiles[previous] != TileEnum.wall
+                    and tiles[player] != TileEnum.wall
+                ):
+                    distances[previous] = distances[cell] + 1
+                    queue.append(previous)
+        return distances
+
+
+class MatchingState(NamedTuple):
+    """
+    A solved assignment problem, kept so the next push can update it.
+
+    ``boxes[i]`` is the cell of the box in row ``i + 1``; ``u`` and ``v`` are
+    the row and column potentials and ``owner[j]`` the row matched to column
+    ``j``, all 1-indexed with slot 0 used by the algorithm.
+    """
+
+    boxes: tuple[int, ...]
+    u: tuple[int, ...]
+    v: tuple[int, ...]
+    owner: tuple[int, ...]
+    value: int
+
+
+class MatchingHeuristic:
+    """
+    Minimum-cost box-goal matching, updated incrementally.
+
+    A push only changes the moved box's row of the cost matrix, so instead of
+    solving the assignment again the row is unassigned and re-inserted with a
+    single Hungarian augmentation, which costs O(n^2) instead of O(n^3).
+    Spare boxes are matched to zero-cost dummy goals.
+    """
+
+    def __init__(self, table: DistanceTable, box_count: int) -> None:
+        self.table = table
+        self.size = max(box_count, len(table.goals))
+        padding = (0,) * (self.size - len(table.goals))
+        self.rows = [row + padding for row in table.rows]
+
+    def initial(self, boxes: Iterable[int]) -> MatchingState:
+        boxes = tuple(sorted(boxes))
+        u = [0] * (self.size + 1)
+        v = [0] * (self.size + 1)
+        owner = [0] * (self.size + 1)
+        for row in range(1, len(boxes) + 1):
+            self._augment(boxes, row, u, v, owner)
+        return self._state(boxes, u, v, owner)
+
+    def push(self, state: MatchingState, box: int, target: int) -> MatchingState:
+        """The matching after the box on ``box`` was pushed onto ``target``."""
+        slot = state.boxes.index(box)
+        boxes = state.boxes[:slot] + (target,) + state.boxes[slot + 1 :]
+        u, v, owner = list(state.u), list(state.v), list(state.owner)
+        row = slot + 1
+        owner[owner.index(row, 1)] = 0
+        # Column potentials never go positive, so u = 0 keeps the row feasible
+        u[row] = 0
+        self._augment(boxes, row, u, v, owner)
+        return self._state(boxes, u, v, owner)
+
+    def _state(self, boxes, u, v, owner) -> MatchingState:
+        rows = self.rows
+        value = sum(
+            rows[boxes[owner[column] - 1]][column - 1]
+            for column in range(1, self.size + 1)
+            if owner[column]
+        )
+        return MatchingState(boxes, tuple(u), tuple(v), tuple(owner), value)
+
+    def _augment(self, boxes, row, u, v, owner) -> None:
+        """Assign ``row`` along a shortest augmenting path (Hungarian step)."""
+        size, rows = self.size, self.rows
+        owner[0] = row
+        column = 0
+        min_slack = [INFINITY] * (size + 1)
+        way = [0] * (size + 1)
+        used = [False] * (size + 1)
+        while True:
+            used[column] = True
+            current_row = owner[column]
+            costs = rows[boxes[current_row - 1]]
+            current_u = u[current_row]
+            delta = INFINITY
+            next_column = 0
+            for candidate in range(1, size + 1):
+                if not used[candidate]:
+                    slack = costs[candidate - 1] - current_u - v[candidate]
+                    if slack < min_slack[candidate]:
+                        min_slack[candidate] = slack
+                        way[candidate] = column
+                    if min_slack[candidate] < delta:
+                        delta = min_slack[candidate]
+                        next_column = candidate
+            for candidate in range(size + 1):
+                if used[candidate]:
+                    u[owner[candidate]] += delta
+                    v[candidate] -= delta
+                else:
+                    min_slack[candidate] -= delta
+            column = next_column
+            if owner[column] == 0:
+                break
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
@@ -0,0 +1,171 @@
+"""
+Pythoban Level Manifest
+
+An index of the levels in a directory (name, size, map hash, best score and
+file modification time) cached on disk, so listing a level pack only reads
+the files that changed. Full Level objects are only built when a level is
+played.
+"""
+
+import hashlib
+import json
+import os
+from collections.abc import Sequence
+from os.path import abspath, join, splitext
+from pydantic import BaseModel, ValidationError
+from model import Level, Map, Score
+
+# Bump when LevelInfo changes so old manifests are rebuilt
+MANIFEST_VERSION = 3
+
+
+class LevelInfo(BaseModel):
+    name: str
+    file_path: str
+    width: int
+    height: int
+    map_hash: str  # Map.content_hash, the level's identity for every cache
+    score: Score
+    mtime: float
+
+    @classmethod
+    def read(cls, path: str, mtime: float) -> "LevelInfo":
+        """Read a level file's summary; only done again when the file changes."""
+        with open(path, "r") as file:
+            levelJSON = json.loads(file.read())
+        level_map = Map.from_string(levelJSON["map"])
+        return cls(
+            name=splitext(os.path.basename(path))[0],
+            file_path=path,
+            width=level_map.width,
+            height=level_map.height,
+            map_hash=level_map.content_hash(),
+            score=Score(
+                time=levelJSON["score"]["time"], steps=levelJSON["score"]["steps"]
+            ),
+            mtime=mtime,
+        )
+
+
+class LevelManifest(BaseModel):
+    version: int = MANIFEST_VERSION
+    directory: str
+    levels: dict[str, LevelInfo] = {}  # By file name
+
+    @classmethod
+    def get_path(cls, directory: str, cache_directory: str) -> str:
+        digest = hashlib.sha1(abspath(directory).encode()).hexdigest()[:16]
+        return join(cache_directory, f"levels-{digest}.json")
+
+    @classmethod
+    def load(cls, directory: str, cache_directory: str | None) -> "LevelManifest":
+        """
+        Return the manifest of a directory, up to date with the files in it.
+
+        Only files that are new or whose mtime changed are read; the manifest
+        is written back to ``cache_directory`` if anything changed.
+        """
+        manifest = None
+        manifest_path = None
+        if cache_directory is not None:
+            manifest_path = cls.get_path(directory, cache_directory)
+            try:
+                with open(manifest_path, "r") as file:
+                    manifest = cls.model_validate_json(file.read())
+            except (OSError, ValidationError):
+                manifest = None  # Missing or corrupt, so it gets rebuilt
+        if (
+            manifest is None
+            or manifest.version != MANIFEST_VERSION
+            or manifest.directory != abspath(directory)
+        ):
+            manifest = cls(directory=abspath(directory))
+
+        if manifest.refresh(directory) and manifest_path is not None:
+            manifest.save(manifest_path)
+        return manifest
+
+    def refresh(self, directory: str) -> bool:
+        """Sync the entries with the directory and return whether any changed."""
+        changed = False
+        seen = set()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                seen.add(entry.name)
+                mtime = entry.stat().st_mtime
+                info = self.levels.get(entry.name)
+                path = join(directory, entry.name)
+                if info is None or info.mtime != mtime or info.file_path != path:
+                    self.levels[entry.name] = LevelInfo.read(path, mtime)
+                    changed = True
+        for name in set(self.levels) - seen:
+            del self.levels[name]
+            changed = True
+        return changed
+
+    def save(self, manifest_path: str) -> None:
+        os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+        temporary_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as file:
+            file.write(self.model_dump_json())
+        os.replace(temporary_path, manifest_path)
+
+    def get_level_infos(self) -> list[LevelInfo]:
+        """Entries in the order the game lists levels: by file path."""
+        return sorted(self.levels.values(), key=lambda info: info.file_path)
+
+
+class LazyLevels(Sequence):
+    """
+    The levels of a manifest, each parsed the first time it is accessed.
+
+    Indexing never touches the disk again once a level is parsed, as it
+    happens every frame; ``load_level`` parses a level again if its file
+    changed since.
+    """
+
+    def __init__(self, level_infos: list[LevelInfo]) -> None:
+        self.level_infos = level_infos
+        self._levels: dict[int, tuple[float, Level]] = {}
+
+    def __len__(self) -> int:
+        return len(self.level_infos)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        cached = self._levels.get(index)
+        if cached is None:
+            cached = self._load(index)
+        return cached[1]
+
+    def load_level(self, index: int) -> Level:
+        """
+        The level to play, parsed again if its file changed. The score in
+        memory is carried over to the new parse: scores are never written to
+        level files, so the one in memory is the best reached so far.
+        """
+        if index < 0:
+            index += len(self)
+        cached = self._levels.get(index)
+        if cached is None:
+            return self._load(index)[1]
+        if os.stat(self.level_infos[index].file_path).st_mtime == cached[0]:
+            return cached[1]
+        score = cached[1].score
+        level = self._load(index)[1]
+        level.score = score
+        return level
+
+    def _load(self, index: int) -> tuple[float, Level]:
+        path = self.level_infos[index].file_path
+        mtime = os.stat(path).st_mtime
+        self._levels[index] = (mtime, Level.load_from_file(path))
+        return self._levels[index]
+
+    def is_loaded(self, index: int) -> bool:
+        return index in self._levels
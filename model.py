@@ -1,7 +1,12 @@
+import hashlib
 import json
-from pydantic import BaseModel, Field
-from enum import Enum, ReprEnum, ReprEnum
-from typing import List, Union, ClassVar
+import random
+from functools import lru_cache
+from pydantic import BaseModel, Field, PrivateAttr
+from enum import Enum, IntEnum, ReprEnum
+from typing import ClassVar, Type
+
+ZOBRIST_SEED = 0x5B0BA4
 
 
 class Position(BaseModel):
@@ -24,6 +29,13 @@ class VerticalDirectionEnum(str, ReprEnum):
     down = "down"
 
 
+class DirectionEnum(str, ReprEnum):
+    up = "up"
+    down = "down"
+    left = "left"
+    right = "right"
+
+
 class Player(BaseModel):
     position: Position
     last_vertical_direction: VerticalDirectionEnum = VerticalDirectionEnum.down
@@ -73,67 +85,324 @@ class Floor(AbstractItem):
     symbol: str = " "
 
 
+@lru_cache
+def zobrist_keys(size: int) -> tuple[int, ...]:
+    """
+    One random 64-bit key per cell, shared by every map with ``size`` cells.
+
+    The generator is seeded so hashes are stable across runs and processes.
+    """
+    generator = random.Random(ZOBRIST_SEED)
+    return tuple(generator.getrandbits(64) for _ in range(size))
+
+
+class TileEnum(IntEnum):
+    floor = 0
+    wall = 1
+    goal = 2
+
+
 class Map(BaseModel):
-    matrix: List[List[Union[Player, AbstractItem, List[Player | AbstractItem | None]]]]
+    """
+    Compact board for a Pythoban level.
+
+    The static layer (floor, wall, goal) is an immutable flat bytes indexed by
+    ``y * width + x``, shared by every copy of the map made with
+    ``copy_state``; boxes live in a separate occupancy bytearray and the
+    player is stored as a single flat index. ``boxes_on_goals`` is kept up to
+    date by ``move_box`` so checking for a win is O(1), as is ``box_hash``, the
+    Zobrist hash of the box cells.
+    """
+
+    width: int
+    height: int
+    tiles: bytes
+    boxes: bytearray
+    player: int
+    goals: tuple[int, ...]
+    boxes_on_goals: int
+    box_hash: int
+    _canonical_player: int | None = PrivateAttr(default=None)
+
+    class Config:
+        arbitrary_types_allowed = True
 
     @classmethod
     def from_string(cls, mapString):
-        matrix = []
-        for i, line in enumerate(mapString.splitlines()):
-            row = []
+        lines = mapString.splitlines()
+        width = max((len(line) for line in lines), default=0)
+        height = len(lines)
+        tiles = bytearray(width * height)  # Padded cells are floor
+        boxes = bytearray(width * height)
+        player = None
+        goals = []
+        for i, line in enumerate(lines):
             for j, symbol in enumerate(line):
-                position = Position(x=j, y=i)
+                index = i * width + j
                 if symbol == " ":  # Nothing
-                    row.append([Floor(position=position), None])
+                    continue
                 elif symbol == "W":  # Wall
-                    row.append([Floor(position=position), Wall(position=position)])
-                elif symbol == "B":  # Wall
-                    row.append([Floor(position=position), Box(position=position)])
-                elif symbol == "P":
-                    row.append([Floor(position=position), Player(position=position)])
-                elif symbol == "G":
-                    row.append([Goal(position=position), None])
-            matrix.append(row)
-        return Map(matrix=matrix)
+                    tiles[index] = TileEnum.wall
+                elif symbol == "B":  # Box
+                    boxes[index] = 1
+                elif symbol == "P":  # Player
+                    player = index
+                elif symbol == "G":  # Goal
+                    tiles[index] = TileEnum.goal
+                elif symbol == "*":  # Box on goal
+                    tiles[index] = TileEnum.goal
+                    boxes[index] = 1
+                elif symbol == "+":  # Player on goal
+                    tiles[index] = TileEnum.goal
+                    player = index
+                else:
+                    raise ValueError(f"Unknown map symbol {symbol!r} at ({j}, {i})")
+                if tiles[index] == TileEnum.goal:
+                    goals.append(index)
+        if player is None:
+            raise ValueError("Map has no player")
+        return Map(
+            width=width,
+            height=height,
+            tiles=bytes(tiles),
+            boxes=boxes,
+            player=player,
+            goals=tuple(goals),
+            boxes_on_goals=sum(boxes[goal] for goal in goals),
+            box_hash=hash_boxes(boxes),
+        )
+
+    def copy_state(self) -> "Map":
+        """
+        A copy to play on: the static layer is shared, only the boxes and the
+        player are copied.
+        """
+        copy = self.model_copy()
+        copy.boxes = bytearray(self.boxes)
+        return copy
+
+    def index(self, x: int, y: int) -> int:
+        return y * self.width + x
+
+    def position(self, index: int) -> Position:
+        y, x = divmod(index, self.width)
+        return Position(x=x, y=y)
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_wall(self, index: int) -> bool:
+        return self.tiles[index] == TileEnum.wall
+
+    def is_goal(self, index: int) -> bool:
+        return self.tiles[index] == TileEnum.goal
+
+    def has_box(self, index: int) -> bool:
+        return self.boxes[index] == 1
+
+    def is_free(self, index: int) -> bool:
+        """A cell is free when neither a wall nor a box occupies it."""
+        return self.tiles[index] != TileEnum.wall and not self.boxes[index]
+
+    def move_player(self, index: int) -> None:
+        # A single step stays inside the player's region; anything else may not
+        if abs(index - self.player) not in (1, self.width):
+            self._canonical_player = None
+        self.player = index
+
+    def move_box(self, source: int, target: int) -> None:
+        self.boxes[source] = 0
+        self.boxes[target] = 1
+        keys = zobrist_keys(len(self.tiles))
+        self.box_hash ^= keys[source] ^ keys[target]
+        self._canonical_player = None
+        tiles = self.tiles
+        if tiles[source] != tiles[target]:
+            if tiles[source] == TileEnum.goal:
+                self.boxes_on_goals -= 1
+            elif tiles[target] == TileEnum.goal:
+                self.boxes_on_goals += 1
+
+    def is_solved(self) -> bool:
+        return self.boxes_on_goals == len(self.goals)
+
+    def player_region(self) -> bytearray:
+        """Flood fill of the cells the player can walk to without pushing."""
+        width, size = self.width, len(self.tiles)
+        tiles, boxes = self.tiles, self.boxes
+        reached = bytearray(size)
+        reached[self.player] = 1
+        stack = [self.player]
+        while stack:
+            cell = stack.pop()
+            x = cell % width
+            for neighbour, in_row in (
+                (cell - 1, x > 0),
+                (cell + 1, x < width - 1),
+                (cell - width, True),
+                (cell + width, True),
+            ):
+                if (
+                    in_row
+                    and 0 <= neighbour < size
+                    and not reached[neighbour]
+                    and tiles[neighbour] != TileEnum.wall
+                    and not boxes[neighbour]
+                ):
+                    reached[neighbour] = 1
+                    stack.append(neighbour)
+        return reached
+
+    def compute_dead_squares(self) -> bytearray:
+        """
+        Mark cells from which a box can never reach a goal with 1.
+
+        Boxes are pulled backwards from every goal, ignoring other boxes;
+        every non-wall cell a box cannot be pulled to is dead.
+        """
+        width, size, tiles = self.width, len(self.tiles), self.tiles
+        live = bytearray(size)
+        for goal in self.goals:
+            live[goal] = 1
+        stack = list(self.goals)
+        while stack:
+            cell = stack.pop()
+            x = cell % width
+            for step, in_row in (
+                (-1, x > 1),
+                (1, x < width - 2),
+                (-width, True),
+                (width, True),
+            ):
+                # The box comes from the next cell, pushed by a player one further
+                previous, player = cell + step, cell + 2 * step
+                if (
+                    in_row
+                    and 0 <= player < size
+                    and 0 <= previous < size
+                    and not live[previous]
+                    and tiles[previous] != TileEnum.wall
+                    and tiles[player] != TileEnum.wall
+                ):
+                    live[previous] = 1
+                    stack.append(previous)
+        return bytearray(
+            tiles[index] != TileEnum.wall and not live[index] for index in range(size)
+        )
+
+    def canonical_player(self) -> int:
+        """
+        The top-left cell of the player's region.
+
+        Walking never changes it, so it is only recomputed after a push.
+        """
+        if self._canonical_player is None:
+            self._canonical_player = self.player_region().index(1)
+        return self._canonical_player
+
+    def content_hash(self) -> str:
+        """
+        Stable hash of the whole position (size, static layer, boxes and
+        player), used to tell which level a score or a replay belongs to.
+        """
+        digest = hashlib.sha1(self.width.to_bytes(4, "little"))
+        digest.update(self.tiles)
+        digest.update(self.boxes)
+        digest.update(self.player.to_bytes(8, "little"))
+        return digest.hexdigest()[:16]
+
+    def state_key(self) -> tuple[int, int]:
+        """Identity of the position for transposition tables and caches."""
+        return self.box_hash, self.canonical_player()
+
+    def item_types_at(self, index: int) -> tuple[Type[AbstractItem], Type | None]:
+        """Return the (ground, item) classes drawn at a cell, bottom layer first."""
+        ground = Goal if self.tiles[index] == TileEnum.goal else Floor
+        if self.tiles[index] == TileEnum.wall:
+            return ground, Wall
+        elif self.boxes[index]:
+            return ground, Box
+        elif index == self.player:
+            return ground, Player
+        return ground, None
 
     def __str__(self):
         lines = []
-        for row in self.matrix:
+        for i in range(self.height):
             line = []
-            for column in row:
-                if type(column[0]) == Floor and type(column[1]) == type(
-                    None
-                ):  # Nothing
-                    line.append(" ")
-                elif type(column[0]) == Floor and type(column[1]) == Wall:  # Wall
+            for index in range(i * self.width, (i + 1) * self.width):
+                tile = self.tiles[index]
+                if tile == TileEnum.wall:  # Wall
                     line.append("W")
-                elif type(column[0]) == Floor and type(column[1]) == Box:  # Box
+                elif tile == TileEnum.goal:
+                    if self.boxes[index]:  # Box on goal
+                        line.append("*")
+                    elif index == self.player:  # Player on goal
+                        line.append("+")
+                    else:  # Goal
+                        line.append("G")
+                elif self.boxes[index]:  # Box
                     line.append("B")
-                elif type(column[0]) == Floor and type(column[1]) == Player:  # Wall
+                elif index == self.player:  # Player
                     line.append("P")
-                elif type(column[0]) == Goal and type(column[1]) == type(None):  # Wall
-                    line.append("G")
+                else:  # Nothing
+                    line.append(" ")
             lines.append("".join(line))
         return "\n".join(lines)
 
 
+def hash_boxes(boxes: bytearray) -> int:
+    """Zobrist hash of a box occupancy layer."""
+    keys = zobrist_keys(len(boxes))
+    value = 0
+    for index, occupied in enumerate(boxes):
+        if occupied:
+            value ^= keys[index]
+    return value
+
+
 class Level(BaseModel):
     map: Map
     score: Score
     file_path: str
+    dead_squares: bytearray | None = None  # Precomputed by load_from_file
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def snapshot(self) -> "Level":
+        """
+        A copy to play on, sharing everything that never changes while
+        playing (the map's static layer and the dead squares) with this level.
+        """
+        return self.model_copy(
+            update={"map": self.map.copy_state(), "score": self.score.model_copy()}
+        )
 
     @classmethod
     def load_from_file(cls, path) -> "Level":
-        with open(path, "r+") as file:
+        with open(path, "r") as file:
             levelJSON = json.loads(file.read())
             map = Map.from_string(levelJSON["map"])
             score = Score(
                 time=levelJSON["score"]["time"], steps=levelJSON["score"]["steps"]
             )
-            level = Level(map=map, score=score, file_path=path)
+            level = Level(
+                map=map,
+                score=score,
+                file_path=path,
+                dead_squares=map.compute_dead_squares(),
+            )
             return level
 
+    def get_dead_squares(self) -> bytearray:
+        """Return the dead-square bitmap, computing it if it was never loaded."""
+        if self.dead_squares is None:
+            self.dead_squares = self.map.compute_dead_squares()
+        return self.dead_squares
+
     def update_score(self, time_in_seconds, steps):
+        """Keep the better time and steps; scores are saved by score_store."""
         # Time
         if self.score.time > time_in_seconds or self.score.time == 0:
             self.score.time = time_in_seconds
@@ -141,16 +410,3 @@ class Level(BaseModel):
         # Steps
         if self.score.steps > steps or self.score.steps == 0:
             self.score.steps = steps
-
-        self.save()
-
-    def save(self):
-        map_string = str(self.map)
-        time = self.score.time
-        steps = self.score.steps
-        json_string = json.dumps(
-            {"map": map_string, "score": {"time": time, "steps": steps}}, indent=4
-        )
-        # print(json_string)
-        with open(self.file_path, "w") as file:
-            file.write(json_string)
@@ -0,0 +1,263 @@
+"""
+Pythoban Headless Renderer
+
+Draws levels off-screen, without opening a window, for level previews and
+solution videos. The tile images are loaded once into a Tileset shared by
+every render and scaled once per tile size. Frames can be turned into NumPy
+arrays, which is the only part that needs numpy.
+"""
+
+import os
+from functools import lru_cache
+from os.path import join
+from typing import Any, BinaryIO, Iterable, Iterator, Type
+import pygame
+from model import (
+    Level,
+    Map,
+    Box,
+    Wall,
+    Floor,
+    Goal,
+    Player,
+    DirectionEnum,
+    HorizontalDirectionEnum,
+    VerticalDirectionEnum,
+)
+from assets import AssetManager, AssetSpec, SceneEnum
+from simulator import LURD_DIRECTIONS, Simulator
+
+TILE_ITEMS = (Box, Floor, Wall, Goal)
+
+
+def get_tile_assets() -> dict[str, AssetSpec]:
+    """The images of everything drawn on a board, by name."""
+    assets = {item.__name__: AssetSpec(item.image_path) for item in TILE_ITEMS}
+    for vertical_direction in VerticalDirectionEnum:
+        for horizontal_direction in HorizontalDirectionEnum:
+            name = f"{vertical_direction}_{horizontal_direction}"
+            assets[f"{Player.__name__}/{name}"] = AssetSpec(
+                join(Player.image_path, f"{name}.png")
+            )
+    return assets
+
+
+def init_headless() -> None:
+    """
+    Set up pygame to render off-screen with the SDL dummy video driver.
+
+    A hidden 1x1 display mode is set so images get converted to the display
+    format, which blits much faster. Nothing is done if a display is open.
+    """
+    if pygame.display.get_surface() is not None:
+        return
+    if not pygame.display.get_init():
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        pygame.display.init()
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+
+
+class Tileset:
+    """
+    The item images a board is drawn from, scaled once per tile size.
+
+    ``images`` has one image per item, except for the player which has one
+    per vertical and horizontal direction it can face.
+    """
+
+    def __init__(self, images: dict[Type, Any]) -> None:
+        self.images = images
+        self._scaled_images: dict[int, dict[Type, Any]] = {}
+
+    @classmethod
+    def load(cls, assets: AssetManager, scene: str = SceneEnum.tiles) -> "Tileset":
+        """Build a tileset from a scene holding the ``get_tile_assets`` images."""
+        scene_images = assets.load_scene(scene)
+        images: dict[Type, Any] = {
+            item: scene_images[item.__name__] for item in TILE_ITEMS
+        }
+        images[Player] = {
+            vertical_direction: {
+                horizontal_direction: scene_images[
+                    f"{Player.__name__}/{vertical_direction}_{horizontal_direction}"
+                ]
+                for horizontal_direction in HorizontalDirectionEnum
+            }
+            for vertical_direction in VerticalDirectionEnum
+        }
+        return cls(images)
+
+    def get_images(self, tile_size: int) -> dict[Type, Any]:
+        """Images scaled to ``tile_size``; each size is only scaled once."""
+        if tile_size not in self._scaled_images:
+            size = (tile_size, tile_size)
+            scaled_images = {}
+            for item, images in self.images.items():
+                if isinstance(images, dict):
+                    scaled_images[item] = {
+                        vertical_direction: {
+                            horizontal_direction: pygame.transform.scale(image, size)
+                            for horizontal_direction, image in row.items()
+                        }
+                        for vertical_direction, row in images.items()
+                    }
+                else:
+                    scaled_images[item] = pygame.transform.scale(images, size)
+            self._scaled_images[tile_size] = scaled_images
+        return self._scaled_images[tile_size]
+
+
+@lru_cache
+def load_tileset(cache_directory: str | None = ".cache/assets") -> Tileset:
+    """
+    The tileset shared by every renderer using the same asset cache. Its
+    scene is not the game's level scene, which has more images, so the two
+    can share a cache directory without replacing each other's atlases.
+    """
+    init_headless()
+    return Tileset.load(
+        AssetManager({SceneEnum.tiles: get_tile_assets()}, cache_directory)
+    )
+
+
+def to_array(surface: pygame.Surface):
+    """
+    Copy a surface into a (height, width, 3) uint8 RGB NumPy array.
+
+    numpy is optional for the game, so it is only imported here.
+    """
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError("Rendering to arrays needs numpy installed") from error
+    width, height = surface.get_size()
+    pixels = pygame.image.tobytes(surface, "RGB")
+    return numpy.frombuffer(pixels, dtype=numpy.uint8).reshape(height, width, 3)
+
+
+def write_raw_video(frames: Iterable[pygame.Surface], file: BinaryIO) -> int:
+    """
+    Write frames back to back as raw RGB24 and return how many were written,
+    ready for ``ffmpeg -f rawvideo -pix_fmt rgb24 -s WIDTHxHEIGHT -i -``.
+    """
+    count = 0
+    for frame in frames:
+        file.write(pygame.image.tobytes(frame, "RGB"))
+        count += 1
+    return count
+
+
+class HeadlessRenderer:
+    """
+    Renders whole maps at a fixed tile size to off-screen surfaces.
+
+    Renderers without their own ``tileset`` share the one loaded from
+    ``cache_directory``.
+    """
+
+    def __init__(
+        self,
+        tile_size: int = 16,
+        tileset: Tileset | None = None,
+        cache_directory: str | None = ".cache/assets",
+    ) -> None:
+        init_headless()
+        self.tile_size = tile_size
+        self.tileset = tileset if tileset is not None else load_tileset(cache_directory)
+
+    def get_size(self, level_map: Map) -> tuple[int, int]:
+        return level_map.width * self.tile_size, level_map.height * self.tile_size
+
+    def render(self, level_map: Map, player: Player | None = None) -> pygame.Surface:
+        """Draw a map; ``player`` only tells which way the player faces."""
+        surface = self._render_static(level_map)
+        self._draw_dynamic_items(
+            surface, level_map, player, range(level_map.width * level_map.height)
+        )
+        return surface
+
+    def render_array(self, level_map: Map, player: Player | None = None):
+        return to_array(self.render(level_map, player))
+
+    def render_levels(self, levels: Iterable[Level]) -> Iterator[pygame.Surface]:
+        """Render the starting position of each level, e.g. for thumbnails."""
+        for level in levels:
+            yield self.render(level.map)
+
+    def stream_frames(self, level: Level, moves: str) -> Iterator[pygame.Surface]:
+        """
+        Yield the board before the first move of a LURD string and after
+        each move, leaving ``level`` untouched.
+
+        Every frame is the same surface, redrawn only where the move changed
+        something, so copy a frame to keep it past the next one.
+        """
+        level = level.snapshot()
+        level_map = level.map
+        simulator = Simulator(level)
+        player = Player(position=level_map.position(level_map.player))
+        static_surface = self._render_static(level_map)
+        frame = static_surface.copy()
+        self._draw_dynamic_items(
+            frame, level_map, player, range(level_map.width * level_map.height)
+        )
+        yield frame
+        for move in moves:
+            direction = LURD_DIRECTIONS.get(move.lower())
+            if direction is None:
+                raise ValueError(f"Unknown move {move!r}")
+            previous_player = level_map.player
+            result = simulator.step(direction)
+            if direction in (DirectionEnum.up, DirectionEnum.down):
+                player.last_vertical_direction = VerticalDirectionEnum(direction)
+            else:
+                player.last_horizontal_direction = HorizontalDirectionEnum(direction)
+            # A blocked move still turns the player, so its cell is redrawn
+            cells = [previous_player, level_map.player]
+            if result.pushed:
+                cells.append(2 * level_map.player - previous_player)
+            for index in cells:
+                cell_rect = self._get_cell_rect(level_map, index)
+                frame.blit(static_surface, cell_rect, cell_rect)
+            self._draw_dynamic_items(frame, level_map, player, cells)
+            yield frame
+
+    def _get_cell_rect(self, level_map: Map, index: int) -> pygame.Rect:
+        y, x = divmod(index, level_map.width)
+        tile_size = self.tile_size
+        return pygame.Rect(x * tile_size, y * tile_size, tile_size, tile_size)
+
+    def _render_static(self, level_map: Map) -> pygame.Surface:
+        """The floor, goals and walls of a map, drawn once per map."""
+        images = self.tileset.get_images(self.tile_size)
+        surface = pygame.Surface(self.get_size(level_map))
+        surface.fill("black")
+        blits = []
+        for index in range(level_map.width * level_map.height):
+            cell_rect = self._get_cell_rect(level_map, index)
+            for class_to_draw in level_map.item_types_at(index):
+                if class_to_draw is not None and class_to_draw not in (Box, Player):
+                    blits.append((images[class_to_draw], cell_rect))
+        surface.blits(blits, doreturn=False)
+        return surface
+
+    def _draw_dynamic_items(
+        self,
+        surface: pygame.Surface,
+        level_map: Map,
+        player: Player | None,
+        cells: Iterable[int],
+    ) -> None:
+        images = self.tileset.get_images(self.tile_size)
+        if player is None:
+            player = Player(position=level_map.position(level_map.player))
+        player_image = images[Player][player.last_vertical_direction][
+            player.last_horizontal_direction
+        ]
+        blits = []
+        for index in cells:
+            if level_map.boxes[index]:
+                blits.append((images[Box], self._get_cell_rect(level_map, index)))
+            elif index == level_map.player:
+                blits.append((player_image, self._get_cell_rect(level_map, index)))
+        surface.blits(blits, doreturn=False)
@@ -0,0 +1,138 @@
+"""
+Pythoban Replays
+
+A completed run recorded as its moves in LURD notation and the time of each
+move, so the score it claims can be checked by replaying it headless against
+the level, and the run can be watched again in the game.
+"""
+
+import os
+from datetime import datetime
+from enum import ReprEnum
+from os.path import basename, join, splitext
+from typing import Iterable
+from pydantic import BaseModel
+from model import Level, Score
+from simulator import LURD_DIRECTIONS, MoveJournal, Simulator
+
+
+class ReplayStatusEnum(str, ReprEnum):
+    valid = "valid"
+    wrong_level = "wrong_level"
+    illegal_move = "illegal_move"  # Blocked, mislabelled or after the win
+    not_solved = "not_solved"
+    wrong_steps = "wrong_steps"
+    wrong_time = "wrong_time"
+
+
+class Replay(BaseModel):
+    """
+    The moves of a run and when each was made, in milliseconds since the
+    level started, with the score the run claims.
+    """
+
+    map_hash: str  # Of the level's starting position, see Map.content_hash
+    moves: str
+    times: list[int]
+    score: Score
+
+    @classmethod
+    def load(cls, path: str) -> "Replay":
+        with open(path, "r") as file:
+            return cls.model_validate_json(file.read())
+
+    def save(self, directory: str, level: Level) -> str:
+        """Write the replay next to the others for its level; return its path."""
+        os.makedirs(directory, exist_ok=True)
+        name = splitext(basename(level.file_path))[0] or "level"
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        path = join(directory, f"{name}-{self.map_hash[:8]}-{stamp}.json")
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as file:
+            file.write(self.model_dump_json())
+        os.replace(temporary_path, path)
+        return path
+
+
+class ReplayRecorder:
+    """
+    The time of every move in a journal, kept in step with undo and redo so
+    the replay of a run only holds the moves that are still made.
+    """
+
+    def __init__(self, journal: MoveJournal) -> None:
+        self.journal = journal
+        self.times: list[int] = []
+
+    def record(self, elapsed_ms: int, redone: bool = False) -> None:
+        """Time the move just recorded or redone in the journal."""
+        index = self.journal.position - 1
+        if redone:
+            self.times[index] = elapsed_ms
+        else:
+            del self.times[index:]
+            self.times.append(elapsed_ms)
+
+    def to_replay(self, level: Level, score: Score) -> Replay:
+        """The replay of the moves made so far; ``level`` as it started."""
+        return Replay(
+            map_hash=level.map.content_hash(),
+            moves=self.journal.to_lurd(),
+            times=self.times[: self.journal.position],
+            score=score,
+        )
+
+
+class ReplayVerifier:
+    """Checks replays of one level by playing them on copies of it."""
+
+    def __init__(self, level: Level) -> None:
+        self.level = level
+        self.map_hash = level.map.content_hash()
+        level.get_dead_squares()  # Computed once, shared by every copy
+
+    def verify(self, replay: Replay) -> ReplayStatusEnum:
+        if replay.map_hash != self.map_hash:
+            return ReplayStatusEnum.wrong_level
+        moves, times = replay.moves, replay.times
+        if len(times) != len(moves) or any(
+            earlier > later for earlier, later in zip([0] + times, times)
+        ):
+            return ReplayStatusEnum.wrong_time
+        if replay.score.steps != len(moves):
+            return ReplayStatusEnum.wrong_steps
+        simulator = Simulator(self.level.snapshot())
+        solved = simulator.solved
+        for move in moves:
+            direction = LURD_DIRECTIONS.get(move.lower())
+            if direction is None or solved:
+                return ReplayStatusEnum.illegal_move
+            result = simulator.step(direction)
+            if not result.moved or result.pushed != move.isupper():
+                return ReplayStatusEnum.illegal_move
+            solved = result.solved
+        if not solved:
+            return ReplayStatusEnum.not_solved
+        # The score's time is taken in whole seconds just after the last move
+        last_second = times[-1] // 1000 if times else 0
+        if not last_second <= replay.score.time <= last_second + 1:
+            return ReplayStatusEnum.wrong_time
+        return ReplayStatusEnum.valid
+
+
+def verify_replays(
+    levels: Iterable[Level], replays: Iterable[Replay]
+) -> list[ReplayStatusEnum]:
+    """Verify replays of any of ``levels``, matched by map hash."""
+    verifiers = {}
+    for level in levels:
+        verifier = ReplayVerifier(level)
+        verifiers[verifier.map_hash] = verifier
+    return [
+        (
+            verifiers[replay.map_hash].verify(replay)
+            if replay.map_hash in verifiers
+            else ReplayStatusEnum.wrong_level
+        )
+        for replay in replays
+    ]
@@ -0,0 +1,265 @@
+"""
+Pythoban Score Store
+
+Best scores, kept apart from the read-only level files in an append-only log
+of JSON lines, one per completed run. Runs are written in batches by a
+background thread, so recording a score never blocks the frame loop, and the
+log is compacted to one line per level by atomically replacing it.
+
+Any number of processes can share a log: every read, append and compaction
+holds an exclusive lock on a file next to it, and each writer first reads
+the runs the others appended, so a compaction never drops them.
+"""
+
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+from pydantic import BaseModel, ValidationError
+from model import Score
+
+
+class ScoreRecord(BaseModel):
+    level: str  # Map.content_hash of the level's starting position
+    time: int  # secs
+    steps: int
+
+
+def merge_scores(best: Score | None, time: int, steps: int) -> Score:
+    """
+    The best time and the fewest steps of both. Only runs are recorded, so
+    a time of 0 is a sub-second win and no score yet is ``None``.
+    """
+    if best is None:
+        return Score(time=time, steps=steps)
+    return Score(time=min(best.time, time), steps=min(best.steps, steps))
+
+
+class ScoreStore:
+    """
+    Best scores by level, persisted to the log at ``path``, or only kept in
+    memory if ``path`` is ``None``.
+
+    Runs submitted within ``flush_interval`` seconds of each other are
+    written together and, if ``fsync`` is set, synced to disk once per batch.
+    The log is compacted once it has more than ``compact_ratio`` lines per
+    level.
+    """
+
+    def __init__(
+        self,
+        path: str | None = "scores.log",
+        flush_interval: float = 0.5,
+        fsync: bool = True,
+        compact_ratio: int = 4,
+    ) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.compact_ratio = compact_ratio
+        self.batches_written = 0
+        self._best: dict[str, Score] = {}
+        self._lock = threading.Lock()  # Guards _best
+        self._log_lines = 0  # As of the last read or write of the log
+        self._queue: queue.Queue = queue.Queue()
+        self._writer: threading.Thread | None = None
+        self._error: Exception | None = None
+
+    def load(self) -> "ScoreStore":
+        """Read the log, with the runs every process has written to it."""
+        if self.path is None or not os.path.exists(self.path):
+            return self
+        with self._lock_log(), open(self.path, "a+b") as file:
+            self._read_log(file)
+        return self
+
+    def get(self, level: str) -> Score | None:
+        with self._lock:
+            return self._best.get(level)
+
+    def submit(
+        self, level: str, time: int, steps: int, then: Callable[[], None] | None = None
+    ) -> Score:
+        """
+        Record a run and return the level's best score. The run is written
+        later by the writer thread, which calls ``then`` once it has been.
+        """
+        self._raise_error()
+        with self._lock:
+            best = self._best[level] = merge_scores(self._best.get(level), time, steps)
+        self._queue.put((ScoreRecord(level=level, time=time, steps=steps), then))
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_batches, daemon=True)
+            self._writer.start()
+        return best
+
+    def flush(self) -> None:
+        """Block until every run submitted so far is written."""
+        if self._writer is not None:
+            written = threading.Event()
+            self._queue.put(written)
+            written.wait()
+        self._raise_error()
+
+    def close(self) -> None:
+        """Write what is left and stop the writer thread."""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+        self._raise_error()
+
+    def compact(self) -> None:
+        """Replace the log with one line per level, atomically."""
+        if self.path is None:
+            return
+        with self._lock_log():
+            if os.path.exists(self.path):
+                with open(self.path, "a+b") as file:
+                    self._read_log(file)
+            self._compact()
+
+    def _write_batches(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            # Gather what comes in until the interval ends or someone waits
+            while not any(
+                item is None or isinstance(item, threading.Event) for item in batch
+            ):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            runs = [item for item in batch if isinstance(item, tuple)]
+            try:
+                if runs and self._error is None:
+                    self._append([record for record, _ in runs])
+                    for _, then in runs:
+                        if then is not None:
+                            then()
+            except Exception as error:
+                self._error = error  # Raised on the caller's next submit or flush
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if None in batch:
+                return
+
+    def _append(self, records: list[ScoreRecord]) -> None:
+        if self.path is None:
+            return
+        data = self._encode(records)
+        with self._lock_log():
+            with open(self.path, "a+b") as file:
+                self._read_log(file)  # Merge what other processes wrote
+                file.write(data)
+                file.flush()
+                if self.fsync:
+                    os.fsync(file.fileno())
+            self._log_lines += len(records)
+            self.batches_written += 1
+            with self._lock:
+                level_count = len(self._best)
+            if self._log_lines > self.compact_ratio * max(1, level_count):
+                self._compact()
+
+    def _read_log(self, file: BinaryIO) -> None:
+        """
+        Fold every run in the log into the best scores. The whole log is
+        read each time: compaction keeps it short, and the file may have
+        been replaced by another process since the last read. A last line
+        cut short by a crash while it was appended is cut off the file, so
+        later runs start on a fresh line; other unreadable lines are skipped
+        and left for compaction to drop.
+        """
+        file.seek(0)
+        data = file.read()
+        complete_length = data.rfind(b"\n") + 1
+        if complete_length < len(data):
+            file.truncate(complete_length)
+        lines = data[:complete_length].splitlines()
+        records = []
+        for line in lines:
+            try:
+                records.append(ScoreRecord.model_validate_json(line))
+            except ValidationError:
+                continue
+        with self._lock:
+            for record in records:
+                self._best[record.level] = merge_scores(
+                    self._best.get(record.level), record.time, record.steps
+                )
+        self._log_lines = len(lines)
+
+    def _compact(self) -> None:
+        """Compact the log, whose lock is held and which was just read."""
+        with self._lock:
+            records = [
+                ScoreRecord(level=level, time=score.time, steps=score.steps)
+                for level, score in self._best.items()
+            ]
+        temporary_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(self._encode(records))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.path)
+        self._sync_directory()
+        self._log_lines = len(records)
+
+    @contextmanager
+    def _lock_log(self) -> Iterator[None]:
+        """
+        Hold the log's lock file. The log itself is replaced on compaction,
+        so it cannot carry the lock. Every holder opens its own lock file,
+        so threads of one process exclude each other too.
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.lock", "a+b") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                yield  # Released when the file is closed
+                return
+            lock_file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # Gave up after 10 seconds; keep waiting
+                    pass
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    @staticmethod
+    def _encode(records: list[ScoreRecord]) -> bytes:
+        return b"".join(record.model_dump_json().encode() + b"\n" for record in records)
+
+    def _sync_directory(self) -> None:
+        """Make the rename durable; not every platform can open a directory."""
+        try:
+            descriptor = os.open(os.path.dirname(self.path) or ".", os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
@@ -0,0 +1,220 @@
+"""
+Pythoban Simulation Core
+
+Headless movement rules for a Level. Nothing here depends on pygame, so the
+same rules drive the game, replays and batch validation jobs. Moves are kept
+in a compact journal so they can be undone and redone in place.
+"""
+
+from typing import NamedTuple
+from model import Level, Map, DirectionEnum
+from deadlock import FreezeDetector
+
+DIRECTION_DELTAS: dict[DirectionEnum, tuple[int, int]] = {
+    DirectionEnum.up: (0, -1),
+    DirectionEnum.down: (0, 1),
+    DirectionEnum.left: (-1, 0),
+    DirectionEnum.right: (1, 0),
+}
+
+# LURD notation: lowercase letters are moves, uppercase letters are pushes
+LURD_DIRECTIONS: dict[str, DirectionEnum] = {
+    "l": DirectionEnum.left,
+    "u": DirectionEnum.up,
+    "r": DirectionEnum.right,
+    "d": DirectionEnum.down,
+}
+
+
+class StepResult(NamedTuple):
+    map: Map
+    moved: bool
+    pushed: bool
+    solved: bool
+    deadlocked: bool = False  # The push left the level unsolvable
+    direction: DirectionEnum | None = None  # Of the move made, undone or redone
+
+
+class MoveJournal:
+    """
+    The moves made on a level, one byte each: the direction in the low two
+    bits and whether a box was pushed in the third.
+
+    Moves after ``position`` were undone and can be redone until a new move
+    is recorded.
+    """
+
+    DIRECTIONS = tuple(DIRECTION_DELTAS)
+    PUSH = 4
+
+    def __init__(self) -> None:
+        self.entries = bytearray()
+        self.position = 0
+
+    def __len__(self) -> int:
+        return self.position
+
+    @property
+    def can_undo(self) -> bool:
+        return self.position > 0
+
+    @property
+    def can_redo(self) -> bool:
+        return self.position < len(self.entries)
+
+    def record(self, direction: DirectionEnum, pushed: bool) -> None:
+        """Add a move, dropping the moves that were undone."""
+        del self.entries[self.position :]
+        self.entries.append(
+            self.DIRECTIONS.index(direction) | (self.PUSH if pushed else 0)
+        )
+        self.position += 1
+
+    def undo(self) -> tuple[DirectionEnum, bool]:
+        self.position -= 1
+        return self._decode(self.entries[self.position])
+
+    def redo(self) -> tuple[DirectionEnum, bool]:
+        self.position += 1
+        return self._decode(self.entries[self.position - 1])
+
+    def to_lurd(self) -> str:
+        """The moves made so far in LURD notation."""
+        moves = []
+        for entry in self.entries[: self.position]:
+            direction, pushed = self._decode(entry)
+            move = direction[0]
+            moves.append(move.upper() if pushed else move)
+        return "".join(moves)
+
+    def _decode(self, entry: int) -> tuple[DirectionEnum, bool]:
+        return self.DIRECTIONS[entry & 3], bool(entry & self.PUSH)
+
+
+class Simulator:
+    """
+    Applies moves to a level's map in place.
+
+    Pass a copy of the level if the original has to stay untouched.
+    """
+
+    def __init__(self, level: Level) -> None:
+        self.level = level
+        self.map = level.map
+        self.steps = 0
+        self.pushes = 0
+        self.journal = MoveJournal()
+        # Journal length once the first deadlocking push was made
+        self._deadlock_position: int | None = None
+        self.dead_squares = level.get_dead_squares()
+        self.freeze_detector = FreezeDetector(self.map, self.dead_squares)
+        # With spare boxes a box may rest anywhere, so nothing counts as dead
+        self._track_deadlocks = self.map.boxes.count(1) <= len(self.map.goals)
+
+    @property
+    def solved(self) -> bool:
+        return self.map.is_solved()
+
+    @property
+    def deadlocked(self) -> bool:
+        """Whether a push made and not undone left the level unsolvable."""
+        return (
+            self._deadlock_position is not None
+            and self.journal.position >= self._deadlock_position
+        )
+
+    def step(self, direction: DirectionEnum | str) -> StepResult:
+        """
+        Move the player one cell, pushing a box if one is in the way, and
+        record the move in the journal.
+        """
+        result = self._move(direction)
+        if result.moved:
+            journal = self.journal
+            if (
+                self._deadlock_position is not None
+                and self._deadlock_position > journal.position
+            ):
+                self._deadlock_position = None  # Only reached by the dropped moves
+            journal.record(result.direction, result.pushed)
+            if result.deadlocked and self._deadlock_position is None:
+                self._deadlock_position = journal.position
+        return result
+
+    def undo(self) -> StepResult:
+        """Take back the last move, pulling back the box it pushed."""
+        if not self.journal.can_undo:
+            return StepResult(self.map, False, False, self.solved)
+        direction, pushed = self.journal.undo()
+        dx, dy = DIRECTION_DELTAS[direction]
+        level_map = self.map
+        delta = dy * level_map.width + dx
+        player = level_map.player
+        if pushed:
+            level_map.move_box(player + delta, player)
+            self.pushes -= 1
+        level_map.move_player(player - delta)
+        self.steps -= 1
+        return StepResult(
+            level_map, True, pushed, self.solved, self.deadlocked, direction
+        )
+
+    def redo(self) -> StepResult:
+        """Make the last undone move again."""
+        if not self.journal.can_redo:
+            return StepResult(self.map, False, False, self.solved)
+        direction, _ = self.journal.redo()
+        return self._move(direction)
+
+    def rewind(self) -> int:
+        """Undo every move, leaving them to be redone; return how many."""
+        count = 0
+        while self.undo().moved:
+            count += 1
+        return count
+
+    def _move(self, direction: DirectionEnum | str) -> StepResult:
+        direction = DirectionEnum(direction)
+        dx, dy = DIRECTION_DELTAS[direction]
+        level_map = self.map
+        y, x = divmod(level_map.player, level_map.width)
+        next_x, next_y = x + dx, y + dy
+        if not level_map.in_bounds(next_x, next_y):
+            return StepResult(level_map, False, False, self.solved, False, direction)
+
+        player_next_index = level_map.index(next_x, next_y)
+        if level_map.is_free(player_next_index):
+            level_map.move_player(player_next_index)
+            self.steps += 1
+            return StepResult(level_map, True, False, self.solved, False, direction)
+
+        if level_map.has_box(player_next_index):
+            box_x, box_y = next_x + dx, next_y + dy
+            if level_map.in_bounds(box_x, box_y):
+                box_next_index = level_map.index(box_x, box_y)
+                if level_map.is_free(box_next_index):
+                    level_map.move_box(player_next_index, box_next_index)
+                    level_map.move_player(player_next_index)
+                    self.steps += 1
+                    self.pushes += 1
+                    deadlocked = self._track_deadlocks and (
+                        bool(self.dead_squares[box_next_index])
+                        or self.freeze_detector.is_deadlock(
+                            box_next_index, level_map.boxes.__getitem__
+                        )
+                    )
+                    return StepResult(
+                        level_map, True, True, self.solved, deadlocked, direction
+                    )
+
+        return StepResult(level_map, False, False, self.solved, False, direction)
+
+    def apply_moves(self, moves: str) -> StepResult:
+        """Apply a LURD move string and return the result of the last step."""
+        result = StepResult(self.map, False, False, self.solved)
+        for move in moves:
+            direction = LURD_DIRECTIONS.get(move.lower())
+            if direction is None:
+                raise ValueError(f"Unknown move {move!r}")
+            result = self.step(direction)
+        return result
@@ -0,0 +1,512 @@
+"""
+Pythoban Solver
+
+Push-level search over the state space of a Level. A state is the set of box
+cells plus the region the player can reach, identified by the same Zobrist key
+as Map.state_key; successors are single pushes, so both A* and IDA* return
+push-optimal solutions. Solutions are written in LURD notation (lowercase
+letters are moves, uppercase letters are pushes).
+"""
+
+import heapq
+import time
+from collections import deque
+from enum import ReprEnum
+from itertools import count
+from pydantic import BaseModel
+from model import Level, TileEnum, zobrist_keys
+from deadlock import FreezeDetector
+from heuristic import DistanceTable, MatchingHeuristic, UNREACHABLE
+from transposition import ReplacementPolicyEnum, TranspositionTable
+
+
+class SolverMethodEnum(str, ReprEnum):
+    astar = "astar"
+    idastar = "idastar"
+
+
+class SolverStatusEnum(str, ReprEnum):
+    solved = "solved"
+    unsolvable = "unsolvable"
+    timeout = "timeout"
+    node_limit = "node_limit"
+
+
+class Solution(BaseModel):
+    status: SolverStatusEnum
+    moves: str = ""
+    move_count: int = 0
+    push_count: int = 0
+    nodes_expanded: int = 0
+    elapsed: float = 0.0  # secs
+    table_hit_rate: float = 0.0
+    table_bytes: int = 0
+
+    @property
+    def solved(self) -> bool:
+        return self.status == SolverStatusEnum.solved
+
+
+class SearchLimitReached(Exception):
+    def __init__(self, status: SolverStatusEnum) -> None:
+        super().__init__(status.value)
+        self.status = status
+
+
+class _SearchFrame:
+    """A state on the IDA* stack, with the pushes from it left to search."""
+
+    __slots__ = (
+        "boxes",
+        "box_bits",
+        "box_hash",
+        "matching",
+        "cost",
+        "packed",
+        "children",
+        "next_bound",
+        "child_key",
+    )
+
+    def __init__(self, boxes, box_bits, box_hash, matching, cost, packed, children):
+        self.boxes = boxes
+        self.box_bits = box_bits
+        self.box_hash = box_hash
+        self.matching = matching
+        self.cost = cost
+        self.packed = packed
+        self.children = children  # Iterator over the legal pushes
+        self.next_bound = None  # Smallest bound exceeded below this state
+        self.child_key = None  # Of the child being searched
+
+    def lower_next_bound(self, bound) -> None:
+        if bound is not None and (self.next_bound is None or bound < self.next_bound):
+            self.next_bound = bound
+
+
+class Solver:
+    """
+    Searches a level for a push-optimal solution.
+
+    The level is only read; its map is never modified. ``time_limit`` is in
+    seconds and ``node_limit`` caps the number of expanded states, either of
+    which can be ``None`` for no limit. IDA* remembers lower bounds in a
+    transposition table capped at ``table_bytes`` and evicting entries by
+    ``table_policy``.
+    """
+
+    def __init__(
+        self,
+        level: Level,
+        time_limit: float | None = None,
+        node_limit: int | None = None,
+        table_bytes: int = 64 * 1024 * 1024,
+        table_policy: ReplacementPolicyEnum | str = ReplacementPolicyEnum.depth,
+    ) -> None:
+        level_map = level.map
+        self.width = level_map.width
+        self.size = level_map.width * level_map.height
+        self.walls = bytes(
+            tile == TileEnum.wall for tile in level_map.tiles
+        )  # 1 where the player and boxes can never go
+        self.goals = tuple(level_map.goals)
+        self.goal_set = frozenset(level_map.goals)
+        self.start_boxes = frozenset(
+            index for index in range(self.size) if level_map.boxes[index]
+        )
+        self.start_player = level_map.player
+        self.start_hash = level_map.box_hash
+        self.zobrist = zobrist_keys(self.size)
+        self.neighbours = self._build_neighbours(level_map.width, level_map.height)
+        self.open_neighbours = [
+            tuple(neighbour for neighbour, _ in cells if not self.walls[neighbour])
+            for cells in self.neighbours
+        ]
+        # The distance table, dead squares and freeze detector are built by the
+        # first solve, within its time limit
+        self.level = level
+        self.matching: MatchingHeuristic | None = None
+        self.dead = bytes(self.size)
+        self.freeze_detector: FreezeDetector | None = None
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.table_bytes = table_bytes
+        self.table_policy = table_policy
+        self.table: TranspositionTable | None = None
+        self.nodes_expanded = 0
+        self._deadline: float | None = None
+
+    @staticmethod
+    def _build_neighbours(width: int, height: int) -> list[tuple[tuple[int, str]]]:
+        """For each cell, the in-bounds neighbours paired with their LURD letter."""
+        neighbours = []
+        for index in range(width * height):
+            y, x = divmod(index, width)
+            cells = []
+            if x > 0:
+                cells.append((index - 1, "l"))
+            if y > 0:
+                cells.append((index - width, "u"))
+            if x < width - 1:
+                cells.append((index + 1, "r"))
+            if y < height - 1:
+                cells.append((index + width, "d"))
+            neighbours.append(tuple(cells))
+        return neighbours
+
+    def solve(
+        self, method: SolverMethodEnum | str = SolverMethodEnum.astar
+    ) -> Solution:
+        """Run the search and return a Solution, whatever its outcome."""
+        start_time = time.perf_counter()
+        self.nodes_expanded = 0
+        self.table = None
+        self._deadline = (
+            start_time + self.time_limit if self.time_limit is not None else None
+        )
+        try:
+            self._prepare()
+            if method == SolverMethodEnum.astar:
+                pushes = self._astar()
+            elif method == SolverMethodEnum.idastar:
+                pushes = self._idastar()
+            else:
+                raise ValueError(f"Unknown solver method {method!r}")
+        except SearchLimitReached as limit:
+            return self._solution(limit.status, start_time)
+
+        if pushes is None:
+            return self._solution(SolverStatusEnum.unsolvable, start_time)
+        moves = self._pushes_to_lurd(pushes)
+        return self._solution(
+            SolverStatusEnum.solved,
+            start_time,
+            moves=moves,
+            move_count=len(moves),
+            push_count=len(pushes),
+        )
+
+    def _solution(
+        self, status: SolverStatusEnum, start_time: float, **fields
+    ) -> Solution:
+        if self.table is not None:
+            fields["table_hit_rate"] = self.table.hit_rate
+            fields["table_bytes"] = self.table.bytes_used
+        return Solution(
+            status=status,
+            nodes_expanded=self.nodes_expanded,
+            elapsed=time.perf_counter() - start_time,
+            **fields,
+        )
+
+    def _prepare(self) -> None:
+        """Build what the searches share, once, checking the deadline."""
+        if self.matching is not None:
+            return
+        level_map = self.level.map
+        distances = DistanceTable(level_map, check=self._check_deadline)
+        # Pushing onto a dead square can only be pruned when every box is needed
+        if len(self.start_boxes) <= len(self.goals):
+            self.dead = bytes(self.level.get_dead_squares())
+            self._check_deadline()
+            self.freeze_detector = FreezeDetector(level_map, self.dead)
+        self.matching = MatchingHeuristic(distances, len(self.start_boxes))
+
+    def _check_deadline(self) -> None:
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchLimitReached(SolverStatusEnum.timeout)
+
+    def _expand(self) -> None:
+        """Count an expansion and stop the search if a budget is exhausted."""
+        self.nodes_expanded += 1
+        if self.node_limit is not None and self.nodes_expanded > self.node_limit:
+            raise SearchLimitReached(SolverStatusEnum.node_limit)
+        self._check_deadline()
+
+    def _reachable(self, boxes: frozenset[int], player: int) -> bytearray:
+        """
+        Flood fill of the cells the player can walk to without pushing.
+
+        Reachable cells are marked 1, boxes 2 and everything else 0.
+        """
+        open_neighbours = self.open_neighbours
+        reached = bytearray(self.size)
+        for box in boxes:
+            reached[box] = 2
+        reached[player] = 1
+        stack = [player]
+        pop, push = stack.pop, stack.append
+        while stack:
+            for neighbour in open_neighbours[pop()]:
+                if not reached[neighbour]:
+                    reached[neighbour] = 1
+                    push(neighbour)
+        return reached
+
+    @staticmethod
+    def _state_key(box_hash: int, reached: bytearray) -> tuple[int, int]:
+        # Same identity as Map.state_key: Zobrist hash of the boxes plus the
+        # top-left reachable cell standing for the whole player region
+        return box_hash, reached.index(1)
+
+    def _push(self, boxes: frozenset[int], box_hash: int, box: int, target: int):
+        """Apply a push and return the child's boxes, hash, region and key."""
+        # Each child floods the whole board, which is slow on large maps
+        self._check_deadline()
+        child_boxes = boxes - {box} | {target}
+        child_hash = box_hash ^ self.zobrist[box] ^ self.zobrist[target]
+        child_reached = self._reachable(child_boxes, box)
+        return (
+            child_boxes,
+            child_hash,
+            child_reached,
+            self._state_key(child_hash, child_reached),
+        )
+
+    def _is_solved(self, boxes: frozenset[int]) -> bool:
+        return self.goal_set <= boxes
+
+    def _pushes(self, boxes: frozenset[int], reached: bytearray):
+        """Yield every legal push as (box, target)."""
+        walls = self.walls
+        dead = self.dead
+        width = self.width
+        for box in boxes:
+            for target, _ in self.neighbours[box]:
+                behind = 2 * box - target  # Cell the player pushes from
+                if not 0 <= behind < self.size or reached[behind] != 1:
+                    continue
+                # A horizontal push must keep the player on the box's row
+                if target - box in (-1, 1) and behind // width != box // width:
+                    continue
+                if walls[target] or dead[target] or target in boxes:
+                    continue
+                if self.freeze_detector is not None and (
+                    self.freeze_detector.is_deadlock(
+                        target,
+                        lambda cell: cell == target or (cell != box and cell in boxes),
+                    )
+                ):
+                    continue
+                yield box, target
+
+    def _astar(self) -> list[tuple[int, int]] | None:
+        boxes = self.start_boxes
+        reached = self._reachable(boxes, self.start_player)
+        matching = self.matching.initial(boxes)
+        if matching.value >= UNREACHABLE:
+            return None
+        start_key = self._state_key(self.start_hash, reached)
+        tie_breaker = count()
+        open_heap = [
+            (
+                matching.value,
+                next(tie_breaker),
+                0,
+                boxes,
+                self.start_hash,
+                reached,
+                matching,
+            )
+        ]
+        came_from = {start_key: None}
+        best_cost = {start_key: 0}
+
+        while open_heap:
+            _, _, cost, boxes, box_hash, reached, matching = heapq.heappop(open_heap)
+            key = self._state_key(box_hash, reached)
+            if cost > best_cost[key]:
+                continue  # Stale heap entry
+            if self._is_solved(boxes):
+                return self._rebuild_pushes(came_from, key)
+            self._expand()
+
+            for box, target in self._pushes(boxes, reached):
+                child_boxes, child_hash, child_reached, child_key = self._push(
+                    boxes, box_hash, box, target
+                )
+                child_cost = cost + 1
+                if child_cost < best_cost.get(child_key, child_cost + 1):
+                    best_cost[child_key] = child_cost
+                    child_matching = self.matching.push(matching, box, target)
+                    if child_matching.value >= UNREACHABLE:
+                        continue  # Some box can no longer reach any free goal
+                    came_from[child_key] = (key, box, target)
+                    estimate = child_cost + child_matching.value
+                    heapq.heappush(
+                        open_heap,
+                        (
+                            estimate,
+                            next(tie_breaker),
+                            child_cost,
+                            child_boxes,
+                            child_hash,
+                            child_reached,
+                            child_matching,
+                        ),
+                    )
+        return None
+
+    @staticmethod
+    def _rebuild_pushes(came_from, key) -> list[tuple[int, int]]:
+        pushes = []
+        while came_from[key] is not None:
+            key, box, target = came_from[key]
+            pushes.append((box, target))
+        pushes.reverse()
+        return pushes
+
+    def _idastar(self) -> list[tuple[int, int]] | None:
+        boxes = self.start_boxes
+        reached = self._reachable(boxes, self.start_player)
+        matching = self.matching.initial(boxes)
+        if matching.value >= UNREACHABLE:
+            return None
+        bound = matching.value
+        path: list[tuple[int, int]] = []
+        on_path = {self._state_key(self.start_hash, reached)}
+        # Lower bounds learnt by earlier searches, which both skip states already
+        # searched this iteration and sharpen the heuristic in the next ones
+        table = self.table = TranspositionTable(
+            self.size, self.table_bytes, self.table_policy
+        )
+
+        def visit(boxes, box_bits, box_hash, reached, matching, cost, bound):
+            """
+            True if a state is solved, the bound it exceeds if it is cut off,
+            or else the frame to search its children from.
+            """
+            packed = table.pack(box_bits, reached.index(1))
+            remaining = matching.value
+            learnt = table.get(packed)
+            if learnt is not None and learnt > remaining:
+                remaining = learnt
+            if cost + remaining > bound:
+                return cost + remaining
+            if self._is_solved(boxes):
+                return True
+            self._expand()
+            return _SearchFrame(
+                boxes,
+                box_bits,
+                box_hash,
+                matching,
+                cost,
+                packed,
+                self._pushes(boxes, reached),
+            )
+
+        def search(bound):
+            """
+            One depth-first iteration, on an explicit stack so solutions of
+            any length fit. Returns True once ``path`` is a solution, else the
+            next bound or None if nothing is left to search.
+            """
+            result = visit(
+                boxes, box_bits, self.start_hash, reached, matching, 0, bound
+            )
+            if not isinstance(result, _SearchFrame):
+                return result
+            stack = [result]
+            while stack:
+                frame = stack[-1]
+                for box, target in frame.children:
+                    child_boxes, child_hash, child_reached, child_key = self._push(
+                        frame.boxes, frame.box_hash, box, target
+                    )
+                    if child_key in on_path:
+                        continue
+                    child_matching = self.matching.push(frame.matching, box, target)
+                    if child_matching.value >= UNREACHABLE:
+                        continue  # Some box can no longer reach any free goal
+                    result = visit(
+                        child_boxes,
+                        frame.box_bits ^ (1 << box) ^ (1 << target),
+                        child_hash,
+                        child_reached,
+                        child_matching,
+                        frame.cost + 1,
+                        bound,
+                    )
+                    if result is True:
+                        path.append((box, target))
+                        return True
+                    if isinstance(result, _SearchFrame):
+                        path.append((box, target))
+                        on_path.add(child_key)
+                        frame.child_key = child_key
+                        stack.append(result)
+                        break
+                    frame.lower_next_bound(result)
+                else:
+                    # Every child was searched, so the frame returns to its parent
+                    stack.pop()
+                    if frame.next_bound is not None:
+                        table.store(
+                            frame.packed,
+                            frame.next_bound - frame.cost,
+                            depth=bound - frame.cost,
+                        )
+                    if not stack:
+                        return frame.next_bound
+                    parent = stack[-1]
+                    on_path.discard(parent.child_key)
+                    path.pop()
+                    parent.lower_next_bound(frame.next_bound)
+
+        box_bits = sum(1 << box for box in boxes)
+        while True:
+            result = search(bound)
+            if result is True:
+                return path
+            if result is None:
+                return None
+            bound = result
+
+    def _walk(self, boxes: frozenset[int], source: int, target: int) -> str:
+        """Shortest walk from source to target around walls and boxes."""
+        if source == target:
+            return ""
+        walls = self.walls
+        previous = {source: None}
+        queue = deque([source])
+        while queue:
+            cell = queue.popleft()
+            for neighbour, letter in self.neighbours[cell]:
+                if neighbour in previous or walls[neighbour] or neighbour in boxes:
+                    continue
+                previous[neighbour] = (cell, letter)
+                if neighbour == target:
+                    letters = []
+                    while previous[neighbour] is not None:
+                        neighbour, letter = previous[neighbour]
+                        letters.append(letter)
+                    return "".join(reversed(letters))
+                queue.append(neighbour)
+        raise ValueError("Push position is not reachable")
+
+    def _pushes_to_lurd(self, pushes: list[tuple[int, int]]) -> str:
+        boxes = self.start_boxes
+        player = self.start_player
+        moves = []
+        for box, target in pushes:
+            moves.append(self._walk(boxes, player, 2 * box - target))
+            letter = next(
+                letter
+                for neighbour, letter in self.neighbours[box]
+                if neighbour == target
+            )
+            moves.append(letter.upper())
+            boxes = boxes - {box} | {target}
+            player = box
+        return "".join(moves)
+
+
+def solve(
+    level: Level,
+    method: SolverMethodEnum | str = SolverMethodEnum.astar,
+    time_limit: float | None = None,
+    node_limit: int | None = None,
+) -> Solution:
+    """Solve a level with the given method and budgets."""
+    return Solver(level, time_limit=time_limit, node_limit=node_limit).solve(method)
@@ -0,0 +1,72 @@
+import os
+import pygame
+import pytest
+from unittest.mock import patch
+from assets import AssetManager, AssetSpec, AtlasEnum
+
+
+@pytest.fixture
+def scenes(tmp_path):
+    pygame.init()
+    opaque = pygame.Surface((8, 4))
+    opaque.fill((10, 20, 30))
+    translucent = pygame.Surface((6, 6), pygame.SRCALPHA)
+    translucent.fill((200, 0, 0, 128))
+    pygame.image.save(opaque, str(tmp_path / "opaque.png"))
+    pygame.image.save(translucent, str(tmp_path / "translucent.png"))
+    return {
+        "menu": {"wide": AssetSpec(str(tmp_path / "opaque.png"), width=16)},
+        "level": {
+            "floor": AssetSpec(str(tmp_path / "opaque.png")),
+            "box": AssetSpec(str(tmp_path / "translucent.png")),
+        },
+    }
+
+
+def test_scenes_are_loaded_on_demand(scenes, tmp_path):
+    assets = AssetManager(scenes, str(tmp_path / "cache"))
+
+    floor = assets.get("level", "floor")
+
+    assert assets.is_loaded("level")
+    assert not assets.is_loaded("menu")
+    assert floor.get_size() == (8, 4)
+    assert floor.get_at((0, 0))[:3] == (10, 20, 30)
+    # The width is scaled and the aspect ratio kept
+    assert assets.get("menu", "wide").get_size() == (16, 8)
+
+
+def test_images_share_an_atlas_by_transparency(scenes):
+    surfaces, layout = AssetManager(scenes, None)._build_atlases(scenes["level"])
+
+    assert layout["floor"][0] == AtlasEnum.opaque
+    assert layout["box"][0] == AtlasEnum.translucent
+    assert surfaces[AtlasEnum.translucent].get_flags() & pygame.SRCALPHA
+
+
+def test_cached_atlas_skips_decoding(scenes, tmp_path):
+    cache_directory = str(tmp_path / "cache")
+    first = AssetManager(scenes, cache_directory).load_scene("level")
+
+    with patch("assets.pygame.image.load", side_effect=AssertionError):
+        cached = AssetManager(scenes, cache_directory).load_scene("level")
+
+    for name, image in first.items():
+        assert cached[name].get_size() == image.get_size()
+        assert cached[name].get_at((1, 1)) == image.get_at((1, 1))
+
+
+def test_cache_is_rebuilt_when_a_source_changes(scenes, tmp_path):
+    cache_directory = str(tmp_path / "cache")
+    AssetManager(scenes, cache_directory).load_scene("level")
+    path = scenes["level"]["floor"].path
+    replacement = pygame.Surface((8, 4))
+    replacement.fill((1, 2, 3))
+    pygame.image.save(replacement, path)
+    os.utime(path, (0, 12345))
+
+    floor = AssetManager(scenes, cache_directory).get("level", "floor")
+
+    assert floor.get_at((0, 0))[:3] == (1, 2, 3)
+    # Files cached for the old sources are cleaned up
+    assert len(os.listdir(cache_directory)) == 3
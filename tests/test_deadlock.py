@@ -0,0 +1,32 @@
+from model import Map
+from deadlock import FreezeDetector
+
+
+def check(map_string, x, y):
+    level_map = Map.from_string(map_string)
+    detector = FreezeDetector(level_map, level_map.compute_dead_squares())
+    return detector.is_deadlock(level_map.index(x, y), level_map.boxes.__getitem__)
+
+
+def test_free_box_is_not_frozen():
+    assert not check("WWWWWW\nWG   W\nW  B W\nW   PW\nWWWWWW", 3, 2)
+
+
+def test_two_by_two_block_is_deadlock():
+    assert check("WWWWWWW\nWG G  W\nW BB  W\nW BB PW\nWG G  W\nWWWWWWW", 3, 3)
+
+
+def test_two_by_two_block_on_goals_is_not_deadlock():
+    assert not check("WWWWWW\nW    W\nW ** W\nW **PW\nW    W\nWWWWWW", 3, 3)
+
+
+def test_pair_against_wall_is_deadlock():
+    assert check("WWWWWWW\nW BB  W\nW    PW\nWG G  W\nWWWWWWW", 3, 1)
+
+
+def test_pair_against_wall_with_one_box_on_goal_is_deadlock():
+    assert check("WWWWWWW\nWG*B  W\nW    PW\nW     W\nWWWWWWW", 3, 1)
+
+
+def test_box_blocked_on_one_axis_only_is_not_frozen():
+    assert not check("WWWWWWW\nW     W\nWWB   W\nW    PW\nWG    W\nWWWWWWW", 2, 2)
@@ -3,10 +3,25 @@ import pygame
 import json
 import tempfile
 import os
+import threading
+from datetime import datetime, timedelta
+from collections import defaultdict
 from unittest.mock import patch
-from model import Level, Map, Player, Score, Position
-from game import Game
-from pygame.locals import K_DOWN, K_UP, K_LEFT, K_RIGHT
+from model import Level, Map, Player, Score, Wall
+from game import Game, LOADING_FINISHED
+from replay import Replay, ReplayVerifier
+from score_store import ScoreStore
+from pygame.locals import (
+    K_DOWN,
+    K_UP,
+    K_LEFT,
+    K_RIGHT,
+    K_RIGHTBRACKET,
+    K_d,
+    K_y,
+    K_z,
+    K_EQUALS,
+)
 
 
 @pytest.fixture
@@ -47,6 +62,8 @@ def winning_game():
 
     # Create a Game instance and set up the initial state
     game = Game()
+    game._replay_directory = None  # Keep the replay of the win in memory
+    game._scores_path = None  # And the score
     game.loaded_levels = [level]
     game.selected_level = 1
     game.start_level()  # Initialize the level
@@ -57,6 +74,20 @@ def winning_game():
     return game
 
 
+@pytest.fixture
+def drawing_game(setup_game, monkeypatch, tmp_path):
+    # Render off-screen so the tests never open a window
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    pygame.display.quit()
+    pygame.display.init()
+    game = setup_game
+    game.screen = pygame.display.set_mode((game.screen_width, game.screen_height))
+    game._asset_cache_directory = str(tmp_path / "assets")
+    game.load_images()
+    yield game
+    pygame.display.quit()
+
+
 def test_start_level(setup_game):
     game = setup_game
 
@@ -87,49 +118,50 @@ def test_restart_level(setup_game):
     assert game._level_steps == 0
 
 
-def test_is_valid_position(setup_game):
-    game = setup_game
-
-    # Test valid positions (within bounds)
-    assert game._is_valid_position((1, 1)) == True
-    assert game._is_valid_position((1, 3)) == True
-    assert game._is_valid_position((2, 3)) == True
-
-    # Test invalid positions (outside bounds)
-    assert game._is_valid_position((0, 8)) == False
-    assert game._is_valid_position((7, 0)) == False
-    assert game._is_valid_position((-1, 0)) == False
+def pressed(*keys):
+    # Mimic pygame.key.get_pressed() for the given keys
+    return defaultdict(bool, {key: True for key in keys})
 
 
-def test_move_player(setup_game):
+def test_keydown_moves_player(setup_game):
     game = setup_game
 
     # Get initial player position
-    initial_position = game._player.position
+    initial_position = game._player.position.model_copy()
 
-    # Define a new valid position for the player to move to
-    new_position = (initial_position.x + 1, initial_position.y)  # Move one to the right
+    # Move one cell up onto an empty floor cell
+    game._handle_keydown_event(pressed(K_UP))
 
-    # Call the move_player function
-    game._move_player(new_position)
+    # Assert that the player position and step count are updated correctly
+    assert game._player.position.x == initial_position.x
+    assert game._player.position.y == initial_position.y - 1
+    assert game._player.last_vertical_direction == "up"
+    assert game._level_steps == 1
 
-    # Assert that the player position is updated correctly
-    assert (
-        game._player.position.x == new_position[0]
-        and game._player.position.y == new_position[1]
-    )
 
-
-def test_get_box_next_position_down(setup_game):
+def test_keydown_blocked_move_only_turns_player(setup_game):
     game = setup_game
-    game._player.position = Position(x=4, y=2)
 
-    # Simulate pressing the down key
-    keys = {pygame.K_DOWN: True}
+    # Two boxes in a row cannot be pushed
+    game._handle_keydown_event(pressed(K_LEFT))
 
-    next_position = game._get_box_next_position(keys)
+    assert (game._player.position.x, game._player.position.y) == (5, 3)
+    assert game._player.last_horizontal_direction == "left"
+    assert game._level_steps == 0
 
-    assert next_position == (4, 4)
+
+def test_keydown_pushes_box_down(setup_game):
+    game = setup_game
+    game._handle_keydown_event(pressed(K_UP))
+    game._handle_keydown_event(pressed(K_LEFT))
+
+    # Simulate pressing the down key next to a box
+    game._handle_keydown_event(pressed(K_DOWN))
+
+    level_map = game._current_level.map
+    assert level_map.has_box(level_map.index(4, 4))
+    assert (game._player.position.x, game._player.position.y) == (4, 3)
+    assert game._level_steps == 3
 
 
 def test_check_if_won_non_winning(setup_game):
@@ -150,3 +182,381 @@ def test_check_if_won_winning(winning_game):
     # Cleanup: remove the temporary file
     if os.path.exists(game.loaded_levels[0].file_path):
         os.remove(game.loaded_levels[0].file_path)
+
+
+def test_keydown_push_onto_dead_square_flags_deadlock(setup_game):
+    game = setup_game
+    game._handle_keydown_event(pressed(K_UP))
+    game._handle_keydown_event(pressed(K_LEFT))
+    assert not game._is_deadlocked
+
+    # A box pushed against the bottom wall can never reach a goal
+    game._handle_keydown_event(pressed(K_DOWN))
+
+    assert game._is_deadlocked
+    game.restart_level()
+    assert not game._is_deadlocked
+
+
+def test_undo_and_redo_keys(setup_game):
+    game = setup_game
+    game._handle_keydown_event(pressed(K_UP))
+    game._handle_keydown_event(pressed(K_LEFT))
+    game._handle_keydown_event(pressed(K_DOWN))
+    assert game._is_deadlocked
+
+    game._handle_keydown_event(pressed(K_z))
+
+    level_map = game._current_level.map
+    assert level_map.has_box(level_map.index(4, 3))
+    assert (game._player.position.x, game._player.position.y) == (4, 2)
+    assert game._level_steps == 2
+    assert not game._is_deadlocked
+
+    game._handle_keydown_event(pressed(K_y))
+
+    assert level_map.has_box(level_map.index(4, 4))
+    assert game._level_steps == 3
+    assert game._is_deadlocked
+
+
+def test_restart_rewinds_the_level_in_place(drawing_game):
+    game = drawing_game
+    level = game._current_level
+    start = str(level.map)
+    game.draw_level()
+    for keys in (K_UP, K_LEFT, K_DOWN):
+        game._handle_keydown_event(pressed(keys))
+    game.draw_level()
+
+    game.restart_level()
+    dirty_rects = game.draw_level()
+    incremental = pygame.image.tobytes(game.screen, "RGB")
+    game._redraw_all = True
+    game.draw_level()
+
+    assert game._current_level is level
+    assert str(level.map) == start
+    assert (game._level_steps, game._is_deadlocked) == (0, False)
+    assert len(dirty_rects) < 10
+    assert incremental == pygame.image.tobytes(game.screen, "RGB")
+
+
+@pytest.fixture
+def replay_game(tmp_path):
+    pygame.init()
+    level_file = tmp_path / "level.json"
+    level_file.write_text(
+        json.dumps(
+            {"map": "WWWWWWW\nW PB GW\nWWWWWWW", "score": {"time": 0, "steps": 0}}
+        )
+    )
+    game = Game()
+    game._replay_directory = str(tmp_path / "replays")
+    game._scores_path = str(tmp_path / "scores.log")
+    game.loaded_levels = [Level.load_from_file(str(level_file))]
+    game.selected_level = 1
+    game.start_level()
+    return game
+
+
+def test_winning_saves_a_verifiable_replay(replay_game, tmp_path):
+    game = replay_game
+    for keys in (K_LEFT, K_RIGHT, K_z, K_y, K_RIGHT, K_RIGHT):
+        game._handle_keydown_event(pressed(keys))
+
+    assert game._has_won
+    game._scores.flush()  # The replay is written after the score
+    (path,) = (tmp_path / "replays").iterdir()
+    replay = Replay.load(str(path))
+    assert replay == game._last_replay
+    assert replay.moves == "lrRR"
+    assert replay.score == game.loaded_levels[0].score
+    assert ReplayVerifier(game.loaded_levels[0]).verify(replay) == "valid"
+
+
+def test_scores_are_logged_apart_from_the_level_file(replay_game, tmp_path):
+    game = replay_game
+    level_text = (tmp_path / "level.json").read_text()
+    for keys in (K_LEFT, K_RIGHT, K_RIGHT, K_RIGHT):
+        game._handle_keydown_event(pressed(keys))
+    game._scores.close()
+
+    assert (tmp_path / "level.json").read_text() == level_text
+    # A new game picks the best score up from the log when the level starts
+    game = Game()
+    game._scores_path = str(tmp_path / "scores.log")
+    game.loaded_levels = [Level.load_from_file(str(tmp_path / "level.json"))]
+    game.selected_level = 1
+    game.start_level()
+    # The win took under a second, which is a best time and not "no score"
+    assert game.loaded_levels[0].score == Score(time=0, steps=4)
+
+
+def test_replays_play_back_at_any_speed(replay_game):
+    game = replay_game
+    replay = Replay(
+        map_hash=game.loaded_levels[0].map.content_hash(),
+        moves="lrRR",
+        times=[1000, 2000, 3000, 4000],
+        score=Score(time=4, steps=4),
+    )
+    start = datetime.now()
+    with patch("game.datetime") as mock_datetime, patch.object(
+        ScoreStore, "submit"
+    ) as submit:
+        mock_datetime.now.return_value = start
+        game.play_replay(replay, speed=2)
+        assert game._get_wait_timeout() == 500
+
+        mock_datetime.now.return_value = start + timedelta(milliseconds=1000)
+        game._advance_replay()
+        assert game._simulator.journal.to_lurd() == "lr"
+
+        game._handle_replay_keys(pressed(K_RIGHTBRACKET))
+        mock_datetime.now.return_value = start + timedelta(milliseconds=1500)
+        game._advance_replay()
+
+    assert game._has_won
+    assert game._replay is None
+    assert game._level_steps == 4
+    submit.assert_not_called()  # Watching a replay scores nothing
+
+
+def test_draw_level_redraws_only_dirty_areas(drawing_game):
+    game = drawing_game
+    with patch("game.datetime") as mock_datetime:
+        mock_datetime.now.return_value = game._level_start_time
+
+        assert game.draw_level() == [game.screen.get_rect()]
+        # Nothing changed, so nothing is redrawn
+        assert game.draw_level() == []
+
+        game._handle_keydown_event(pressed(K_UP))
+        dirty_rects = game.draw_level()
+        incremental = pygame.image.tobytes(game.screen, "RGB")
+        game._redraw_all = True
+        game.draw_level()
+
+    assert dirty_rects
+    screen_area = game.screen_width * game.screen_height
+    assert sum(rect.width * rect.height for rect in dirty_rects) < screen_area // 10
+    assert incremental == pygame.image.tobytes(game.screen, "RGB")
+
+
+def test_draw_level_redraws_counters_every_time_they_change(drawing_game):
+    game = drawing_game
+    add_room(game, 12, 6)
+    start = game._level_start_time
+    with patch("game.datetime") as mock_datetime:
+        mock_datetime.now.return_value = start
+        game.draw_level()
+        for second in range(1, 5):
+            # The new step count and time are as wide as the old ones
+            mock_datetime.now.return_value = start + timedelta(seconds=second)
+            game._handle_keydown_event(pressed(K_RIGHT))
+            dirty_rects = game.draw_level()
+            incremental = pygame.image.tobytes(game.screen, "RGB")
+            game._redraw_all = True
+            game.draw_level()
+
+            assert incremental == pygame.image.tobytes(game.screen, "RGB")
+            (_, time_rect), (_, steps_rect) = game._level_texts[1:3]
+            assert time_rect in dirty_rects and steps_rect in dirty_rects
+
+
+def add_room(game, width, height):
+    """Append an open walled room with the player in the top-left corner."""
+    rows = ["W" * width, "WP" + " " * (width - 3) + "W"]
+    rows += ["W" + " " * (width - 2) + "W"] * (height - 3) + ["W" * width]
+    game.loaded_levels.append(
+        Level(
+            map=Map.from_string("\n".join(rows)),
+            score=Score(time=0, steps=0),
+            file_path="",
+        )
+    )
+    game.selected_level = len(game.loaded_levels)
+    game.start_level()
+
+
+def test_board_is_composed_at_a_fitting_tile_size(drawing_game):
+    game = drawing_game
+    add_room(game, 40, 20)
+    game.draw_level()
+
+    # 40 columns have to fit in 70% of a 1280 pixel wide screen
+    assert game._tile_size == 22
+    assert game._board_surface.get_size() == (880, 440)
+    assert game._board_rect.center == (game.screen_width // 2, game.screen_height // 2)
+    # Tiles are scaled once per size and reused afterwards
+    assert game.get_scaled_item_images(22) is game.get_scaled_item_images(22)
+    assert game.get_scaled_item_images(22)[Wall].get_size() == (22, 22)
+
+
+@pytest.mark.parametrize("size", [100, 300])
+def test_big_maps_only_draw_the_cells_in_view(drawing_game, size):
+    game = drawing_game
+    add_room(game, size, size)
+    game.draw_level()
+
+    # The board is as big as the view whatever the size of the map
+    assert game._tile_size == 16
+    assert game._board_surface.get_size() == (896, 496)
+    assert (game._camera.left, game._camera.top) == (0, 0)
+
+
+def test_camera_follows_the_player(drawing_game):
+    game = drawing_game
+    add_room(game, 200, 100)
+    game.draw_level()
+
+    for _ in range(60):
+        game._handle_keydown_event(pressed(K_RIGHT))
+        game.draw_level()
+    incremental = pygame.image.tobytes(game.screen, "RGB")
+    game._redraw_all = True
+    game.draw_level()
+
+    # The player stays two cells inside the right edge of the 56 visible columns
+    assert game._player.position.x == 61
+    assert game._camera.left == 61 - 56 + 3
+    assert incremental == pygame.image.tobytes(game.screen, "RGB")
+
+
+def test_zoom_and_scroll_move_the_view(drawing_game):
+    game = drawing_game
+    add_room(game, 200, 100)
+    game.draw_level()
+
+    game._handle_keydown_event(pressed(K_d))
+    assert game._camera.left == game._scroll_step
+    dirty_rects = game.draw_level()
+    assert dirty_rects[0] == game._board_rect
+
+    game._handle_keydown_event(pressed(K_EQUALS))
+    game.draw_level()
+    assert game._tile_size == 20
+    game.zoom(-10)
+    game.draw_level()
+    assert game._tile_size == game._smallest_tile_size
+    # 112 columns and 62 rows of 8 pixels fill the 896x503 view
+    assert game._board_surface.get_size() == (896, 496)
+
+
+def test_choose_level_menu_only_draws_the_levels_in_view(drawing_game, tmp_path):
+    game = drawing_game
+    game._thumbnail_cache_directory = str(tmp_path / "thumbnails")
+    game.loaded_levels = game.loaded_levels * 1000
+    game.selected_level = 1
+    with patch.object(
+        Game, "get_level_thumbnail", return_value=pygame.Surface((96, 64))
+    ) as get_level_thumbnail:
+        game.show_choose_level_menu()
+        assert [call.args for call in get_level_thumbnail.call_args_list] == [
+            (0,),
+            (1,),
+            (2,),
+            (3,),
+        ]
+
+        # The list scrolls just enough to keep the selection in view
+        game.selected_level = 6
+        get_level_thumbnail.reset_mock()
+        game.show_choose_level_menu()
+        assert game._first_visible_level == 2
+        assert get_level_thumbnail.call_count == game._visible_level_count
+
+
+def test_level_thumbnails_are_cached_by_map(drawing_game, tmp_path):
+    game = drawing_game
+    game._thumbnail_cache_directory = str(tmp_path / "thumbnails")
+    game.loaded_levels = game.loaded_levels * 2
+
+    thumbnail = game.get_level_thumbnail(0)
+
+    # Both levels have the same map, so they share a thumbnail
+    assert game.get_level_thumbnail(1) is thumbnail
+    assert game._thumbnails.renders == 1
+    assert len(os.listdir(tmp_path / "thumbnails")) == 1
+
+
+def test_level_wakes_up_when_the_clock_ticks(setup_game):
+    game = setup_game
+    with patch("game.datetime") as mock_datetime:
+        mock_datetime.now.return_value = game._level_start_time + timedelta(
+            milliseconds=1250
+        )
+
+        assert game._get_wait_timeout() == 750
+        game.idle_fps = 0
+        assert game._get_wait_timeout() == 750
+        game.idle_fps = 10
+        assert game._get_wait_timeout() == 100
+
+
+def test_menus_wait_for_input_or_idle_redraw(setup_game):
+    game = setup_game
+    game._current_level_index = 0
+
+    assert game._get_wait_timeout() == 1000
+    game.idle_fps = 0
+    assert game._get_wait_timeout() is None
+
+
+def test_process_events_handles_queued_events_without_waiting(drawing_game):
+    game = drawing_game
+    game.idle_fps = 0  # Would block forever if no event was queued
+    pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    game.process_events()
+
+    assert not game.running
+
+
+def test_load_levels_reads_the_manifest(tmp_path):
+    levels_directory = os.path.join(os.path.dirname(__file__), "..", "levels")
+    game = Game(levels_directory=levels_directory)
+    game._level_cache_directory = str(tmp_path)
+
+    game.load_levels()
+
+    assert len(game.loaded_levels) == len(os.listdir(levels_directory))
+    assert os.listdir(tmp_path)
+    assert not game.loaded_levels.is_loaded(0)
+    game.selected_level = 1
+    game.start_level()
+    assert game.loaded_levels.is_loaded(0)
+
+
+def test_menu_waits_for_background_loading(drawing_game):
+    game = drawing_game
+    game._current_level_index = 0
+    release = threading.Event()
+    with patch.object(
+        Game, "load_levels", side_effect=lambda: release.wait(5)
+    ), patch.object(Game, "play_music"):
+        game.start_background_loading()
+
+        assert not game.is_loaded
+        game.selected_option_main_menu = "newGame"
+        game._handle_selection()
+        assert game._current_level_index == 0  # Ignored while loading
+
+        release.set()
+        game._loading_thread.join()
+
+    assert game.is_loaded
+    assert pygame.event.get(LOADING_FINISHED)
+    game._handle_selection()
+    assert game._current_level_index == 1
+
+
+def test_background_loading_errors_reach_the_main_thread(drawing_game):
+    game = drawing_game
+    with patch.object(Game, "load_levels", side_effect=OSError("no levels")):
+        game.start_background_loading()
+        game._loading_thread.join()
+
+    with pytest.raises(OSError, match="no levels"):
+        game.process_events()
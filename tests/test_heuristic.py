@@ -0,0 +1,55 @@
+import itertools
+import random
+from model import Map
+from heuristic import DistanceTable, MatchingHeuristic, UNREACHABLE
+
+
+def brute_force_matching(table, boxes):
+    goals = range(len(table.goals))
+    return min(
+        sum(table.rows[box][goal] for box, goal in zip(assignment, goals))
+        for assignment in itertools.permutations(boxes, len(table.goals))
+    )
+
+
+def test_distance_table_counts_pushes_to_each_goal():
+    level_map = Map.from_string("WWWWWWW\nWG    W\nW   P W\nW    GW\nWWWWWWW")
+    table = DistanceTable(level_map)
+
+    assert table.goals == (level_map.index(1, 1), level_map.index(5, 3))
+    # From the middle of the room a box needs 2 pushes to the top-left goal
+    # and 4 to the bottom-right one
+    assert table.rows[level_map.index(2, 2)] == (2, 4)
+    # A box in a corner without a goal can never leave it
+    assert table.rows[level_map.index(5, 1)] == (UNREACHABLE, UNREACHABLE)
+    assert table.rows[level_map.index(5, 3)][1] == 0
+
+
+def test_matching_push_updates_match_brute_force():
+    level_map = Map.from_string(
+        "WWWWWWWW\nWG    GW\nW      W\nW   P  W\nW      W\nWG    GW\nWWWWWWWW"
+    )
+    table = DistanceTable(level_map)
+    heuristic = MatchingHeuristic(table, len(table.goals))
+    floor = [
+        index for index in range(len(level_map.tiles)) if not level_map.is_wall(index)
+    ]
+    generator = random.Random(7)
+
+    state = heuristic.initial(generator.sample(floor, 4))
+    assert state.value == brute_force_matching(table, state.boxes)
+    for _ in range(50):
+        box = generator.choice(state.boxes)
+        target = generator.choice([cell for cell in floor if cell not in state.boxes])
+        state = heuristic.push(state, box, target)
+        assert state.value == brute_force_matching(table, state.boxes)
+
+
+def test_matching_ignores_spare_boxes():
+    level_map = Map.from_string("WWWWWW\nWG   W\nW B  W\nW  BPW\nWWWWWW")
+    table = DistanceTable(level_map)
+    heuristic = MatchingHeuristic(table, 2)
+
+    state = heuristic.initial([level_map.index(2, 2), level_map.index(3, 3)])
+
+    assert state.value == 2
@@ -0,0 +1,106 @@
+import json
+import os
+import pytest
+from unittest.mock import patch
+from model import Level
+from level_manifest import LazyLevels, LevelInfo, LevelManifest
+
+
+def write_level(path, map_string, steps=0, mtime=None):
+    with open(path, "w") as file:
+        json.dump({"map": map_string, "score": {"time": 0, "steps": steps}}, file)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def levels_directory(tmp_path):
+    directory = tmp_path / "levels"
+    directory.mkdir()
+    write_level(directory / "level1.json", "WWWWWW\nWPB GW\nWWWWWW", steps=4)
+    write_level(directory / "level2.json", "WWWW\nWPGW\nW*W\nWWWW")
+    return str(directory)
+
+
+def test_manifest_summarises_levels_without_building_them(levels_directory, tmp_path):
+    with patch.object(Level, "load_from_file", side_effect=AssertionError), patch(
+        "model.Map.compute_dead_squares", side_effect=AssertionError
+    ):
+        manifest = LevelManifest.load(levels_directory, str(tmp_path / "cache"))
+
+    first, second = manifest.get_level_infos()
+    assert (first.name, first.width, first.height) == ("level1", 6, 3)
+    assert first.score.steps == 4
+    assert (second.name, second.width, second.height) == ("level2", 4, 4)
+
+
+def test_unchanged_files_are_not_read_again(levels_directory, tmp_path):
+    cache_directory = str(tmp_path / "cache")
+    LevelManifest.load(levels_directory, cache_directory)
+
+    with patch.object(LevelInfo, "read", side_effect=AssertionError):
+        manifest = LevelManifest.load(levels_directory, cache_directory)
+
+    assert len(manifest.levels) == 2
+
+
+def test_changed_and_removed_files_refresh_the_manifest(levels_directory, tmp_path):
+    cache_directory = str(tmp_path / "cache")
+    LevelManifest.load(levels_directory, cache_directory)
+    write_level(
+        os.path.join(levels_directory, "level1.json"),
+        "WWWWWWW\nWPB  GW\nWWWWWWW",
+        steps=3,
+        mtime=12345,
+    )
+    os.remove(os.path.join(levels_directory, "level2.json"))
+
+    manifest = LevelManifest.load(levels_directory, cache_directory)
+
+    (info,) = manifest.get_level_infos()
+    assert (info.width, info.score.steps) == (7, 3)
+
+
+def test_lazy_levels_parse_on_first_access(levels_directory):
+    levels = LazyLevels(LevelManifest.load(levels_directory, None).get_level_infos())
+
+    assert len(levels) == 2
+    assert not levels.is_loaded(0)
+    level = levels[0]
+    assert levels.is_loaded(0) and not levels.is_loaded(1)
+    assert levels[0] is level
+    assert str(levels[-1].map) == "WWWW\nWPGW\nW*W \nWWWW"
+
+
+def test_lazy_levels_reload_changed_files_when_opened(levels_directory):
+    levels = LazyLevels(LevelManifest.load(levels_directory, None).get_level_infos())
+    level = levels[0]
+    level.update_score(4, 2)
+
+    write_level(levels[0].file_path, "WWWWW\nWPBGW\nWWWWW", mtime=12345)
+
+    assert levels[0] is level  # Indexing, as every frame does, stays cached
+    assert levels.load_level(0) is not level
+    assert levels[0].map.width == 5
+    assert (levels[0].score.time, levels[0].score.steps) == (4, 2)
+    assert levels.load_level(0) is levels[0]
+
+
+def test_map_hash_only_changes_with_the_map(levels_directory, tmp_path):
+    cache_directory = str(tmp_path / "cache")
+    path = os.path.join(levels_directory, "level1.json")
+    before = LevelManifest.load(levels_directory, cache_directory).levels["level1.json"]
+
+    write_level(path, "WWWWWW\nWPB GW\nWWWWWW", steps=2, mtime=12345)
+    after_score = LevelManifest.load(levels_directory, cache_directory).levels[
+        "level1.json"
+    ]
+    write_level(path, "WWWWWW\nWP BGW\nWWWWWW", steps=2, mtime=23456)
+    after_map = LevelManifest.load(levels_directory, cache_directory).levels[
+        "level1.json"
+    ]
+
+    assert after_score.map_hash == before.map_hash
+    assert after_map.map_hash != before.map_hash
+    # The same identity as the scores and replays of the level
+    assert after_map.map_hash == Level.load_from_file(path).map.content_hash()
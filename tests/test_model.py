@@ -1,6 +1,7 @@
 import pytest
 from typing import Any
 from game import Game, Level, Box, Wall, Floor, Goal, Player
+from model import Map, Score
 import tempfile
 import os
 import json
@@ -70,23 +71,20 @@ def test_update_score_improves_score(level_file):
     assert level.score.steps == 3
 
 
-# Test to ensure that saving works as expected
-def test_save(level_file):
-    # Load the level from the file
-    level = Level.load_from_file(level_file)
+# Test that scores are kept in memory and level files are only read
+def test_update_score_leaves_the_file_untouched(level_file):
+    with open(level_file, "r") as file:
+        contents = file.read()
 
-    # Update the score and save the level
+    # Load the level from the file and update the score
+    level = Level.load_from_file(level_file)
     level.update_score(10, 5)
-    level.save()
 
-    # Open the file and verify the HJSON contents
+    # The level file still holds the map and the score it had
     with open(level_file, "r") as file:
-        data = json.load(file)
-
-    # Assert that the map and score in the file match expected values
-    assert data["map"] == "WWW    \nWGWWWWW\nWGG    \nW BBBPW\nW    WW\nWWWWWW "
-    assert data["score"]["time"] == 10
-    assert data["score"]["steps"] == 5
+        assert file.read() == contents
+    assert level.score.time == 10
+    assert level.score.steps == 5
 
 
 # Test for updating the score from an initial zero state
@@ -103,3 +101,115 @@ def test_update_score_with_initial_zero(level_file):
     level.update_score(8, 3)
     assert level.score.time == 8
     assert level.score.steps == 3
+
+
+# Test that the compact board keeps the static layer and occupancy separate
+def test_map_from_string_layers():
+    level_map = Map.from_string("WWWW\nWP*W\nWBGW\nWWWW")
+
+    assert (level_map.width, level_map.height) == (4, 4)
+    assert level_map.player == level_map.index(1, 1)
+    assert level_map.is_wall(level_map.index(0, 0))
+    assert level_map.is_goal(level_map.index(2, 1))
+    assert level_map.has_box(level_map.index(2, 1))
+    assert level_map.has_box(level_map.index(1, 2))
+    assert level_map.goals == (level_map.index(2, 1), level_map.index(2, 2))
+    assert not level_map.is_solved()
+
+
+# Test that moving boxes and the player keeps the string form in sync
+def test_map_move_box_round_trip():
+    level_map = Map.from_string("WWWWW\nWPBGW\nWWWWW")
+    level_map.move_box(level_map.index(2, 1), level_map.index(3, 1))
+    level_map.move_player(level_map.index(2, 1))
+
+    assert str(level_map) == "WWWWW\nW P*W\nWWWWW"
+    assert level_map.is_solved()
+    assert str(Map.from_string(str(level_map))) == str(level_map)
+
+
+@pytest.mark.parametrize("map_string", ["WPX", "WP&G"])
+def test_map_from_string_rejects_unknown_symbols(map_string):
+    with pytest.raises(ValueError):
+        Map.from_string(map_string)
+
+
+def test_map_round_trips_boxes_and_player_on_goals():
+    level_map = Map.from_string("WWWWW\nW+*BW\nWG  W\nWWWWW")
+
+    assert level_map.is_goal(level_map.player)
+    assert level_map.boxes_on_goals == 1
+    assert str(level_map) == "WWWWW\nW+*BW\nWG  W\nWWWWW"
+
+
+# Test that the boxes-on-goals counter follows pushes on and off goals
+def test_map_boxes_on_goals_counter():
+    level_map = Map.from_string("WWWWWWW\nWP*B GW\nWWWWWWW")
+    assert level_map.boxes_on_goals == 1
+
+    level_map.move_box(level_map.index(2, 1), level_map.index(4, 1))
+    assert level_map.boxes_on_goals == 0
+
+    level_map.move_box(level_map.index(4, 1), level_map.index(5, 1))
+    level_map.move_box(level_map.index(3, 1), level_map.index(2, 1))
+    assert level_map.boxes_on_goals == 2
+    assert level_map.is_solved()
+
+
+# Test that state keys identify positions without comparing map strings
+def test_map_state_key_ignores_player_cell_within_region():
+    left = Map.from_string("WWWWWW\nWP  BW\nW  G W\nWWWWWW")
+    right = Map.from_string("WWWWWW\nW   BW\nW PG W\nWWWWWW")
+
+    assert left.box_hash == right.box_hash
+    assert left.state_key() == right.state_key()
+    assert left.canonical_player() == left.index(1, 1)
+
+
+def test_map_state_key_follows_pushes():
+    level_map = Map.from_string("WWWWWW\nWPB GW\nWWWWWW")
+    start_key = level_map.state_key()
+
+    level_map.move_box(level_map.index(2, 1), level_map.index(3, 1))
+    level_map.move_player(level_map.index(2, 1))
+
+    pushed = Map.from_string(str(level_map))
+    assert level_map.box_hash == pushed.box_hash
+    assert level_map.state_key() == pushed.state_key()
+    assert level_map.state_key() != start_key
+
+
+# Test that dead squares are precomputed when loading a level
+def test_load_from_file_computes_dead_squares(level_file):
+    level = Level.load_from_file(level_file)
+    level_map = level.map
+
+    assert level.dead_squares is not None
+    # Along the bottom wall a box can never be pushed back up to a goal
+    assert level.dead_squares[level_map.index(1, 4)]
+    assert level.dead_squares[level_map.index(4, 4)]
+    # Goals and cells a box can be pushed onto a goal from are alive
+    assert not level.dead_squares[level_map.index(1, 1)]
+    assert not level.dead_squares[level_map.index(2, 2)]
+    # Walls are never marked
+    assert not level.dead_squares[level_map.index(0, 0)]
+
+
+def test_snapshot_shares_the_static_layer():
+    level = Level(
+        map=Map.from_string("WWWWW\nWPBGW\nWWWWW"),
+        score=Score(time=0, steps=0),
+        file_path="",
+    )
+    level.get_dead_squares()
+
+    snapshot = level.snapshot()
+    snapshot.map.move_box(snapshot.map.index(2, 1), snapshot.map.index(3, 1))
+    snapshot.map.move_player(snapshot.map.index(2, 1))
+    snapshot.score.steps = 1
+
+    assert snapshot.map.tiles is level.map.tiles
+    assert snapshot.dead_squares is level.dead_squares
+    assert str(level.map) == "WWWWW\nWPBGW\nWWWWW"
+    assert level.score.steps == 0
+    assert snapshot.map.is_solved() and not level.map.is_solved()
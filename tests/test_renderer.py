@@ -0,0 +1,114 @@
+import io
+import pytest
+import pygame
+from assets import AssetManager, SceneEnum
+from model import Level, Map, Player, Score, Wall
+from renderer import (
+    HeadlessRenderer,
+    Tileset,
+    get_tile_assets,
+    init_headless,
+    to_array,
+    write_raw_video,
+)
+from simulator import Simulator
+from game import Game
+
+TEST_MAP = "WWW    \nWGWWWWW\nWGG    \nW BBBPW\nW    WW\nWWWWWW "
+
+
+@pytest.fixture
+def tileset(monkeypatch, tmp_path):
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    pygame.display.quit()
+    assets = AssetManager({SceneEnum.tiles: get_tile_assets()}, str(tmp_path))
+    init_headless()
+    yield Tileset.load(assets)
+    pygame.display.quit()
+
+
+@pytest.fixture
+def level():
+    return Level(
+        map=Map.from_string(TEST_MAP), score=Score(time=0, steps=0), file_path=""
+    )
+
+
+def test_render_matches_the_game_board(tileset, level, tmp_path):
+    game = Game()
+    game.screen = pygame.display.get_surface()
+    game._asset_cache_directory = str(tmp_path)
+    game.loaded_levels = [level]
+    game.selected_level = 1
+    game.start_level()
+    game._bake_board()
+
+    renderer = HeadlessRenderer(tile_size=game._tile_size, tileset=tileset)
+    surface = renderer.render(level.map)
+
+    assert surface.get_size() == (7 * game._tile_size, 6 * game._tile_size)
+    assert pygame.image.tobytes(surface, "RGB") == pygame.image.tobytes(
+        game._board_surface, "RGB"
+    )
+
+
+def test_tileset_and_game_keep_separate_caches(tileset, tmp_path):
+    # The fixture cached the tileset in tmp_path; the game's level scene follows
+    AssetManager(Game().get_scene_assets(), str(tmp_path)).load_scene(SceneEnum.level)
+
+    cached_scenes = sorted(path.stem.split("-")[0] for path in tmp_path.glob("*.json"))
+    assert cached_scenes == [SceneEnum.level, SceneEnum.tiles]
+
+
+def test_tileset_scales_each_size_once(tileset):
+    assert tileset.get_images(10) is tileset.get_images(10)
+    assert tileset.get_images(10)[Wall].get_size() == (10, 10)
+
+
+def test_stream_frames_redraws_each_move(tileset, level):
+    renderer = HeadlessRenderer(tile_size=8, tileset=tileset)
+    moves = "ulDrU"
+    frames = []
+    for frame in renderer.stream_frames(level, moves):
+        frames.append(pygame.image.tobytes(frame, "RGB"))
+
+    assert len(frames) == len(moves) + 1
+    assert str(level.map) == TEST_MAP  # The level itself is left untouched
+    assert frames[0] == pygame.image.tobytes(renderer.render(level.map), "RGB")
+    # The last frame matches a full render of the position the moves lead to
+    final_level = level.model_copy(deep=True)
+    Simulator(final_level).apply_moves(moves)
+    player = Player(
+        position=final_level.map.position(final_level.map.player),
+        last_vertical_direction="up",
+        last_horizontal_direction="right",
+    )
+    assert final_level.map.boxes != level.map.boxes
+    assert frames[-1] == pygame.image.tobytes(
+        renderer.render(final_level.map, player), "RGB"
+    )
+
+
+def test_stream_frames_rejects_unknown_moves(tileset, level):
+    renderer = HeadlessRenderer(tile_size=8, tileset=tileset)
+    with pytest.raises(ValueError, match="Unknown move"):
+        list(renderer.stream_frames(level, "ux"))
+
+
+def test_write_raw_video(tileset, level):
+    renderer = HeadlessRenderer(tile_size=8, tileset=tileset)
+    file = io.BytesIO()
+
+    assert write_raw_video(renderer.stream_frames(level, "ul"), file) == 3
+    assert len(file.getvalue()) == 3 * (7 * 8) * (6 * 8) * 3
+
+
+def test_render_array(tileset, level):
+    pytest.importorskip("numpy")
+    renderer = HeadlessRenderer(tile_size=8, tileset=tileset)
+    surface = renderer.render(level.map)
+
+    array = to_array(surface)
+
+    assert array.shape == (6 * 8, 7 * 8, 3)
+    assert tuple(array[20, 41]) == tuple(surface.get_at((41, 20)))[:3]
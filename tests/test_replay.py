@@ -0,0 +1,105 @@
+import pytest
+from model import Level, Map, Score
+from simulator import Simulator
+from replay import (
+    Replay,
+    ReplayRecorder,
+    ReplayStatusEnum,
+    ReplayVerifier,
+    verify_replays,
+)
+
+TEST_MAP = "WWWWWWW\nW PB GW\nWWWWWWW"
+
+
+@pytest.fixture
+def level():
+    return Level(
+        map=Map.from_string(TEST_MAP), score=Score(time=0, steps=0), file_path=""
+    )
+
+
+def make_replay(moves, times=None, time=None, steps=None, map_string=TEST_MAP):
+    times = times if times is not None else [400 * (i + 1) for i in range(len(moves))]
+    return Replay(
+        map_hash=Map.from_string(map_string).content_hash(),
+        moves=moves,
+        times=times,
+        score=Score(
+            time=time if time is not None else (times[-1] // 1000 if times else 0),
+            steps=steps if steps is not None else len(moves),
+        ),
+    )
+
+
+def test_recorder_follows_undo_and_redo(level):
+    simulator = Simulator(level.snapshot())
+    recorder = ReplayRecorder(simulator.journal)
+    for elapsed_ms, move in enumerate("lrR"):
+        simulator.step({"l": "left", "r": "right", "R": "right"}[move])
+        recorder.record(elapsed_ms * 100)
+
+    simulator.undo()
+    simulator.undo()
+    simulator.redo()
+    recorder.record(900, redone=True)
+    simulator.step("right")
+    recorder.record(1000)
+    simulator.step("right")
+    recorder.record(1100)
+
+    replay = recorder.to_replay(level, Score(time=1, steps=4))
+    assert (replay.moves, replay.times) == ("lrRR", [0, 900, 1000, 1100])
+    assert ReplayVerifier(level).verify(replay) == ReplayStatusEnum.valid
+
+
+@pytest.mark.parametrize(
+    "replay, status",
+    [
+        (make_replay("lrRR"), ReplayStatusEnum.valid),
+        (
+            make_replay("lrRR", map_string="WWWW\nWPBG\nWWWW"),
+            ReplayStatusEnum.wrong_level,
+        ),
+        (make_replay("lrRRl"), ReplayStatusEnum.illegal_move),  # After the win
+        (make_replay("lrrR"), ReplayStatusEnum.illegal_move),  # Push as a walk
+        (make_replay("uRR"), ReplayStatusEnum.illegal_move),  # Into a wall
+        (make_replay("lrRx"), ReplayStatusEnum.illegal_move),
+        (make_replay("lrR"), ReplayStatusEnum.not_solved),
+        (make_replay("lrRR", steps=3), ReplayStatusEnum.wrong_steps),
+        (make_replay("lrRR", time=0), ReplayStatusEnum.wrong_time),
+        (make_replay("lrRR", time=9), ReplayStatusEnum.wrong_time),
+        (make_replay("lrRR", times=[1, 3, 2, 4]), ReplayStatusEnum.wrong_time),
+        (make_replay("lrRR", times=[1, 2, 3]), ReplayStatusEnum.wrong_time),
+    ],
+)
+def test_verify(level, replay, status):
+    assert ReplayVerifier(level).verify(replay) == status
+    assert str(level.map) == TEST_MAP  # Replays are played on a copy
+
+
+def test_verify_replays_matches_levels_by_map(level):
+    other = Level(
+        map=Map.from_string("WWWWW\nWPBGW\nWWWWW"),
+        score=Score(time=0, steps=0),
+        file_path="",
+    )
+    replays = [
+        make_replay("lrRR"),
+        make_replay("R", map_string="WWWWW\nWPBGW\nWWWWW"),
+        make_replay("R", map_string="WWW\nWPW\nWWW"),
+    ]
+
+    assert verify_replays([level, other], replays) == [
+        ReplayStatusEnum.valid,
+        ReplayStatusEnum.valid,
+        ReplayStatusEnum.wrong_level,
+    ]
+
+
+def test_save_and_load(level, tmp_path):
+    replay = make_replay("lrRR")
+
+    path = replay.save(str(tmp_path), level)
+
+    assert Replay.load(path) == replay
@@ -0,0 +1,146 @@
+import multiprocessing
+import threading
+from model import Score
+from score_store import ScoreStore, merge_scores
+
+
+def test_merge_scores_keeps_the_best_of_each():
+    assert merge_scores(None, 9, 7) == Score(time=9, steps=7)
+    assert merge_scores(Score(time=9, steps=7), 12, 5) == Score(time=9, steps=5)
+
+
+def test_sub_second_runs_are_best_times(tmp_path):
+    path = tmp_path / "scores.log"
+    store = ScoreStore(str(path), flush_interval=0)
+
+    assert store.submit("level", 3, 4) == Score(time=3, steps=4)
+    assert store.submit("level", 0, 6) == Score(time=0, steps=4)
+    assert store.submit("level", 2, 5) == Score(time=0, steps=4)
+    store.close()
+
+    assert ScoreStore(str(path)).load().get("level") == Score(time=0, steps=4)
+
+
+def test_submitted_runs_are_written_in_one_batch(tmp_path):
+    path = tmp_path / "scores.log"
+    store = ScoreStore(str(path), flush_interval=60, compact_ratio=100)
+    written = []
+    for steps in (9, 7, 8):
+        store.submit("level", 10, steps, then=lambda: written.append(True))
+    assert store.get("level") == Score(time=10, steps=7)  # Before any write
+
+    store.flush()
+
+    assert store.batches_written == 1
+    assert written == [True, True, True]
+    assert len(path.read_text().splitlines()) == 3
+    assert ScoreStore(str(path)).load().get("level") == Score(time=10, steps=7)
+
+
+def test_load_drops_a_torn_last_line(tmp_path):
+    path = tmp_path / "scores.log"
+    path.write_text(
+        '{"level":"a","time":5,"steps":3}\n{"level":"a","time":1,"st'  # Cut short
+    )
+
+    store = ScoreStore(str(path), flush_interval=0).load()
+    store.submit("b", 2, 2)
+    store.close()
+
+    assert store.get("a") == Score(time=5, steps=3)
+    reloaded = ScoreStore(str(path)).load()
+    assert (reloaded.get("a"), reloaded.get("b")) == (
+        Score(time=5, steps=3),
+        Score(time=2, steps=2),
+    )
+
+
+def test_load_skips_a_corrupt_line_and_keeps_the_runs_after_it(tmp_path):
+    path = tmp_path / "scores.log"
+    path.write_text(
+        '{"level":"a","time":5,"steps":3}\n'
+        "not a run\n"
+        '{"level":"a","time":4,"steps":9}\n'
+        '{"level":"b","time":2,"steps":2}\n'
+    )
+
+    store = ScoreStore(str(path), flush_interval=0).load()
+    store.submit("c", 1, 1)
+    store.close()
+
+    reloaded = ScoreStore(str(path)).load()
+    assert (reloaded.get("a"), reloaded.get("b"), reloaded.get("c")) == (
+        Score(time=4, steps=3),
+        Score(time=2, steps=2),
+        Score(time=1, steps=1),
+    )
+
+
+def test_log_is_compacted_to_one_line_per_level(tmp_path):
+    path = tmp_path / "scores.log"
+    store = ScoreStore(str(path), flush_interval=0, compact_ratio=2)
+    for steps in range(10, 0, -1):
+        store.submit("level", steps, steps)
+        store.flush()
+    store.close()
+
+    assert len(path.read_text().splitlines()) <= 2
+    assert not list(tmp_path.glob("*.tmp"))
+    assert ScoreStore(str(path)).load().get("level") == Score(time=1, steps=1)
+
+
+def test_submit_does_not_wait_for_the_disk(tmp_path):
+    store = ScoreStore(str(tmp_path / "scores.log"), flush_interval=0)
+    writing = threading.Event()
+    release = threading.Event()
+
+    def block_writer():
+        writing.set()
+        release.wait()
+
+    store.submit("level", 1, 1, then=block_writer)
+    writing.wait()
+    store.submit("level", 1, 1)  # Queued behind the blocked batch
+    release.set()
+    store.close()
+
+    assert store.batches_written == 2
+
+
+COMPACT_RATIO = 2
+
+
+def write_runs(path, writer, levels, runs):
+    store = ScoreStore(
+        path, flush_interval=0.001, fsync=False, compact_ratio=COMPACT_RATIO
+    )
+    store.load()
+    for run in range(runs):
+        for level in range(levels):
+            # Every writer has its own best for each level, in time and steps
+            store.submit(f"level-{level}", 1000 + writer - run, 2000 - writer + run)
+        store.flush()
+    store.close()
+
+
+def test_many_processes_lose_no_runs(tmp_path):
+    path = str(tmp_path / "scores.log")
+    writers, levels, runs = 32, 8, 6
+    context = multiprocessing.get_context("spawn")  # Forking pytest is unsafe
+    processes = [
+        context.Process(target=write_runs, args=(path, writer, levels, runs))
+        for writer in range(writers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+
+    store = ScoreStore(path).load()
+    for level in range(levels):
+        assert store.get(f"level-{level}") == Score(
+            time=1000 - (runs - 1), steps=2000 - (writers - 1)
+        )
+    # Whoever appended past the limit compacted the log written by everyone
+    assert len(open(path).read().splitlines()) <= (COMPACT_RATIO + 1) * levels
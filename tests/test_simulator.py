@@ -0,0 +1,172 @@
+import pytest
+from model import Level, Map, Score, DirectionEnum
+from simulator import Simulator
+
+
+def make_simulator(map_string):
+    level = Level(
+        map=Map.from_string(map_string), score=Score(time=0, steps=0), file_path=""
+    )
+    return Simulator(level)
+
+
+def test_step_moves_player():
+    simulator = make_simulator("WWWWW\nWP  W\nWWWWW")
+
+    result = simulator.step("right")
+
+    assert result.moved and not result.pushed
+    assert simulator.map.player == simulator.map.index(2, 1)
+    assert simulator.steps == 1
+
+
+def test_step_into_wall_is_ignored():
+    simulator = make_simulator("WWWW\nWP W\nWWWW")
+
+    result = simulator.step(DirectionEnum.up)
+
+    assert not result.moved
+    assert simulator.map.player == simulator.map.index(1, 1)
+    assert simulator.steps == 0
+
+
+def test_step_out_of_bounds_is_ignored():
+    simulator = make_simulator("P B")
+
+    assert not simulator.step("left").moved
+    assert not simulator.step("up").moved
+    assert simulator.map.player == 0
+
+
+def test_step_pushes_box_onto_goal():
+    simulator = make_simulator("WWWWWW\nWPB GW\nWWWWWW")
+
+    first = simulator.step("right")
+    second = simulator.step("right")
+
+    assert first.pushed and not first.solved
+    assert second.pushed and second.solved
+    assert str(simulator.map) == "WWWWWW\nW  P*W\nWWWWWW"
+    assert (simulator.steps, simulator.pushes) == (2, 2)
+
+
+def test_step_cannot_push_two_boxes():
+    simulator = make_simulator("WWWWWW\nWPBBGW\nWWWWWW")
+
+    result = simulator.step("right")
+
+    assert not result.moved
+    assert str(simulator.map) == "WWWWWW\nWPBBGW\nWWWWWW"
+
+
+def test_apply_moves_lurd():
+    simulator = make_simulator("WWWWWWW\nW PB GW\nWWWWWWW")
+
+    result = simulator.apply_moves("lrRR")
+
+    assert result.solved
+    assert simulator.steps == 4
+
+    with pytest.raises(ValueError):
+        simulator.apply_moves("x")
+
+
+def test_step_flags_push_onto_dead_square():
+    simulator = make_simulator("WWWWWW\nWG   W\nW    W\nW  BPW\nWWWWWW")
+
+    result = simulator.step("left")
+
+    assert result.pushed and result.deadlocked
+
+
+def test_step_push_along_wall_towards_goal_is_alive():
+    simulator = make_simulator("WWWWWW\nWG   W\nW  B W\nW  P W\nWWWWWW")
+
+    result = simulator.step("up")
+
+    assert result.pushed and not result.deadlocked
+
+
+def test_step_with_spare_boxes_never_flags_deadlock():
+    simulator = make_simulator("WWWWW\nWG  W\nWB  W\nW BPW\nWWWWW")
+
+    result = simulator.step("left")
+
+    assert result.pushed and not result.deadlocked
+
+
+def test_step_flags_freeze_deadlock():
+    simulator = make_simulator("WWWWWWW\nWGB   W\nW  B PW\nW   G W\nWWWWWWW")
+    simulator.apply_moves("dll")
+
+    result = simulator.step("up")
+
+    # Two boxes side by side against the wall can no longer move
+    assert result.pushed
+    assert str(simulator.map).splitlines()[1] == "WGBB  W"
+    assert not simulator.dead_squares[simulator.map.index(3, 1)]
+    assert result.deadlocked
+
+
+def test_undo_and_redo_restore_the_map():
+    simulator = make_simulator("WWWWWWW\nW PB GW\nWWWWWWW")
+    start = (str(simulator.map), simulator.map.box_hash)
+    simulator.apply_moves("lrRR")
+    solved = (str(simulator.map), simulator.map.box_hash)
+
+    for _ in range(4):
+        assert simulator.undo().moved
+    assert not simulator.undo().moved
+    assert (str(simulator.map), simulator.map.box_hash) == start
+    assert (simulator.steps, simulator.pushes) == (0, 0)
+    assert not simulator.solved
+
+    for _ in range(4):
+        result = simulator.redo()
+    assert not simulator.redo().moved
+    assert result.solved
+    assert (str(simulator.map), simulator.map.box_hash) == solved
+    assert (simulator.steps, simulator.pushes) == (4, 2)
+
+
+def test_journal_stores_a_byte_per_move():
+    simulator = make_simulator("WWWWWWW\nW PB GW\nWWWWWWW")
+    simulator.apply_moves("lrRR")
+    simulator.step("up")  # Blocked, so not recorded
+
+    assert len(simulator.journal.entries) == 4
+    assert simulator.journal.to_lurd() == "lrRR"
+
+    simulator.undo()
+    simulator.undo()
+    simulator.step("left")
+
+    # A new move drops the moves that were undone
+    assert simulator.journal.to_lurd() == "lrl"
+    assert not simulator.journal.can_redo
+
+
+def test_rewind_undoes_every_move():
+    simulator = make_simulator("WWWWWWW\nW PB GW\nWWWWWWW")
+    level_map = simulator.map
+    simulator.apply_moves("lrRR")
+
+    assert simulator.rewind() == 4
+    assert simulator.map is level_map
+    assert str(simulator.map) == "WWWWWWW\nW PB GW\nWWWWWWW"
+    assert simulator.journal.can_redo
+
+
+def test_undoing_the_deadlocking_push_clears_the_deadlock():
+    simulator = make_simulator("WWWWWW\nWG   W\nW    W\nW  BPW\nWWWWWW")
+    simulator.step("left")
+    assert simulator.deadlocked
+
+    assert not simulator.undo().deadlocked
+    assert not simulator.deadlocked
+    assert simulator.redo().deadlocked
+    assert simulator.deadlocked
+
+    simulator.undo()
+    simulator.step("up")
+    assert not simulator.deadlocked
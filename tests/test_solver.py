@@ -0,0 +1,109 @@
+import glob
+import os
+import pytest
+from model import Level, Map, Score
+from simulator import Simulator
+from solver import Solver, SolverStatusEnum, solve
+
+LEVEL_FILES = sorted(
+    glob.glob(os.path.join(os.path.dirname(__file__), "..", "levels", "*.json"))
+)
+
+
+def make_level(map_string):
+    return Level(
+        map=Map.from_string(map_string), score=Score(time=0, steps=0), file_path=""
+    )
+
+
+def replay(level, moves):
+    simulator = Simulator(level.model_copy(deep=True))
+    result = simulator.apply_moves(moves)
+    return result.solved, simulator.pushes
+
+
+@pytest.mark.parametrize("method", ["astar", "idastar"])
+@pytest.mark.parametrize("level_file", LEVEL_FILES)
+def test_solves_shipped_levels(level_file, method):
+    level = Level.load_from_file(level_file)
+
+    solution = solve(level, method, time_limit=30)
+
+    assert solution.solved
+    assert solution.nodes_expanded > 0
+    assert solution.move_count == len(solution.moves)
+    assert replay(level, solution.moves) == (True, solution.push_count)
+
+
+def test_astar_and_idastar_agree_on_push_count():
+    level = make_level("WWWWWWW\nW    GW\nW B   W\nW PB GW\nWWWWWWW")
+
+    astar = solve(level, "astar")
+    idastar = solve(level, "idastar")
+
+    assert astar.push_count == idastar.push_count
+
+
+def test_solver_leaves_level_untouched():
+    level = make_level("WWWWWW\nWPB GW\nWWWWWW")
+
+    solution = solve(level)
+
+    assert solution.moves == "RR"
+    assert str(level.map) == "WWWWWW\nWPB GW\nWWWWWW"
+
+
+def test_unsolvable_level():
+    level = make_level("WWWWW\nWB  W\nW P W\nW  GW\nWWWWW")
+
+    solution = solve(level)
+
+    assert solution.status == SolverStatusEnum.unsolvable
+    assert solution.moves == ""
+
+
+def test_node_limit():
+    level = Level.load_from_file(LEVEL_FILES[-1])
+
+    solution = Solver(level, node_limit=3).solve()
+
+    assert solution.status == SolverStatusEnum.node_limit
+
+
+@pytest.mark.parametrize("policy", ["depth", "lru"])
+def test_idastar_with_small_transposition_table(policy):
+    level = Level.load_from_file(LEVEL_FILES[3])
+
+    solution = Solver(level, table_bytes=256 * 1024, table_policy=policy).solve(
+        "idastar"
+    )
+
+    assert solution.solved
+    assert solution.push_count == solve(level, "astar").push_count
+    assert 0 < solution.table_bytes <= 256 * 1024
+    assert 0 < solution.table_hit_rate < 1
+
+
+@pytest.mark.parametrize("method", ["astar", "idastar"])
+def test_solves_solutions_longer_than_the_recursion_limit(method):
+    corridor = "PB" + " " * 1099 + "G"
+    level = make_level("\n".join(["W" * 1104, f"W{corridor}W", "W" * 1104]))
+
+    solution = solve(level, method)
+
+    assert solution.solved
+    assert solution.push_count == 1100
+
+
+def test_time_limit_bounds_the_search_on_large_maps():
+    rows = ["W" * 150] + ["W" + " " * 148 + "W"] * 148 + ["W" * 150]
+    rows[1] = "WP" + " " * 147 + "W"
+    rows[75] = "W" + " " * 40 + "G" + " " * 30 + "B" + " " * 76 + "W"
+    rows[77] = "W" + " " * 40 + "G" + " " * 30 + "B" + " " * 76 + "W"
+    level = make_level("\n".join(rows))
+    level.get_dead_squares()
+
+    solution = Solver(level, time_limit=0.2).solve()
+
+    assert solution.status == SolverStatusEnum.timeout
+    assert solution.elapsed < 2
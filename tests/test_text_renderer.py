@@ -0,0 +1,43 @@
+import os
+import pygame
+import pytest
+from text_renderer import TextRenderer
+
+FONT_PATH = os.path.join(os.path.dirname(__file__), "..", "fonts", "Minecraft.ttf")
+
+
+@pytest.fixture
+def renderer():
+    pygame.font.init()
+    return TextRenderer(FONT_PATH, max_surfaces=2)
+
+
+def test_fonts_are_loaded_once_per_size(renderer):
+    assert renderer.get_font(20) is renderer.get_font(20)
+    assert renderer.get_font(20) is not renderer.get_font(30)
+
+
+def test_unchanged_text_is_not_rendered_again(renderer):
+    first = renderer.render("Steps: 1", 20, "white")
+
+    assert renderer.render("Steps: 1", 20, "white") is first
+    assert renderer.render("Steps: 1", 20, "green") is not first
+    assert renderer.render("Steps: 1", 20, "white", underline=True) is not first
+    assert (renderer.hits, renderer.misses) == (1, 3)
+
+
+def test_underline_does_not_leak_into_other_texts(renderer):
+    renderer.render("Level 1", 20, "green", underline=True)
+
+    assert not renderer.get_font(20).get_underline()
+
+
+def test_least_recently_used_text_is_evicted(renderer):
+    old = renderer.render("Time: 0:00:01", 20, "white")
+    recent = renderer.render("Steps: 1", 20, "white")
+    renderer.render("Steps: 1", 20, "white")
+
+    renderer.render("Time: 0:00:02", 20, "white")
+
+    assert renderer.render("Steps: 1", 20, "white") is recent
+    assert renderer.render("Time: 0:00:01", 20, "white") is not old
@@ -0,0 +1,75 @@
+import pytest
+import pygame
+from assets import AssetManager, SceneEnum
+from model import Map
+from renderer import Tileset, get_tile_assets, init_headless
+from thumbnails import ThumbnailCache
+
+TEST_MAP = "WWWWWW\nWPB GW\nWWWWWW"
+
+
+@pytest.fixture
+def tileset(monkeypatch, tmp_path):
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    pygame.display.quit()
+    init_headless()
+    yield Tileset.load(
+        AssetManager({SceneEnum.tiles: get_tile_assets()}, str(tmp_path / "assets"))
+    )
+    pygame.display.quit()
+
+
+def never_loaded():
+    raise AssertionError("The map should come from the cache")
+
+
+def test_thumbnails_are_rendered_once_and_read_back_from_disk(tileset, tmp_path):
+    cache_directory = str(tmp_path / "thumbnails")
+    thumbnails = ThumbnailCache((96, 64), cache_directory, tileset)
+
+    surface = thumbnails.get("abc", lambda: Map.from_string(TEST_MAP))
+    assert thumbnails.get("abc", never_loaded) is surface
+    assert (thumbnails.renders, thumbnails.hits) == (1, 1)
+
+    # A new cache, as after a restart, reads the saved thumbnail
+    thumbnails = ThumbnailCache((96, 64), cache_directory, tileset)
+    from_disk = thumbnails.get("abc", never_loaded)
+    assert (thumbnails.renders, thumbnails.misses) == (0, 1)
+    assert pygame.image.tobytes(from_disk, "RGB") == pygame.image.tobytes(
+        surface, "RGB"
+    )
+
+
+def test_thumbnails_fit_their_size(tileset):
+    thumbnails = ThumbnailCache((96, 64), None, tileset)
+
+    # 6x3 cells at the largest whole tile size that fits
+    assert thumbnails.render(Map.from_string(TEST_MAP)).get_size() == (96, 48)
+    # Too many cells for 1 pixel each, so scaled down keeping the aspect ratio
+    big_map = Map.from_string("\n".join(["WP" + "W" * 198] + ["W" * 200] * 99))
+    assert thumbnails.render(big_map).get_size() == (96, 48)
+
+
+def test_least_recently_drawn_thumbnails_are_dropped(tileset):
+    thumbnails = ThumbnailCache((96, 64), None, tileset, max_surfaces=2)
+    for map_hash in ("a", "b", "a", "c"):
+        thumbnails.get(map_hash, lambda: Map.from_string(TEST_MAP))
+
+    assert thumbnails.renders == 3
+    thumbnails.get("a", never_loaded)
+    with pytest.raises(AssertionError):
+        thumbnails.get("b", never_loaded)
+
+
+def test_corrupt_thumbnails_are_rendered_again(tileset, tmp_path):
+    cache_directory = tmp_path / "thumbnails"
+    ThumbnailCache((96, 64), str(cache_directory), tileset).get(
+        "abc", lambda: Map.from_string(TEST_MAP)
+    )
+    (path,) = cache_directory.iterdir()
+    path.write_bytes(b"not a png")
+
+    thumbnails = ThumbnailCache((96, 64), str(cache_directory), tileset)
+    thumbnails.get("abc", lambda: Map.from_string(TEST_MAP))
+
+    assert thumbnails.renders == 1
@@ -0,0 +1,62 @@
+import pytest
+from transposition import TranspositionTable
+
+
+def test_pack_encodes_boxes_and_player():
+    table = TranspositionTable(cell_count=20, max_bytes=4096)
+
+    packed = table.pack(1 << 3 | 1 << 19, 7)
+
+    # 20 cells fit in 3 bytes of bitset and the player index in one more
+    assert packed == bytes([0b1000, 0, 0b1000, 7])
+    assert table.pack(1 << 3 | 1 << 19, 8) != packed
+
+
+@pytest.mark.parametrize("policy", ["depth", "lru"])
+def test_store_and_get_track_hit_rate(policy):
+    table = TranspositionTable(cell_count=64, max_bytes=64 * 1024, policy=policy)
+    key = table.pack(0b101, 2)
+
+    assert table.get(key) is None
+    table.store(key, 5, depth=3)
+    assert table.get(key) == 5
+
+    assert len(table) == 1
+    assert table.hit_rate == 0.5
+    assert 0 < table.bytes_used <= table.max_bytes
+
+
+@pytest.mark.parametrize("policy", ["depth", "lru"])
+def test_memory_cap_is_never_exceeded(policy):
+    table = TranspositionTable(cell_count=400, max_bytes=10_000, policy=policy)
+
+    for box_bits in range(5_000):
+        table.store(table.pack(box_bits, 0), box_bits, depth=box_bits % 7)
+
+    assert len(table) <= table.capacity
+    assert table.bytes_used <= table.max_bytes
+    assert table.evictions > 0
+
+
+def test_lru_evicts_least_recently_used():
+    table = TranspositionTable(cell_count=8, max_bytes=1, policy="lru")
+    first, second = table.pack(1, 0), table.pack(2, 0)
+
+    table.store(first, 1)
+    table.store(second, 2)
+
+    assert table.capacity == 1
+    assert table.get(first) is None
+    assert table.get(second) == 2
+
+
+def test_depth_policy_keeps_deeper_entry():
+    table = TranspositionTable(cell_count=8, max_bytes=1, policy="depth")
+    deep, shallow = table.pack(1, 0), table.pack(2, 0)
+
+    table.store(deep, 1, depth=5)
+    table.store(shallow, 2, depth=1)
+
+    assert table.capacity == 1
+    assert table.get(deep) == 1
+    assert table.get(shallow) is None
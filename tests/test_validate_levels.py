@@ -0,0 +1,122 @@
+import csv
+import json
+import os
+import pytest
+import solver
+from validate_levels import check_level, check_levels, main
+
+
+def write_level(directory, name, map_string):
+    path = os.path.join(directory, name)
+    with open(path, "w") as file:
+        json.dump({"map": map_string, "score": {"time": 0, "steps": 0}}, file)
+    return path
+
+
+@pytest.fixture
+def levels_directory(tmp_path):
+    directory = tmp_path / "levels"
+    directory.mkdir()
+    write_level(directory, "a_solvable.json", "WWWWWW\nWPB GW\nWWWWWW")
+    write_level(directory, "b_dead.json", "WWWWW\nWB  W\nW P W\nW  GW\nWWWWW")
+    write_level(directory, "c_broken.json", "WWWW\nW  W\nWWWW")
+    return directory
+
+
+def test_check_level_reports_solution(levels_directory):
+    report = check_level(str(levels_directory / "a_solvable.json"))
+
+    assert report.status == "solved"
+    assert report.solvable is True
+    assert (report.pushes, report.moves) == (2, 2)
+    assert report.nodes > 0
+
+
+def test_check_level_reports_static_problems(levels_directory):
+    dead = check_level(str(levels_directory / "b_dead.json"))
+    broken = check_level(str(levels_directory / "c_broken.json"))
+
+    assert dead.status == "unsolvable" and dead.solvable is False
+    assert "dead square" in dead.error
+    assert broken.status == "invalid"
+
+
+def test_check_levels_in_parallel_keeps_order(levels_directory):
+    paths = sorted(str(path) for path in levels_directory.iterdir())
+
+    reports = check_levels(paths, workers=2, time_limit=5)
+
+    assert [report.path for report in reports] == paths
+    assert [report.status for report in reports] == [
+        "solved",
+        "unsolvable",
+        "invalid",
+    ]
+
+
+def test_main_writes_json_and_csv_reports(levels_directory, tmp_path):
+    json_report = tmp_path / "report.json"
+    csv_report = tmp_path / "report.csv"
+    arguments = [str(levels_directory), "--workers", "1", "--report"]
+
+    assert main(arguments + [str(json_report)]) == 1
+    assert main(arguments + [str(csv_report), "--validate-only"]) == 1
+
+    with open(json_report) as file:
+        assert [row["status"] for row in json.load(file)] == [
+            "solved",
+            "unsolvable",
+            "invalid",
+        ]
+    with open(csv_report, newline="") as file:
+        assert [row["status"] for row in csv.DictReader(file)] == [
+            "valid",
+            "unsolvable",
+            "invalid",
+        ]
+
+
+def test_a_level_the_solver_fails_on_does_not_stop_the_pack(
+    levels_directory, tmp_path, monkeypatch
+):
+    write_level(levels_directory, "d_crash.json", "WWWWWWW\nWP B GW\nWWWWWWW")
+    solve = solver.Solver.solve
+
+    def crash_on_one_level(self, method="astar"):
+        if self.width == 7:
+            raise MemoryError("no more room")
+        return solve(self, method)
+
+    monkeypatch.setattr(solver.Solver, "solve", crash_on_one_level)
+    report_path = tmp_path / "report.json"
+
+    main([str(levels_directory), "--workers", "1", "--report", str(report_path)])
+
+    with open(report_path) as file:
+        reports = json.load(file)
+    assert [row["status"] for row in reports] == [
+        "solved",
+        "unsolvable",
+        "invalid",
+        "error",
+    ]
+    assert reports[3]["error"] == "MemoryError: no more room"
+
+
+def test_a_level_past_the_hard_timeout_is_given_up(levels_directory):
+    rows = ["W" * 150] + ["W" + " " * 148 + "W"] * 148 + ["W" * 150]
+    rows[1] = "WP" + " " * 147 + "W"
+    rows[75] = "W" + " " * 40 + "G" + " " * 30 + "B" + " " * 76 + "W"
+    rows[77] = "W" + " " * 40 + "G" + " " * 30 + "B" + " " * 76 + "W"
+    write_level(levels_directory, "d_slow.json", "\n".join(rows))
+    paths = sorted(str(path) for path in levels_directory.iterdir())
+
+    reports = check_levels(paths, workers=2, time_limit=60, hard_timeout=1)
+
+    assert [report.status for report in reports] == [
+        "solved",
+        "unsolvable",
+        "invalid",
+        "timeout",
+    ]
+    assert reports[3].error == "no result within 1s"
@@ -0,0 +1,58 @@
+"""
+Pythoban Text Rendering
+
+Fonts are loaded once per size and rendered text is kept in an LRU cache, so a
+frame only renders the strings that changed since they were last drawn.
+"""
+
+import pygame
+from collections import OrderedDict
+from typing import Any
+
+
+class TextRenderer:
+    """
+    Renders antialiased text from a single font file.
+
+    ``max_surfaces`` bounds how many rendered surfaces are kept; the least
+    recently drawn ones are dropped first.
+    """
+
+    def __init__(self, font_path: str, max_surfaces: int = 256) -> None:
+        self.font_path = font_path
+        self.max_surfaces = max_surfaces
+        self.hits = 0
+        self.misses = 0
+        self._fonts: dict[int, pygame.font.Font] = {}
+        self._surfaces: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+
+    def get_font(self, size: int) -> pygame.font.Font:
+        font = self._fonts.get(size)
+        if font is None:
+            font = self._fonts[size] = pygame.font.Font(self.font_path, size)
+        return font
+
+    def render(
+        self, text: str, size: int, color: Any, underline: bool = False
+    ) -> pygame.Surface:
+        """Return the rendered text, only rendering it if it is not cached."""
+        key = (text, size, color, underline)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        font = self.get_font(size)
+        # Fonts are shared, so the underline must not leak into other texts
+        font.set_underline(underline)
+        surface = font.render(text, True, color)
+        font.set_underline(False)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_surfaces:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self) -> None:
+        self._fonts.clear()
+        self._surfaces.clear()
@@ -0,0 +1,116 @@
+"""
+Pythoban Level Thumbnails
+
+Previews of each level's starting position for the choose level menu. A
+thumbnail is rendered once, saved on disk under the hash of its map and kept
+in memory while it is on screen, so scrolling through thousands of levels only
+renders the ones never seen before.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from os.path import join
+from typing import Callable
+import pygame
+from model import Map
+from renderer import HeadlessRenderer, Tileset, load_tileset
+
+# Bump when thumbnails are drawn differently so old ones are rendered again
+THUMBNAIL_VERSION = 1
+
+
+class ThumbnailCache:
+    """
+    Level thumbnails no bigger than ``size``, keeping the map's aspect ratio.
+
+    ``cache_directory`` can be ``None`` to only keep thumbnails in memory,
+    where at most ``max_surfaces`` are kept, least recently drawn dropped first.
+    """
+
+    def __init__(
+        self,
+        size: tuple[int, int],
+        cache_directory: str | None = ".cache/thumbnails",
+        tileset: Tileset | None = None,
+        max_surfaces: int = 64,
+    ) -> None:
+        self.size = size
+        self.cache_directory = cache_directory
+        self.tileset = tileset
+        self.max_surfaces = max_surfaces
+        self.hits = 0
+        self.misses = 0  # Read from disk
+        self.renders = 0
+        self._surfaces: OrderedDict[str, pygame.Surface] = OrderedDict()
+
+    def get(self, map_hash: str, load_map: Callable[[], Map]) -> pygame.Surface:
+        """
+        Return the thumbnail of the map with ``map_hash``, its
+        ``Map.content_hash``; ``load_map`` is only called if it has to be
+        rendered.
+        """
+        surface = self._surfaces.get(map_hash)
+        if surface is not None:
+            self._surfaces.move_to_end(map_hash)
+            self.hits += 1
+            return surface
+        path = self._get_path(map_hash)
+        surface = self._read(path) if path else None
+        if surface is None:
+            surface = self.render(load_map())
+            if path:
+                self._write(path, surface)
+        else:
+            self.misses += 1
+        self._surfaces[map_hash] = surface
+        if len(self._surfaces) > self.max_surfaces:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def render(self, level_map: Map) -> pygame.Surface:
+        """Draw a map at the biggest whole tile size that fits, scaled below 1px."""
+        self.renders += 1
+        width, height = self.size
+        tile_size = max(1, min(width // level_map.width, height // level_map.height))
+        if self.tileset is None:
+            self.tileset = load_tileset()
+        surface = HeadlessRenderer(tile_size, self.tileset).render(level_map)
+        if surface.get_width() > width or surface.get_height() > height:
+            scale = min(width / surface.get_width(), height / surface.get_height())
+            surface = pygame.transform.smoothscale(
+                surface,
+                (
+                    max(1, int(surface.get_width() * scale)),
+                    max(1, int(surface.get_height() * scale)),
+                ),
+            )
+        return surface
+
+    def clear(self) -> None:
+        self._surfaces.clear()
+
+    def _get_path(self, map_hash: str) -> str | None:
+        if self.cache_directory is None:
+            return None
+        digest = hashlib.sha1(
+            json.dumps([THUMBNAIL_VERSION, map_hash, self.size]).encode()
+        ).hexdigest()[:16]
+        return join(self.cache_directory, f"{digest}.png")
+
+    @staticmethod
+    def _read(path: str) -> pygame.Surface | None:
+        try:
+            surface = pygame.image.load(path)
+        except (FileNotFoundError, pygame.error):
+            return None  # Not rendered yet, or corrupt and rendered again
+        return surface.convert() if pygame.display.get_surface() else surface
+
+    @staticmethod
+    def _write(path: str, surface: pygame.Surface) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # pygame picks the format from the extension, so keep .png last
+        temporary_path = f"{path[:-4]}.{os.getpid()}.tmp.png"
+        pygame.image.save(surface, temporary_path)
+        os.replace(temporary_path, path)
@@ -0,0 +1,131 @@
+"""
+Pythoban Transposition Table
+
+Memory-bounded cache of search results keyed by a compact state encoding:
+the box cells packed into a bitset followed by the player-region index.
+"""
+
+import sys
+from array import array
+from collections import OrderedDict
+from enum import ReprEnum
+
+# Rough cost of one OrderedDict entry besides its key: hash table slot, linked
+# list node and the value tuple
+LRU_ENTRY_OVERHEAD = 150
+# Cost of one depth-preferred slot besides its key: a list pointer plus two
+# 8-byte array items
+SLOT_OVERHEAD = 24
+
+
+class ReplacementPolicyEnum(str, ReprEnum):
+    depth = "depth"
+    lru = "lru"
+
+
+class TranspositionTable:
+    """
+    Stores a value per state without ever going over ``max_bytes``.
+
+    With the ``depth`` policy the table is a fixed array of slots indexed by
+    the key's hash and a colliding entry only replaces the resident one if it
+    was searched at least as deeply. With ``lru`` the least recently used
+    entries are evicted to make room.
+    """
+
+    def __init__(
+        self,
+        cell_count: int,
+        max_bytes: int = 64 * 1024 * 1024,
+        policy: ReplacementPolicyEnum | str = ReplacementPolicyEnum.depth,
+    ) -> None:
+        self.policy = ReplacementPolicyEnum(policy)
+        self.max_bytes = max_bytes
+        self._box_bytes = (cell_count + 7) // 8
+        self._player_bytes = max(1, (cell_count.bit_length() + 7) // 8)
+        self.key_size = sys.getsizeof(b"\0" * (self._box_bytes + self._player_bytes))
+        self.lookups = 0
+        self.hits = 0
+        self.stores = 0
+        self.evictions = 0
+        if self.policy == ReplacementPolicyEnum.depth:
+            self.capacity = max(1, max_bytes // (self.key_size + SLOT_OVERHEAD))
+            self._keys: list[bytes | None] = [None] * self.capacity
+            self._values = array("q", bytes(8 * self.capacity))
+            self._depths = array("q", bytes(8 * self.capacity))
+            self._used = 0
+        else:
+            self.capacity = max(1, max_bytes // (self.key_size + LRU_ENTRY_OVERHEAD))
+            self._entries: OrderedDict[bytes, tuple[int, int]] = OrderedDict()
+
+    def pack(self, box_bits: int, player: int) -> bytes:
+        """Encode a state: box bitset (bit ``i`` set for a box on cell ``i``)."""
+        return box_bits.to_bytes(self._box_bytes, "little") + player.to_bytes(
+            self._player_bytes, "little"
+        )
+
+    def __len__(self) -> int:
+        if self.policy == ReplacementPolicyEnum.depth:
+            return self._used
+        return len(self._entries)
+
+    @property
+    def bytes_used(self) -> int:
+        """Memory held by the table's entries, in bytes."""
+        if self.policy == ReplacementPolicyEnum.depth:
+            return self.capacity * SLOT_OVERHEAD + self._used * self.key_size
+        return len(self._entries) * (self.key_size + LRU_ENTRY_OVERHEAD)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def get(self, key: bytes) -> int | None:
+        self.lookups += 1
+        if self.policy == ReplacementPolicyEnum.depth:
+            slot = hash(key) % self.capacity
+            if self._keys[slot] != key:
+                return None
+            self.hits += 1
+            return self._values[slot]
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def store(self, key: bytes, value: int, depth: int = 0) -> None:
+        """
+        Remember ``value`` for a state.
+
+        ``depth`` measures how much search the value stands for; the depth
+        policy keeps the deeper of two colliding entries.
+        """
+        self.stores += 1
+        if self.policy == ReplacementPolicyEnum.depth:
+            slot = hash(key) % self.capacity
+            resident = self._keys[slot]
+            if resident is None:
+                self._used += 1
+            elif resident != key:
+                if depth < self._depths[slot]:
+                    return
+                self.evictions += 1
+            self._keys[slot] = key
+            self._values[slot] = value
+            self._depths[slot] = depth
+            return
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        elif len(self._entries) >= self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        self._entries[key] = (value, depth)
+
+    def clear(self) -> None:
+        if self.policy == ReplacementPolicyEnum.depth:
+            self._keys = [None] * self.capacity
+            self._used = 0
+        else:
+            self._entries.clear()
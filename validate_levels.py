@@ -0,0 +1,318 @@
+"""
+Pythoban Level Validator
+
+Command-line entry point that loads every level in a directory, solves or
+validates them in parallel and writes a JSON or CSV report.
+
+    python validate_levels.py levels --workers 8 --timeout 10 --report report.json
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import Connection, wait
+from os import listdir
+from os.path import isfile, join
+from typing import List
+from pydantic import BaseModel
+from model import Level
+from solver import SolverMethodEnum, Solver
+
+REPORT_FIELDS = [
+    "path",
+    "status",
+    "solvable",
+    "pushes",
+    "moves",
+    "time",
+    "nodes",
+    "error",
+]
+
+# Seconds a worker may run past the time limit before its level is given up
+HARD_TIMEOUT_GRACE = 5.0
+
+
+class LevelReport(BaseModel):
+    path: str
+    status: str
+    solvable: bool | None = None
+    pushes: int | None = None
+    moves: int | None = None
+    time: float = 0.0  # secs
+    nodes: int = 0
+    error: str = ""
+
+
+def get_level_paths(directory: str) -> List[str]:
+    return sorted(
+        join(directory, file)
+        for file in listdir(directory)
+        if isfile(join(directory, file))
+    )
+
+
+def find_static_problem(level: Level) -> str:
+    """Return why a level can never be solved, or an empty string."""
+    level_map = level.map
+    box_count = sum(level_map.boxes)
+    if not level_map.goals:
+        return "level has no goals"
+    if box_count < len(level_map.goals):
+        return f"{box_count} boxes for {len(level_map.goals)} goals"
+    if box_count == len(level_map.goals):
+        dead_squares = level.get_dead_squares()
+        for index, has_box in enumerate(level_map.boxes):
+            if has_box and dead_squares[index]:
+                position = level_map.position(index)
+                return f"box at ({position.x}, {position.y}) is on a dead square"
+    return ""
+
+
+def check_level(
+    path: str,
+    method: str = SolverMethodEnum.astar,
+    time_limit: float | None = None,
+    node_limit: int | None = None,
+    validate_only: bool = False,
+) -> LevelReport:
+    """Load, validate and optionally solve one level file."""
+    start_time = time.perf_counter()
+    try:
+        level = Level.load_from_file(path)
+    except (OSError, ValueError, KeyError, TypeError) as error:
+        return LevelReport(
+            path=path,
+            status="invalid",
+            error=str(error),
+            time=time.perf_counter() - start_time,
+        )
+
+    problem = find_static_problem(level)
+    if problem:
+        return LevelReport(
+            path=path,
+            status="unsolvable",
+            solvable=False,
+            error=problem,
+            time=time.perf_counter() - start_time,
+        )
+    if validate_only:
+        return LevelReport(
+            path=path, status="valid", time=time.perf_counter() - start_time
+        )
+
+    try:
+        solution = Solver(level, time_limit=time_limit, node_limit=node_limit).solve(
+            method
+        )
+    except Exception as error:  # One broken level must not stop the pack
+        return LevelReport(
+            path=path,
+            status="error",
+            error=f"{type(error).__name__}: {error}",
+            time=time.perf_counter() - start_time,
+        )
+    solvable = {"solved": True, "unsolvable": False}.get(solution.status)
+    return LevelReport(
+        path=path,
+        status=solution.status.value,
+        solvable=solvable,
+        pushes=solution.push_count if solution.solved else None,
+        moves=solution.move_count if solution.solved else None,
+        time=time.perf_counter() - start_time,
+        nodes=solution.nodes_expanded,
+    )
+
+
+def check_levels(
+    paths: List[str],
+    workers: int | None = None,
+    method: str = SolverMethodEnum.astar,
+    time_limit: float | None = None,
+    node_limit: int | None = None,
+    validate_only: bool = False,
+    hard_timeout: float | None = None,
+) -> List[LevelReport]:
+    """
+    Check levels across worker processes, keeping the order of ``paths``.
+
+    A level still running ``hard_timeout`` seconds after it started, by
+    default ``HARD_TIMEOUT_GRACE`` past the time limit, is reported as a
+    timeout and only its worker is killed and replaced.
+    """
+    workers = workers or os.cpu_count() or 1
+    arguments = (method, time_limit, node_limit, validate_only)
+    if workers == 1:
+        return [check_level(path, *arguments) for path in paths]
+    if hard_timeout is None and time_limit is not None:
+        hard_timeout = time_limit + HARD_TIMEOUT_GRACE
+    reports: dict[int, LevelReport] = {}
+    pending = deque(enumerate(paths))
+    idle = [_Worker(arguments) for _ in range(min(workers, len(paths)))]
+    busy: list[_Worker] = []
+    try:
+        while pending or busy:
+            while pending and idle:
+                worker = idle.pop()
+                worker.start(*pending.popleft(), hard_timeout)
+                busy.append(worker)
+            deadlines = [worker.deadline for worker in busy if worker.deadline]
+            ready = wait(
+                [worker.connection for worker in busy]
+                + [worker.process.sentinel for worker in busy],
+                timeout=(
+                    max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                ),
+            )
+            now = time.monotonic()
+            for worker in list(busy):
+                if worker.connection in ready or worker.process.sentinel in ready:
+                    report = worker.receive()
+                elif worker.deadline is not None and worker.deadline <= now:
+                    report = LevelReport(
+                        path=worker.path,
+                        status="timeout",
+                        time=hard_timeout,
+                        error=f"no result within {hard_timeout:g}s",
+                    )
+                    worker.kill()
+                else:
+                    continue
+                reports[worker.index] = report
+                busy.remove(worker)
+                if not worker.process.is_alive():
+                    worker.stop()
+                    worker = _Worker(arguments)
+                idle.append(worker)
+    finally:
+        for worker in idle + busy:
+            worker.stop()
+    return [reports[index] for index in range(len(paths))]
+
+
+class _Worker:
+    """A process checking one level at a time, sent over its own pipe."""
+
+    def __init__(self, arguments: tuple) -> None:
+        self.connection, child_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_check_levels_sent, args=(child_connection, arguments), daemon=True
+        )
+        self.process.start()
+        child_connection.close()
+        self.index = -1
+        self.path = ""
+        self.deadline: float | None = None
+
+    def start(self, index: int, path: str, hard_timeout: float | None) -> None:
+        self.index, self.path = index, path
+        self.deadline = (
+            time.monotonic() + hard_timeout if hard_timeout is not None else None
+        )
+        self.connection.send(path)
+
+    def receive(self) -> LevelReport:
+        try:
+            return self.connection.recv()
+        except EOFError:  # The process died, e.g. killed for running out of memory
+            self.process.join()
+            return LevelReport(
+                path=self.path,
+                status="error",
+                error=f"worker exited with code {self.process.exitcode}",
+            )
+
+    def kill(self) -> None:
+        # SIGKILL, as SIGTERM may be handled, e.g. by SDL in forked workers
+        self.process.kill()
+        self.process.join()
+
+    def stop(self) -> None:
+        if self.process.is_alive():
+            try:
+                self.connection.send(None)
+            except OSError:
+                pass
+            self.process.join(timeout=1)
+            if self.process.is_alive():
+                self.kill()
+        self.connection.close()
+
+
+def _check_levels_sent(connection: Connection, arguments: tuple) -> None:
+    """Worker loop: check every path sent until ``None`` comes."""
+    while (path := connection.recv()) is not None:
+        connection.send(check_level(path, *arguments))
+
+
+def write_report(reports: List[LevelReport], report_path: str) -> None:
+    if report_path.endswith(".csv"):
+        with open(report_path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            for report in reports:
+                writer.writerow(report.model_dump())
+    else:
+        with open(report_path, "w") as file:
+            json.dump([report.model_dump() for report in reports], file, indent=4)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Solve or validate every Pythoban level in a directory."
+    )
+    parser.add_argument("directory", nargs="?", default="levels")
+    parser.add_argument(
+        "--method",
+        choices=[method.value for method in SolverMethodEnum],
+        default=SolverMethodEnum.astar.value,
+    )
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds per level")
+    parser.add_argument("--node-limit", type=int, default=None)
+    parser.add_argument(
+        "--workers", type=int, default=None, help="defaults to the CPU count"
+    )
+    parser.add_argument(
+        "--validate-only",
+        action="store_true",
+        help="only run the static checks, without searching for a solution",
+    )
+    parser.add_argument(
+        "--report", default="report.json", help="a .json or .csv file path"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    start_time = time.perf_counter()
+    reports = check_levels(
+        get_level_paths(args.directory),
+        workers=args.workers,
+        method=args.method,
+        time_limit=args.timeout,
+        node_limit=args.node_limit,
+        validate_only=args.validate_only,
+    )
+    write_report(reports, args.report)
+
+    statuses: dict[str, int] = {}
+    for report in reports:
+        statuses[report.status] = statuses.get(report.status, 0) + 1
+    summary = ", ".join(f"{count} {status}" for status, count in statuses.items())
+    print(
+        f"Checked {len(reports)} levels in "
+        f"{time.perf_counter() - start_time:.1f}s: {summary or 'nothing to do'}"
+    )
+    print(f"Report written to {args.report}")
+    return 0 if all(report.status in ("solved", "valid") for report in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())